@@ -4,12 +4,40 @@
 
   // Widget configuration
   var config = {
-    apiUrl: 'https://minepenge.dk/api',
+    // Ready-made payloads per theme and limit, written by build_articles.py (scraper/widgets.py)
+    dataUrl: 'https://minepenge.dk/data/widgets',
+    // Server-Sent Events from the read API, one event per new build
+    streamUrl: 'https://minepenge.dk/api/articles/stream',
+    // Widgets refetch within this window after an update, so embeds don't all hit the CDN at once
+    refreshSpreadMs: 30000,
+    maxLimit: 10,
     defaultTheme: 'all',
     defaultLimit: 3,
     defaultShowSource: true
   };
 
+  // File name for a theme: æ/ø/å folded as in the build ("gæld" -> "gaeld")
+  function themeSlug(theme) {
+    return theme.toLowerCase().replace(/æ/g, 'ae').replace(/ø/g, 'oe').replace(/å/g, 'aa');
+  }
+
+  // One stream per page, shared by every widget on it
+  var updateListeners = [];
+  var updateStream = null;
+
+  function onUpdate(listener) {
+    updateListeners.push(listener);
+    if (updateStream || typeof EventSource === 'undefined') {
+      return;
+    }
+    updateStream = new EventSource(config.streamUrl);
+    updateStream.addEventListener('update', function() {
+      updateListeners.forEach(function(callback) {
+        setTimeout(callback, Math.random() * config.refreshSpreadMs);
+      });
+    });
+  }
+
   // Widget class
   function MinePengeWidget() {
     this.init = function(options) {
@@ -22,8 +50,9 @@
 
       this.container = document.getElementById(settings.container);
       this.theme = settings.theme;
-      this.limit = settings.limit;
+      this.limit = Math.min(Math.max(parseInt(settings.limit, 10) || config.defaultLimit, 1), config.maxLimit);
       this.showSource = settings.showSource;
+      this.autoRefresh = settings.autoRefresh !== false;
 
       if (!this.container) {
         console.error('MinePenge Widget: Container not found');
@@ -31,42 +60,42 @@
       }
 
       this.loadArticles();
+      if (this.autoRefresh) {
+        onUpdate(this.loadArticles.bind(this, true));
+      }
     };
 
-    this.loadArticles = function() {
+    this.loadArticles = function(refresh) {
       var self = this;
       
-      // Show loading state
-      this.container.innerHTML = '<div class="minepenge-widget"><div class="widget-header"><h3>MinePenge.dk</h3></div><div class="widget-content"><p>Indlæser artikler...</p></div></div>';
+      // Show loading state; a refresh keeps the current articles until the new ones arrive
+      if (!refresh) {
+        this.container.innerHTML = '<div class="minepenge-widget"><div class="widget-header"><h3>MinePenge.dk</h3></div><div class="widget-content"><p>Indlæser artikler...</p></div></div>';
+      }
 
-      // Fetch articles from API
-      fetch(config.apiUrl + '/articles/relevant?min_score=3.0')
+      // One small static file holding exactly the articles the widget shows
+      fetch(config.dataUrl + '/' + themeSlug(this.theme || config.defaultTheme) + '-' + this.limit + '.json',
+            refresh ? { cache: 'no-cache' } : undefined)
         .then(function(response) {
+          if (!response.ok) {
+            throw new Error('HTTP ' + response.status);
+          }
           return response.json();
         })
         .then(function(data) {
           self.renderWidget(data.articles);
         })
         .catch(function(error) {
+          if (refresh) {
+            return;
+          }
           console.error('MinePenge Widget: Error loading articles', error);
           self.container.innerHTML = '<div class="minepenge-widget"><div class="widget-header"><h3>MinePenge.dk</h3></div><div class="widget-content"><p>Kunne ikke indlæse artikler</p></div></div>';
         });
     };
 
     this.renderWidget = function(articles) {
-      // Filter by theme if specified
-      if (this.theme && this.theme !== 'all') {
-        articles = articles.filter(function(article) {
-          return article.tags && article.tags.some(function(tag) {
-            return tag.toLowerCase().includes(this.theme.toLowerCase());
-          }.bind(this));
-        }.bind(this));
-      }
-
-      // Limit articles
-      articles = articles.slice(0, this.limit);
-
-      // Generate widget HTML
+      // Already filtered by theme, ranked and limited by the build
       var html = this.generateWidgetHTML(articles);
       this.container.innerHTML = html;
     };
@@ -96,7 +125,9 @@
           if (this.showSource) {
             html += '<span class="article-source">' + article.source + '</span>';
           }
-          html += '<span class="article-date">' + article.publishedAt + '</span>';
+          if (article.date_published) {
+            html += '<span class="article-date">' + article.date_published + '</span>';
+          }
           if (article.relevance_score) {
             html += '<span class="article-relevance">Relevans: ' + article.relevance_score + '</span>';
           }
@@ -0,0 +1,751 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Read API
+Læse-API over build-output for de endpoints frontenden allerede kalder på port 8000.
+
+    python api_server.py [--host 127.0.0.1] [--port 8000] [--data-dir ../public/data] [--index-dir data/index]
+                         [--reload-interval 2] [--pipeline-run data/tagged/pipeline_run.json] [--stale-after 30]
+                         [--cache-mb 64]
+
+GET /api/articles            alle artikler som articles-index.json ({articles, metadata})
+    ?page=&pageSize=         pagineret (pageSize maks. MAX_PAGE_SIZE), med `pagination`
+    ?source=&category=&audience=&complexity=
+                             facetfiltre; gentag parameteren eller kommasepareér for flere værdier
+    ?from=&to=               udgivelsesdato (epoch-sekunder eller ÅÅÅÅ-MM-DD), inklusive
+    ?sort=                   newest (standard), oldest, source eller relevance
+    ?cursor=&pageSize=       keyset-side: tom cursor giver første side, derefter `pagination.nextCursor`;
+                             samme filtre skal gentages, sorteringen følger cursoren
+GET /api/articles/relevant   de højest scorede artikler med `relevance_score` (se relevance.py)
+    ?min_score=&limit=       scoregrænse (0-10) og antal (standard 20, maks. MAX_PAGE_SIZE); facetfiltre som ovenfor
+GET /api/articles/search     fuldtekstsøgning rangeret efter BM25 med `search_score` (se fulltext_index.py)
+    ?q=&page=&pageSize=      ord skal alle matche; "frase" og præfiks*; facetfiltre som ovenfor
+GET /api/articles/stream     Server-Sent Events med deltaen for hvert nyt build (se article_feed.py)
+    ?since=<version>         version klienten har; Last-Event-ID går forud ved genforbindelse
+GET /api/articles/<id>       detalje-shardet med fuld tekst
+GET /health                  driftsstatus som JSON: ok, degraded (seneste pipelinekørsel fejlede)
+                             eller stale (ingen vellykket kørsel i --stale-after timer); også /api/health
+GET /metrics                 Prometheus-tekstformat: latens og svar pr. endpoint, cache, stream-klienter,
+                             buildets version, alder og artefaktstørrelser samt pipelinens tider pr. kilde
+
+Alle svar har en ETag ud fra build-versionen og forespørgslen, så If-None-Match giver 304
+uden at svaret bygges. Serveren er stdlib-only: asyncio med en minimal HTTP/1.1-protokol i én tråd.
+Færdige svar på lister, relevant og søgninger gemmes i en LRU-cache begrænset af bytes og nøglet
+på samme ETag; den tømmes på én gang, når et nyt build skiftes ind.
+
+Når build_articles.py skriver et nyt listeindeks, indlæses det nye build i en baggrundstråd og
+skiftes ind med én tildeling i event-løkken. En forespørgsel behandles færdig inden løkken kan
+skifte, så den ser enten det gamle eller det nye build; ingen forbindelser lukkes.
+Deltaen mellem de to builds beregnes i samme baggrundstråd og sendes til alle stream-klienter
+ved skiftet, så de ikke skal hente hele listen igen. Tusindvis af stille forbindelser koster
+kun en protokol og en socket hver; serveren hæver derfor grænsen for åbne filer ved start.
+"""
+
+import gc
+import os
+import sys
+import gzip
+import json
+import math
+import asyncio
+import time
+import hashlib
+import logging
+import argparse
+from datetime import datetime, timezone
+from http import HTTPStatus
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+from article_feed import ArticleFeed, update_event, HEARTBEAT_INTERVAL
+from article_store import ArticleStore, PUBLIC_DATA_DIR, FULLTEXT_DIR
+from facets import FACET_FIELDS
+from metrics import (MetricsText, RequestMetrics, PIPELINE_RUN_PATH, add_pipeline_metrics,
+                     load_pipeline_run)
+from sort_orders import DEFAULT_SORT, encode_cursor, decode_cursor
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8000
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+GZIP_MIN_BYTES = 64 * 1024  # sider sendes ukomprimeret; gzip af hvert svar koster mere end det sparer
+MAX_HEADER_BYTES = 64 * 1024
+MAX_SEARCH_RESULTS = 1000  # dybere sider end dette rangeres ikke
+QUERY_CACHE_MB = 64
+QUERY_CACHE_ENTRY_SHARE = 16  # svar større end 1/16 af cachen gemmes ikke; de ville skubbe alt andet ud
+CACHE_ENTRY_OVERHEAD = 200  # bytes pr. post ud over svaret (nøgle, tupel og ordbogens plads)
+RELOAD_INTERVAL = 2.0  # sekunder mellem tjek for et nyt build (0 slår genindlæsning fra)
+RELOAD_SWITCH_INTERVAL = 0.0005  # GIL-skifteinterval mens et build indlæses, så løkken ikke venter 5 ms ad gangen
+RELEASE_CHUNK = 1024  # elementer der frigives ad gangen fra et afløst build
+LISTEN_BACKLOG = 4096  # stream-klienter genforbinder samtidig efter en genstart
+STALE_AFTER_HOURS = 30.0  # pipelinen kører dagligt (se README); en kørsel må gerne fejle én gang
+JSON_TYPE = 'application/json; charset=utf-8'
+SERVER_NAME = 'MinePengeAPI/1.0'
+REASONS = {status.value: status.phrase for status in HTTPStatus}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _parse_date(value: str, end_of_day: bool) -> int:
+    if value.isdigit():
+        return int(value)
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise BadRequest(f"Ugyldig dato: {value}")
+    return int(day.timestamp()) + (86399 if end_of_day else 0)
+
+
+def _parse_int(params: Dict[str, List[str]], name: str, default: int, low: int, high: int) -> int:
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[-1])
+    except ValueError:
+        raise BadRequest(f"{name} skal være et heltal")
+    if not low <= value <= high:
+        raise BadRequest(f"{name} skal være mellem {low} og {high}")
+    return value
+
+
+def parse_query(query: str) -> Dict[str, List[str]]:
+    """Parametre -> værdier; kommaseparerede værdier deles op, og tomme værdier giver en tom liste"""
+    params: Dict[str, List[str]] = {}
+    for name, value in parse_qsl(query, keep_blank_values=True):
+        params.setdefault(name, []).extend(part for part in value.split(',') if part)
+    return params
+
+
+def query_etag(store: ArticleStore, path: str, params: Dict[str, List[str]]) -> str:
+    """ETag uden at bygge svaret: build-version plus den normaliserede forespørgsel"""
+    canonical = path + '?' + '&'.join(f"{name}={','.join(sorted(values))}" for name, values in sorted(params.items()))
+    return f'"{store.etag_base}-{hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]}"'
+
+
+def articles_response(store: ArticleStore, params: Dict[str, List[str]]) -> bytes:
+    """Svaret for GET /api/articles"""
+    filters = {facet: params[facet] for facet in FACET_FIELDS if params.get(facet)}
+    date_from = _parse_date(params['from'][-1], end_of_day=False) if params.get('from') else None
+    date_to = _parse_date(params['to'][-1], end_of_day=True) if params.get('to') else None
+    sort = params['sort'][-1] if params.get('sort') else DEFAULT_SORT
+    if 'cursor' in params:
+        return cursor_response(store, params, filters, date_from, date_to)
+    if sort not in store.sort_orders.orders:
+        raise BadRequest(f"Ukendt sortering: {sort}")
+
+    paged = 'page' in params or 'pageSize' in params
+    if not paged and not filters and date_from is None and date_to is None and sort == DEFAULT_SORT:
+        return store.full_body
+    if not paged:
+        positions, _ = store.query(filters, date_from, date_to, sort)
+        return store.render(positions, None)
+
+    page = _parse_int(params, 'page', 1, 1, 10 ** 9)
+    page_size = _parse_int(params, 'pageSize', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    positions, total = store.query(filters, date_from, date_to, sort, (page - 1) * page_size, page_size)
+    total_pages = max(1, -(-total // page_size))
+    return store.render(positions, {
+        'currentPage': page,
+        'pageSize': page_size,
+        'totalArticles': total,
+        'totalPages': total_pages,
+        'hasNextPage': page < total_pages,
+        'hasPrevPage': page > 1
+    })
+
+
+def cursor_response(store: ArticleStore, params: Dict[str, List[str]], filters: Dict[str, List[str]],
+                    date_from: Optional[int], date_to: Optional[int]) -> bytes:
+    """GET /api/articles?cursor=: siden efter cursoren, fundet ved binær søgning i sorteringen"""
+    if 'page' in params:
+        raise BadRequest("cursor og page kan ikke kombineres")
+    sort = params['sort'][-1] if params.get('sort') else DEFAULT_SORT
+    after = None
+    if params['cursor']:
+        try:
+            sort_from_cursor, after = decode_cursor(params['cursor'][-1])
+        except ValueError as e:
+            raise BadRequest(str(e))
+        if params.get('sort') and sort != sort_from_cursor:
+            raise BadRequest("cursor hører til en anden sortering")
+        sort = sort_from_cursor
+    if sort not in store.sort_orders.orders:
+        raise BadRequest(f"Ukendt sortering: {sort}")
+    page_size = _parse_int(params, 'pageSize', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    try:
+        positions, total, more = store.query_after(filters, date_from, date_to, sort, after, page_size)
+    except TypeError:
+        raise BadRequest("Ugyldig cursor")
+    return store.render(positions, {
+        'pageSize': page_size,
+        'totalArticles': total,
+        'hasNextPage': more,
+        'nextCursor': encode_cursor(sort, store.sort_key(sort, positions[-1])) if more else None
+    })
+
+
+def _parse_float(params: Dict[str, List[str]], name: str, default: float) -> float:
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        value = float(values[-1])
+    except ValueError:
+        raise BadRequest(f"{name} skal være et tal")
+    # float() tager også 'nan' og 'inf', som ingen score kan sammenlignes meningsfuldt med
+    if not math.isfinite(value):
+        raise BadRequest(f"{name} skal være et endeligt tal")
+    return value
+
+
+def relevant_response(store: ArticleStore, params: Dict[str, List[str]]) -> bytes:
+    """Svaret for GET /api/articles/relevant: top-k fra det forsorterede scoreindeks"""
+    min_score = _parse_float(params, 'min_score', 0.0)
+    limit = _parse_int(params, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    filters = {facet: params[facet] for facet in FACET_FIELDS if params.get(facet)}
+    mask = store.facets.filter_mask(filters) if filters else None
+    return store.render_scored(store.relevance.top(limit, min_score, mask))
+
+
+def search_response(store: ArticleStore, params: Dict[str, List[str]]) -> bytes:
+    """Svaret for GET /api/articles/search: én side af de BM25-rangerede træffere"""
+    query = ' '.join(params.get('q', [])).strip()
+    if not query:
+        raise BadRequest("q mangler")
+    page_size = _parse_int(params, 'pageSize', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    page = _parse_int(params, 'page', 1, 1, MAX_SEARCH_RESULTS // page_size)
+    filters = {facet: params[facet] for facet in FACET_FIELDS if params.get(facet)}
+    allowed = store.facets.filter_mask(filters) if filters else None
+    result = store.fulltext.search(query, page_size, (page - 1) * page_size, allowed)
+    total = result['total']
+    total_pages = max(1, -(-total // page_size))
+    return store.render_search(result['hits'], {
+        'currentPage': page,
+        'pageSize': page_size,
+        'totalArticles': total,
+        'totalExact': result['exact'],
+        'totalPages': total_pages,
+        'hasNextPage': page < total_pages,
+        'hasPrevPage': page > 1
+    })
+
+
+class ResponseCache:
+    """
+    LRU-cache af færdige svar begrænset af bytes, nøglet på ETag (build-version + normaliseret
+    forespørgsel). Hver post husker hvor lang tid svaret tog at bygge, så cachens besparelse kan måles.
+
+    Serveren er én tråd, og et svar bygges færdigt før løkken læser næste forespørgsel; samtidige
+    forespørgsler på samme nøgle bygger derfor svaret én gang, og resten rammer cachen.
+    """
+
+    def __init__(self, max_bytes: int = QUERY_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict = OrderedDict()
+        self.bytes = 0
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.saved: Counter = Counter()
+        self.evictions = 0
+
+    def get(self, key: str, endpoint: str = '') -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses[endpoint] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits[endpoint] += 1
+        self.saved[endpoint] += entry[1]
+        return entry[0]
+
+    def put(self, key: str, body: bytes, seconds: float = 0.0):
+        size = len(body) + CACHE_ENTRY_OVERHEAD
+        if size > self.max_bytes // QUERY_CACHE_ENTRY_SHARE:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= len(old[0]) + CACHE_ENTRY_OVERHEAD
+        self.entries[key] = (body, seconds)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (evicted, _) = self.entries.popitem(last=False)
+            self.bytes -= len(evicted) + CACHE_ENTRY_OVERHEAD
+            self.evictions += 1
+
+    def fetch(self, key: str, endpoint: str, build: Callable[[], bytes]) -> bytes:
+        """Svaret fra cachen, ellers bygges og gemmes det"""
+        body = self.get(key, endpoint)
+        if body is None:
+            started = time.perf_counter()
+            body = build()
+            self.put(key, body, time.perf_counter() - started)
+        return body
+
+    def reset(self):
+        """Glemmer alle svar på én gang (nyt build); tællerne fortsætter"""
+        self.entries = OrderedDict()
+        self.bytes = 0
+
+
+class Response:
+    __slots__ = ('status', 'body', 'etag', 'gzipped', 'headers', 'content_type')
+
+    def __init__(self, status: int, body: bytes = b'', etag: Optional[str] = None,
+                 gzipped: Optional[bytes] = None, headers: Optional[List[Tuple[str, str]]] = None,
+                 content_type: str = JSON_TYPE):
+        self.status = status
+        self.body = body
+        self.etag = etag
+        self.gzipped = gzipped
+        self.headers = headers or []
+        self.content_type = content_type
+
+
+def _error(status: int, message: str) -> Response:
+    return Response(status, json.dumps({'error': message}, ensure_ascii=False).encode('utf-8'))
+
+
+def handle_get(store: ArticleStore, target: str, if_none_match: str, cache: ResponseCache) -> Response:
+    """Svaret på en GET-forespørgsel (uden HTTP-detaljer, så det kan kaldes direkte)"""
+    url = urlsplit(target)
+    path = url.path.rstrip('/') or '/'
+    try:
+        params = parse_query(url.query)
+        etag = query_etag(store, path, params)
+        if path == '/api/articles':
+            if etag in if_none_match:
+                return Response(304, etag=etag)
+            # Hele listen er bygget ved indlæsning; forsiden, kilde- og kategorilister serveres fra cachen
+            body = cache.fetch(etag, 'articles', lambda: articles_response(store, params)) if params \
+                else store.full_body
+            return Response(200, body, etag, store.full_body_gzip if body is store.full_body else None)
+        if path in ('/api/articles/relevant', '/api/articles/search'):
+            # Widgets på andre sites og populære søgninger rammer samme få forespørgsler
+            if etag in if_none_match:
+                return Response(304, etag=etag)
+            endpoint = path[len('/api/articles/'):]
+            body = cache.fetch(etag, endpoint, lambda: (relevant_response if endpoint == 'relevant'
+                                                        else search_response)(store, params))
+            return Response(200, body, etag)
+        if path.startswith('/api/articles/'):
+            body = store.detail(unquote(path[len('/api/articles/'):]))
+            if body is None:
+                return _error(404, 'Artiklen findes ikke')
+            return Response(304, etag=etag) if etag in if_none_match else Response(200, body, etag)
+        return _error(404, 'Ukendt endpoint')
+    except BadRequest as e:
+        return _error(400, str(e))
+
+
+def endpoint_name(path: str) -> str:
+    """Endpointet som metrik-label; artikel-id'er og ukendte stier samles, så antallet er fast"""
+    if path == '/api/articles':
+        return 'articles'
+    if path in ('/api/articles/relevant', '/api/articles/search', '/api/articles/stream'):
+        return path[len('/api/articles/'):]
+    if path.startswith('/api/articles/'):
+        return 'detail'
+    if path in ('/health', '/api/health'):
+        return 'health'
+    if path == '/metrics':
+        return 'metrics'
+    return 'other'
+
+
+_PREFLIGHT = [('Access-Control-Allow-Methods', 'GET, OPTIONS'),
+              ('Access-Control-Allow-Headers', 'If-None-Match, Last-Event-ID'),
+              ('Access-Control-Max-Age', '86400')]
+
+
+def encode_response(response: Response, accept_gzip: bool, keep_alive: bool, head_only: bool = False) -> bytes:
+    body = response.body
+    headers = [
+        f"HTTP/1.1 {response.status} {REASONS.get(response.status, '')}",
+        f"Server: {SERVER_NAME}",
+        # Frontenden kører på Vites dev-port og henter fra port 8000
+        'Access-Control-Allow-Origin: *',
+        'Access-Control-Expose-Headers: ETag'
+    ]
+    headers += [f'{name}: {value}' for name, value in response.headers]
+    if body:
+        gzipped = response.gzipped if accept_gzip else None
+        if accept_gzip and gzipped is None and len(body) >= GZIP_MIN_BYTES:
+            gzipped = gzip.compress(body, compresslevel=1)
+        headers += [f'Content-Type: {response.content_type}', 'Cache-Control: no-cache', 'Vary: Accept-Encoding']
+        if gzipped is not None:
+            body = gzipped
+            headers.append('Content-Encoding: gzip')
+    if response.etag:
+        headers.append(f'ETag: {response.etag}')
+    headers.append(f'Content-Length: {len(body)}')
+    if not keep_alive:
+        headers.append('Connection: close')
+    head = ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1')
+    return head if head_only else head + body
+
+
+class HttpProtocol(asyncio.Protocol):
+    """
+    Minimal HTTP/1.1 over asyncio: ét svar pr. forespørgsel, keep-alive og pipelining.
+    Én tråd uden låse; en forespørgsel tager under et millisekund, så den blokerer ikke løkken.
+    """
+
+    def __init__(self, server: 'ApiServer'):
+        self.server = server
+        self.transport = None
+        self.buffer = b''
+        self.streaming = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data: bytes):
+        if self.streaming:
+            return  # forbindelsen er en SSE-stream; klienten sender ikke flere forespørgsler
+        self.buffer += data
+        while self.transport is not None:
+            end = self.buffer.find(b'\r\n\r\n')
+            if end < 0:
+                if len(self.buffer) > MAX_HEADER_BYTES:
+                    self._reply(_error(431, 'For store headere'), False)
+                return
+            lines = self.buffer[:end].decode('latin-1').split('\r\n')
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            # Kun cifre: int() tager også fortegn, mellemrum og '_', og en forkert længde forskyder næste forespørgsel
+            content_length = headers.get('content-length') or '0'
+            if not (content_length.isascii() and content_length.isdigit()):
+                self._reply(_error(400, 'Ugyldig Content-Length'), False)
+                return
+            length = int(content_length)
+            if len(self.buffer) < end + 4 + length:
+                return  # en body (fx POST) skal læses helt, så næste forespørgsel starter rigtigt
+            self.buffer = self.buffer[end + 4 + length:]
+            self._handle(lines[0], headers)
+
+    def _handle(self, request_line: str, headers: Dict[str, str]):
+        try:
+            method, target, version = request_line.split(' ')
+        except ValueError:
+            self._reply(_error(400, 'Ugyldig forespørgsel'), False)
+            return
+        started = time.perf_counter()
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        path = urlsplit(target).path.rstrip('/') or '/'
+        if method == 'GET' and path == '/api/articles/stream':
+            self._stream(target, headers)
+            return
+        if method == 'OPTIONS':
+            response = Response(204, headers=_PREFLIGHT)
+        elif method not in ('GET', 'HEAD'):
+            response = _error(405, 'Kun GET understøttes')
+        elif path == '/metrics':
+            response = self.server.metrics_response()
+        elif path in ('/health', '/api/health'):
+            response = self.server.health_response()
+        else:
+            response = handle_get(self.server.store, target, headers.get('if-none-match', ''), self.server.cache)
+        self._reply(response, keep_alive, 'gzip' in headers.get('accept-encoding', ''), method == 'HEAD')
+        # Tiden dækker opbygning og kodning af svaret; afsendelsen sker i løkken bagefter
+        self.server.requests.observe(endpoint_name(path), response.status, time.perf_counter() - started)
+
+    def _reply(self, response: Response, keep_alive: bool, accept_gzip: bool = False, head_only: bool = False):
+        self.transport.write(encode_response(response, accept_gzip, keep_alive, head_only))
+        if not keep_alive:
+            self.transport.close()
+            self.transport = None
+
+    def _stream(self, target: str, headers: Dict[str, str]):
+        """Gør forbindelsen til en SSE-stream; svaret har ingen længde og varer til forbindelsen lukkes"""
+        since = headers.get('last-event-id') or (parse_query(urlsplit(target).query).get('since') or [None])[-1]
+        if since is not None and not since.isdigit():
+            self._reply(_error(400, 'since skal være en version'), False)
+            return
+        self.streaming = True
+        self.buffer = b''
+        self.transport.write((f"HTTP/1.1 200 OK\r\nServer: {SERVER_NAME}\r\n"
+                              "Access-Control-Allow-Origin: *\r\n"
+                              "Content-Type: text/event-stream; charset=utf-8\r\n"
+                              "Cache-Control: no-cache\r\n"
+                              # nginx må ikke buffere hændelserne
+                              "X-Accel-Buffering: no\r\n"
+                              "Connection: close\r\n\r\n").encode('latin-1'))
+        self.server.feed.subscribe(self.transport, None if since is None else int(since))
+
+    def connection_lost(self, exc):
+        if self.streaming:
+            self.server.feed.unsubscribe(self.transport)
+        self.transport = None
+
+
+def build_signature(data_dir: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, størrelse, mtime) for listeindekset; buildet skriver det som det sidste af listens filer"""
+    try:
+        stat = os.stat(os.path.join(data_dir, 'articles-index.json'))
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+@contextmanager
+def background_work():
+    """
+    Til tungt arbejde i en baggrundstråd: kort GIL-skifteinterval, så løkken ikke venter 5 ms ad
+    gangen, og GC'en slået fra, da hver fuld opsamling ellers ville gennemløbe halvfærdige data.
+    """
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(RELOAD_SWITCH_INTERVAL)
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+        sys.setswitchinterval(switch_interval)
+
+
+def load_store(data_dir: str, index_dir: str) -> ArticleStore:
+    """Indlæser et build i en baggrundstråd; bagefter fryses det som ved opstart"""
+    with background_work():
+        store = ArticleStore(data_dir, index_dir)
+        gc.freeze()
+        return store
+
+
+def load_update(current: ArticleStore, data_dir: str, index_dir: str) -> Tuple[ArticleStore, Optional[bytes]]:
+    """Et nyt build og stream-hændelsen fra `current` til det; begge beregnes uden for event-løkken"""
+    store = load_store(data_dir, index_dir)
+    with background_work():
+        return store, update_event(current, store)
+
+
+def raise_file_limit():
+    """Hæver grænsen for åbne filer til det tilladte maksimum; hver stream-klient holder en socket"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def _release(value, depth: int = 2):
+    """Tømmer store lister og dicts i bidder, så frigivelsen ikke er ét langt C-kald med GIL'en"""
+    if isinstance(value, list):
+        while value:
+            del value[-RELEASE_CHUNK:]
+    elif isinstance(value, dict):
+        while value:
+            for _ in range(min(RELEASE_CHUNK, len(value))):
+                _release(value.popitem()[1], depth - 1)
+    elif depth > 0 and hasattr(value, '__dict__'):
+        for name in list(vars(value)):
+            _release(vars(value).pop(name), depth - 1)
+
+
+def release_store(store: ArticleStore):
+    """Frigiver et afløst build i baggrunden"""
+    _release(store)
+
+
+class ApiServer:
+    """Holder det indlæste build og serverer det på (host, port); nye builds skiftes ind uden genstart"""
+
+    def __init__(self, store: ArticleStore, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                 index_dir: str = FULLTEXT_DIR, reload_interval: float = RELOAD_INTERVAL,
+                 pipeline_run_path: str = PIPELINE_RUN_PATH, stale_after_hours: float = STALE_AFTER_HOURS,
+                 cache_mb: float = QUERY_CACHE_MB):
+        self.store = store
+        self.cache = ResponseCache(int(cache_mb * 1024 * 1024))
+        self.host = host
+        self.port = port
+        self.index_dir = index_dir
+        self.reload_interval = reload_interval
+        self.pipeline_run_path = pipeline_run_path
+        self.stale_after = stale_after_hours * 3600
+        self.signature = build_signature(store.data_dir)
+        self.reloads = 0
+        self.reload_errors = 0
+        self.started = time.time()
+        self.requests = RequestMetrics()
+        self.feed = ArticleFeed(store.version)
+
+    def swap(self, store: ArticleStore, signature) -> ArticleStore:
+        """Skifter til et nyt build; kaldes i event-løkken, så ingen forespørgsel er halvt behandlet"""
+        old, self.store = self.store, store
+        self.signature = signature
+        # Nøglerne indeholder build-versionen, så de gamle svar ville aldrig blive ramt igen
+        self.cache.reset()
+        self.reloads += 1
+        logger.info(f"🔄 Skiftede til version {store.version} ({len(store.articles)} artikler)")
+        return old
+
+    async def watch(self):
+        """Tjekker listeindekset og indlæser et nyt build, når filen har ligget stille et helt interval"""
+        loop = asyncio.get_running_loop()
+        data_dir = self.store.data_dir
+        pending = None
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            signature = build_signature(data_dir)
+            if signature is None or signature == self.signature or signature != pending:
+                pending = signature
+                continue
+            pending = None
+            try:
+                store, event = await loop.run_in_executor(None, load_update, self.store, data_dir, self.index_dir)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Kunne ikke indlæse nyt build: {e} - fortsætter med version {self.store.version}")
+                self.signature = signature
+                self.reload_errors += 1
+                continue
+            if build_signature(data_dir) != signature:
+                # Et nyt build landede under indlæsningen; det tages ved næste tjek
+                loop.run_in_executor(None, release_store, store)
+                continue
+            loop.run_in_executor(None, release_store, self.swap(store, signature))
+            await self.feed.publish(store.version, event)
+
+    def health(self) -> Dict[str, object]:
+        """
+        Driftsstatus: stale når der ikke er kommet data i stale_after (seneste vellykkede
+        pipelinekørsel, ellers buildets tidspunkt), degraded når seneste kørsel fejlede.
+        """
+        now = time.time()
+        store = self.store
+        run = load_pipeline_run(self.pipeline_run_path) or {}
+        fresh_since = run.get('lastSuccess') or store.built_at
+        if fresh_since is None or now - fresh_since > self.stale_after:
+            status = 'stale'
+        elif run and not run.get('success'):
+            status = 'degraded'
+        else:
+            status = 'ok'
+        return {
+            'status': status,
+            'version': store.version,
+            'totalArticles': len(store.articles),
+            'buildAgeSeconds': None if store.built_at is None else round(now - store.built_at),
+            'newestArticleAgeSeconds': None if store.newest_ts is None else round(now - store.newest_ts),
+            'pipeline': {'lastRun': run.get('finished'), 'success': run.get('success'),
+                         'lastSuccess': run.get('lastSuccess')} if run else None,
+            'uptimeSeconds': round(now - self.started),
+            'reloads': self.reloads,
+            'streamClients': len(self.feed)
+        }
+
+    def health_response(self) -> Response:
+        # Altid 200: en forældet liste kan stadig serveres, så load balanceren skal ikke tage instansen ud
+        return Response(200, json.dumps(self.health(), ensure_ascii=False).encode('utf-8'))
+
+    def metrics_response(self) -> Response:
+        """Alle målinger i Prometheus' tekstformat; bygges ved hvert kald, det tager under et millisekund"""
+        store, cache, feed, requests = self.store, self.cache, self.feed, self.requests
+        text = MetricsText()
+        text.add('minepenge_api_requests_total', 'counter', 'Besvarede forespørgsler pr. endpoint og status',
+                 (({'endpoint': endpoint, 'status': status}, count)
+                  for (endpoint, status), count in sorted(requests.responses.items())))
+        text.histograms('minepenge_api_request_duration_seconds', 'Tid til at bygge og kode svaret pr. endpoint',
+                        requests.latency, 'endpoint')
+        endpoints = sorted(set(cache.hits) | set(cache.misses))
+        text.add('minepenge_api_cache_hits_total', 'counter', 'Svar fra cachen pr. endpoint',
+                 (({'endpoint': endpoint}, cache.hits[endpoint]) for endpoint in endpoints))
+        text.add('minepenge_api_cache_misses_total', 'counter', 'Svar bygget forfra pr. endpoint',
+                 (({'endpoint': endpoint}, cache.misses[endpoint]) for endpoint in endpoints))
+        text.add('minepenge_api_cache_saved_seconds_total', 'counter',
+                 'Byggetid sparet pr. endpoint: svarenes byggetid summeret over cache-hits',
+                 (({'endpoint': endpoint}, cache.saved[endpoint]) for endpoint in endpoints))
+        hits, lookups = sum(cache.hits.values()), sum(cache.hits.values()) + sum(cache.misses.values())
+        text.value('minepenge_api_cache_hit_ratio', 'gauge', 'Andel cache-opslag der ramte siden start',
+                   hits / lookups if lookups else None)
+        text.value('minepenge_api_cache_entries', 'gauge', 'Svar i cachen lige nu', len(cache.entries))
+        text.value('minepenge_api_cache_bytes', 'gauge', 'Cachens størrelse i bytes inkl. overhead pr. post',
+                   cache.bytes)
+        text.value('minepenge_api_cache_evictions_total', 'counter', 'Svar skubbet ud af cachen for at holde grænsen',
+                   cache.evictions)
+        text.value('minepenge_api_uptime_seconds', 'gauge', 'Sekunder siden serveren startede',
+                   time.time() - self.started)
+        text.value('minepenge_api_reloads_total', 'counter', 'Nye builds skiftet ind', self.reloads)
+        text.value('minepenge_api_reload_errors_total', 'counter', 'Builds der ikke kunne indlæses',
+                   self.reload_errors)
+        text.value('minepenge_api_stream_clients', 'gauge', 'Forbundne SSE-klienter', len(feed))
+        text.value('minepenge_api_stream_events_total', 'counter', 'Hændelser sendt til stream-klienterne', feed.sent)
+        text.value('minepenge_api_stream_dropped_total', 'counter', 'Stream-klienter lukket fordi de ikke fulgte med',
+                   feed.dropped)
+
+        text.value('minepenge_build_version', 'gauge', 'Versionen af det indlæste build', store.version)
+        text.value('minepenge_build_timestamp_seconds', 'gauge', 'Tidspunkt hvor det indlæste build blev lavet',
+                   store.built_at)
+        text.value('minepenge_build_articles', 'gauge', 'Artikler i det indlæste build', len(store.articles))
+        text.add('minepenge_build_articles_per_source', 'gauge', 'Artikler pr. kilde i det indlæste build',
+                 (({'source': source}, count)
+                  for source, count in sorted(store.metadata.get('articlesPerSource', {}).items())))
+        text.value('minepenge_build_newest_article_timestamp_seconds', 'gauge',
+                   'Udgivelsestidspunkt for den nyeste artikel', store.newest_ts)
+        artifacts = (store.metadata.get('buildInfo') or {}).get('artifacts') or {}
+        text.add('minepenge_build_artifact_bytes', 'gauge', 'Størrelsen af buildets artefakter på disk',
+                 (({'artifact': name}, info['bytes'])
+                  for name, info in sorted(artifacts.items()) if isinstance(info, dict) and 'bytes' in info))
+        text.value('minepenge_index_fulltext_bytes', 'gauge', 'Størrelsen af fuldtekstindeksets postings',
+                   store.fulltext.size)
+        text.value('minepenge_index_fulltext_terms', 'gauge', 'Termer i fuldtekstindekset',
+                   len(store.fulltext.terms))
+        add_pipeline_metrics(text, load_pipeline_run(self.pipeline_run_path))
+        return Response(200, text.render(), content_type=MetricsText.CONTENT_TYPE)
+
+    async def heartbeat(self):
+        """Skriver en kommentar til alle stream-klienter, så proxyer holder forbindelserne åbne"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await self.feed.heartbeat()
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(lambda: HttpProtocol(self), self.host, self.port, backlog=LISTEN_BACKLOG)
+        logger.info(f"🚀 API kører på http://{self.host}:{self.port}/api/articles")
+        if self.reload_interval > 0:
+            # Løkken holder kun svage referencer til tasks
+            self._watcher = loop.create_task(self.watch())
+        self._heartbeat = loop.create_task(self.heartbeat())
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mine Penge læse-API over build-output')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--data-dir', default=PUBLIC_DATA_DIR)
+    parser.add_argument('--index-dir', default=FULLTEXT_DIR)
+    parser.add_argument('--reload-interval', type=float, default=RELOAD_INTERVAL)
+    parser.add_argument('--pipeline-run', default=PIPELINE_RUN_PATH,
+                        help='pipelinens seneste kørsel (skrevet af update_all_data.py)')
+    parser.add_argument('--stale-after', type=float, default=STALE_AFTER_HOURS,
+                        help='timer uden vellykket pipelinekørsel før /health melder stale')
+    parser.add_argument('--cache-mb', type=float, default=QUERY_CACHE_MB, help='grænse for svar-cachen i MB')
+    args = parser.parse_args()
+
+    raise_file_limit()
+    server = ApiServer(ArticleStore(args.data_dir, args.index_dir), args.host, args.port,
+                       args.index_dir, args.reload_interval, args.pipeline_run, args.stale_after, args.cache_mb)
+    # Det indlæste build ændres ikke; uden for GC'ens generationer scannes det ikke ved hver fuld opsamling
+    gc.freeze()
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
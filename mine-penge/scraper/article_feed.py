@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Article Feed
+Server-Sent Events til læse-API'et (api_server.py): når et nyt build skiftes ind, sendes
+deltaen fra den forrige version til alle forbundne klienter i samme format som
+deltas/delta-<fra>-<til>.json, så frontendens applyDelta kan bruges direkte.
+
+    event: update   id = ny version, data = {from, to, metadata, removed, changed, added}
+    event: reset    klientens version kendes ikke (eller deltaen er for stor); hent listen igen
+    event: ready    klienten er på den nuværende version
+
+En klient genoptager med Last-Event-ID (eller ?since=<version>) og får de mellemliggende
+deltaer fra historikken. Hver hændelse kodes én gang og skrives som de samme bytes til alle;
+en klient der ikke kan følge med, lukkes og indhenter ved genforbindelse.
+"""
+
+import json
+import time
+import asyncio
+import random
+import logging
+from collections import deque
+from typing import Any, Deque, Optional, Set, Tuple
+
+from deltas import compute_delta
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FEED_HISTORY = 16  # deltaer der gemmes til genforbindelser, som DELTA_HISTORY i buildet
+MAX_EVENT_BYTES = 512 * 1024  # større deltaer sendes som reset; klienten henter så listen én gang
+MAX_BUFFERED_BYTES = 1024 * 1024  # uafsendte bytes pr. klient før forbindelsen lukkes
+HEARTBEAT_INTERVAL = 25.0  # sekunder; holder proxyer fra at lukke stille forbindelser
+BROADCAST_CHUNK = 256  # klienter der skrives til før løkken får lov at svare på forespørgsler
+BROADCAST_BYTES = 1024 * 1024  # ... dog højst så mange bytes, da store deltaer koster kopiering pr. klient
+RETRY_MS = 5000  # klientens ventetid før genforbindelse, spredt op til det dobbelte
+
+HEARTBEAT = b': ping\n\n'
+
+
+def sse_event(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    """Én SSE-hændelse; JSON uden linjeskift, så data er én linje"""
+    lines = [] if event_id is None else [f'id: {event_id}']
+    lines += [f'event: {event}', 'data: ' + json.dumps(data, ensure_ascii=False, separators=(',', ':'))]
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+def update_event(old, new) -> Optional[bytes]:
+    """
+    Hændelsen for skiftet fra build `old` til `new` (ArticleStore), eller None hvis versionen er
+    den samme. Kaldes i en baggrundstråd sammen med indlæsningen.
+    """
+    if new.version == old.version:
+        return None
+    delta = compute_delta(old.articles, new.articles)
+    event = sse_event('update', {'from': old.version, 'to': new.version, 'metadata': new.metadata, **delta},
+                      new.version)
+    if len(event) > MAX_EVENT_BYTES:
+        return sse_event('reset', {'version': new.version}, new.version)
+    return event
+
+
+class ArticleFeed:
+    """Forbundne SSE-klienter og de seneste hændelser; bruges kun fra event-løkken"""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.history: Deque[Tuple[int, int, bytes]] = deque(maxlen=FEED_HISTORY)
+        self.subscribers: Set[Any] = set()
+        self.sent = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
+
+    def backlog(self, since: Optional[int]) -> bytes:
+        """Det en ny forbindelse skal have: deltaerne siden `since`, ellers ready eller reset"""
+        if since is None or since == self.version:
+            return sse_event('ready', {'version': self.version}, self.version)
+        events = []
+        current = since
+        for from_version, to_version, event in self.history:
+            if from_version == current:
+                events.append(event)
+                current = to_version
+        if current != self.version:
+            return sse_event('reset', {'version': self.version}, self.version)
+        return b''.join(events)
+
+    def subscribe(self, transport, since: Optional[int]):
+        retry = random.randint(RETRY_MS, 2 * RETRY_MS)
+        transport.write(f'retry: {retry}\n\n'.encode('ascii') + self.backlog(since))
+        self.subscribers.add(transport)
+
+    def unsubscribe(self, transport):
+        self.subscribers.discard(transport)
+
+    async def _broadcast(self, data: bytes):
+        """
+        Skriver til alle klienter i bidder; hver write er et systemkald, så tusindvis i ét stræk
+        ville holde forespørgslerne tilbage. Nye klienter undervejs har fået hændelsen i backlog.
+        """
+        subscribers = list(self.subscribers)
+        step = max(1, min(BROADCAST_CHUNK, BROADCAST_BYTES // len(data)))
+        for start in range(0, len(subscribers), step):
+            for transport in subscribers[start:start + step]:
+                if transport.is_closing():
+                    self.subscribers.discard(transport)
+                elif transport.get_write_buffer_size() > MAX_BUFFERED_BYTES:
+                    self.subscribers.discard(transport)
+                    self.dropped += 1
+                    transport.close()
+                else:
+                    transport.write(data)
+            await asyncio.sleep(0)
+
+    async def publish(self, version: int, event: Optional[bytes]):
+        """Sender hændelsen for et skift til `version` (fra `update_event`) til alle klienter"""
+        if event is None:
+            return
+        self.history.append((self.version, version, event))
+        self.version = version
+        started = time.perf_counter()
+        await self._broadcast(event)
+        self.sent += 1
+        logger.info(f"📣 Version {version} ({len(event) / 1024:.0f} KB) sendt til {len(self.subscribers)} klienter "
+                    f"på {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    async def heartbeat(self):
+        await self._broadcast(HEARTBEAT)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Article Store
+Build-output indlæst én gang i hukommelsen med indeks til læse-API'et (api_server.py).
+
+Indeksene er dem buildet allerede skriver: facetbitsets (kilde, kategori, målgruppe,
+kompleksitet), sorteringspermutationer, det forsorterede relevansindeks og fuldtekstindekset
+i data/index. Dertil et opslag på artikel-ID og et datoindeks,
+som udnytter at listeindekset er sorteret nyeste først, så et datointerval er et
+sammenhængende udsnit af positionerne. Hver artikel JSON-kodes én gang ved indlæsning,
+så et svar blot er en sammensætning af færdige bytes.
+
+Keyset-sider (`query_after`) findes ved binær søgning i sorteringspermutationen efter
+sorteringsnøglen fra en cursor, så en side koster det samme på enhver dybde.
+"""
+
+import os
+import json
+import gzip
+import logging
+from datetime import datetime
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Any, Optional, Tuple
+
+from external_sort import iter_json_array, read_trailing_metadata
+from facets import FacetIndex, build_facets, popcount, FACET_FIELDS
+from fulltext_index import FullTextIndex, FullTextBuilder, article_fields, INDEX_DIR as FULLTEXT_DIR
+from relevance import RelevanceIndex, build_relevance, article_quality
+from sort_orders import SortOrders, build_sort_orders, relevance_key, DEFAULT_SORT, RELEVANCE_SORT, SORT_KEYS
+from sort_orders import SORT_ORDERS_VERSION
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PUBLIC_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'public', 'data'))
+
+
+def _dumps(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _load_json(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ArticleStore:
+    """Listeindeks, facetter og sorteringer for én build-version"""
+
+    def __init__(self, data_dir: str = PUBLIC_DATA_DIR, index_dir: str = FULLTEXT_DIR):
+        self.data_dir = data_dir
+        index_path = os.path.join(data_dir, 'articles-index.json')
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"Intet listeindeks i {data_dir} - kør build_articles.py først")
+        # Artikel for artikel frem for ét json.load, så en indlæsning i baggrunden ikke holder GIL'en længe
+        self.articles: List[Dict[str, Any]] = list(iter_json_array(index_path, keys=('articles',)))
+        self.metadata: Dict[str, Any] = read_trailing_metadata(index_path) or {}
+        self.version = self.metadata.get('version', 0)
+        # Versionen tælles kun op når listen ændres; hashen skelner også byg fra forskellige maskiner
+        self.etag_base = f"{self.version}-{self.metadata.get('listHash', '')}"
+        self.built_at = self._built_at()
+
+        self.by_id: Dict[str, int] = {article['article_id']: position
+                                      for position, article in enumerate(self.articles) if article.get('article_id')}
+        self.facets = FacetIndex(self._artifact('facets.json', build_facets))
+        # Uden relevance.json scores kun på slanke felter (tags, kilde, dato)
+        self.relevance = RelevanceIndex(self._artifact('relevance.json', lambda articles: build_relevance(
+            (article_quality(article) for article in articles), (article.get('published_ts') for article in articles))))
+        # Cursorsøgningen kræver at uafgjorte står efter artikel-ID (version 2) og relevance efter score (version 3)
+        self.sort_orders = SortOrders(self._artifact('sort-orders.json', lambda articles: build_sort_orders(
+            articles, self.relevance.scores), SORT_ORDERS_VERSION))
+        # Buildet skriver listen i standardsorteringens rækkefølge; ældre builds afgjorde uafgjorte efter fil
+        self._list_sorted = self.sort_orders.orders[DEFAULT_SORT] == list(range(len(self.articles)))
+        self.fulltext = self._fulltext(index_dir)
+
+        # Negerede tidsstempler er stigende i listerækkefølge; udaterede (0) står sidst
+        self._dates = [-(article.get('published_ts') or 0) for article in self.articles]
+        self._dated = bisect_left(self._dates, 0)
+        self.newest_ts: Optional[int] = -self._dates[0] if self._dated else None
+
+        self.encoded: List[bytes] = [_dumps(article) for article in self.articles]
+        self._metadata_json = _dumps(self.metadata)
+        self.full_body = self.render(self.sort_orders.orders[DEFAULT_SORT], None)
+        self.full_body_gzip = gzip.compress(self.full_body, compresslevel=9, mtime=0)
+        logger.info(f"Indlæste {len(self.articles)} artikler (version {self.version}) fra {data_dir}")
+
+    def _built_at(self) -> Optional[float]:
+        """Byggetidspunktet (epoch-sekunder) fra metadata; buildet skriver lokal tid"""
+        stamp = (self.metadata.get('buildInfo') or {}).get('buildDate') or self.metadata.get('lastUpdated')
+        try:
+            return datetime.fromisoformat(stamp).timestamp() if stamp else None
+        except ValueError:
+            return None
+
+    def _artifact(self, name: str, build, version: Optional[int] = None) -> Dict[str, Any]:
+        """Et positionsindeks fra buildet; bygges i hukommelsen hvis det mangler eller er forældet"""
+        data = _load_json(os.path.join(self.data_dir, name))
+        if data is None or data.get('listVersion') != self.version or data.get('docCount') != len(self.articles) \
+                or (version is not None and data.get('version') != version):
+            logger.warning(f"{name} mangler eller passer ikke til listeindekset - bygges ved indlæsning")
+            data = build(self.articles)
+        return data
+
+    def _fulltext(self, index_dir: str) -> FullTextIndex:
+        """Fuldtekstindekset fra buildet; uden det søges kun i titel, resume og tags"""
+        index = FullTextIndex.load(index_dir)
+        if index is not None and index.list_version == self.version and index.doc_count == len(self.articles) \
+                and index.list_hash == self.metadata.get('listHash'):
+            return index
+        logger.warning("fulltext.json mangler eller passer ikke til listeindekset - bygges uden brødtekst ved indlæsning")
+        builder = FullTextBuilder()
+        for position, article in enumerate(self.articles):
+            builder.add(position, article_fields(article))
+        return builder.build(self.version, self.metadata.get('listHash'))
+
+    def date_mask(self, date_from: Optional[int], date_to: Optional[int]) -> Optional[int]:
+        """Bitset for artikler udgivet i [date_from, date_to] (epoch-sekunder); None uden grænser"""
+        if date_from is None and date_to is None:
+            return None
+        start = bisect_left(self._dates, -date_to, 0, self._dated) if date_to is not None else 0
+        end = bisect_right(self._dates, -date_from, 0, self._dated) if date_from is not None else self._dated
+        if end <= start:
+            return 0
+        return ((1 << end) - 1) ^ ((1 << start) - 1)
+
+    def _mask(self, filters: Dict[str, List[str]], date_from: Optional[int], date_to: Optional[int]) -> int:
+        mask = self.facets.filter_mask({facet: values for facet, values in filters.items() if facet in FACET_FIELDS})
+        dates = self.date_mask(date_from, date_to)
+        if dates is not None:
+            mask &= dates
+        return mask
+
+    def query(self, filters: Dict[str, List[str]], date_from: Optional[int] = None, date_to: Optional[int] = None,
+              sort: str = DEFAULT_SORT, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[int], int]:
+        """Positionerne for ét udsnit af de filtrerede artikler i `sort`-rækkefølge og det samlede antal"""
+        mask = self._mask(filters, date_from, date_to)
+        total = popcount(mask)
+        end = total if limit is None else min(total, offset + limit)
+        if offset >= end:
+            return [], total
+        if sort not in self.sort_orders.orders:
+            sort = DEFAULT_SORT
+        if sort == DEFAULT_SORT and self._list_sorted:
+            # Listeindekset er allerede i standardrækkefølgen
+            return FacetIndex.positions(mask, end)[offset:], total
+        return self._select(self.sort_orders.orders[sort], mask, 0, end)[offset:], total
+
+    def _select(self, order: List[int], mask: int, start: int, count: int) -> List[int]:
+        """De første `count` positioner fra og med indeks `start` i `order`, som er med i bitsettet"""
+        if mask == self.facets.all_mask:
+            return order[start:start + count]
+        # Bitsettet som bytes én gang; et bitopslag direkte i et stort heltal koster O(n) pr. artikel
+        raw = mask.to_bytes((len(self.articles) + 7) // 8, 'little')
+        selected = []
+        for index in range(start, len(order)):
+            position = order[index]
+            if raw[position >> 3] >> (position & 7) & 1:
+                selected.append(position)
+                if len(selected) == count:
+                    break
+        return selected
+
+    def sort_key(self, sort: str, position: int) -> Tuple:
+        if sort == RELEVANCE_SORT:
+            return relevance_key(self.articles[position], self.relevance.scores[position])
+        return SORT_KEYS[sort](self.articles[position])
+
+    def _seek(self, order: List[int], sort: str, after: Tuple) -> int:
+        """Indekset i `order` lige efter nøglen `after` (som bisect_right, der først får key= i 3.10)"""
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if after < self.sort_key(sort, order[middle]):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def query_after(self, filters: Dict[str, List[str]], date_from: Optional[int], date_to: Optional[int],
+                    sort: str, after: Optional[Tuple], limit: int) -> Tuple[List[int], int, bool]:
+        """
+        Keyset-udsnit: de første `limit` filtrerede artikler efter nøglen `after` i `sort`-rækkefølge,
+        det samlede antal og om der er flere. Nøglen behøver ikke findes i dette build; siden
+        starter lige efter den, så nye artikler længere fremme ikke forskyder den.
+        Raises TypeError hvis nøglen ikke kan sammenlignes med sorteringens nøgler.
+        """
+        mask = self._mask(filters, date_from, date_to)
+        total = popcount(mask)
+        order = self.sort_orders.orders[sort]
+        start = 0 if after is None else self._seek(order, sort, after)
+        selected = self._select(order, mask, start, limit + 1)
+        return selected[:limit], total, len(selected) > limit
+
+    def render(self, positions, pagination: Optional[Dict[str, Any]]) -> bytes:
+        """Svarets JSON sat sammen af de forudkodede artikler"""
+        parts = [b'{"articles":[', b','.join(self.encoded[position] for position in positions), b']']
+        if pagination is not None:
+            parts += [b',"pagination":', _dumps(pagination)]
+        parts += [b',"metadata":', self._metadata_json, b'}']
+        return b''.join(parts)
+
+    def render_scored(self, positions) -> bytes:
+        """Artikler med `relevance_score` tilføjet, til /api/articles/relevant"""
+        scored = (b'%s,"relevance_score":%s}' % (self.encoded[position][:-1],
+                                                 str(self.relevance.score(position)).encode('ascii'))
+                  for position in positions)
+        return b''.join([b'{"articles":[', b','.join(scored), b']}'])
+
+    def render_search(self, hits: List[Tuple[int, float]], pagination: Dict[str, Any]) -> bytes:
+        """Søgeresultater med `search_score` (BM25) tilføjet, til /api/articles/search"""
+        scored = (b'%s,"search_score":%s}' % (self.encoded[position][:-1], str(score).encode('ascii'))
+                  for position, score in hits)
+        return b''.join([b'{"articles":[', b','.join(scored), b'],"pagination":', _dumps(pagination), b'}'])
+
+    def detail(self, article_id: str) -> Optional[bytes]:
+        """Detalje-shardet for en artikel (fuld tekst), eller den slanke post hvis shardet mangler"""
+        position = self.by_id.get(article_id)
+        if position is None:
+            return None
+        path = os.path.join(self.data_dir, 'articles', f'{article_id}.json')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+        return self.encoded[position]
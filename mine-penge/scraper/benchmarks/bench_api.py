@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Belastningstest af læse-API'et (api_server.py): fast forespørgselsrate og latens-percentiler pr. scenarie.
+Uden --data-dir bygges et syntetisk arkiv i en midlertidig kopi af scraper-mappen.
+
+    python benchmarks/bench_api.py --rate 1000 --seconds 10
+    python benchmarks/bench_api.py --data-dir ../public/data --rate 1000
+
+Trafikken er en vægtet blanding af scenarier som frontenden og widgets bruger API'et
+(--mix list=0.35,filter=0.2,search=0.15,relevant=0.2,detail=0.1):
+
+    list      sider i alle sorteringer
+    filter    facetfiltre og datointerval
+    search    fuldtekstsøgning med ord fra arkivets titler (ét ord, to ord, præfiks)
+    relevant  /api/articles/relevant som widgets kalder den (få forskellige, ofte gentagne)
+    detail    detalje-shards
+
+Uden for standardblandingen sammenligner to scenarier sidetyperne på vilkårlig dybde i arkivet
+(--mix deep=0.5,cursor=0.5):
+
+    deep      ?page= på en tilfældig side, evt. med et facetfilter
+    cursor    ?cursor= fra en tilfældig artikel i samme sorteringer og filtre
+
+Forespørgslerne sendes efter en fast tidsplan (open loop), og latensen måles fra det planlagte
+tidspunkt, så en langsom server ikke skjuler sin kø ved at sænke raten. --streams holder desuden
+så mange stille SSE-forbindelser åbne (/api/articles/stream) som widgets på eksterne sites; de
+læses i en separat proces, så det ikke er målerens egen løkke der forsinkes, når en delta sendes.
+
+--output gemmer resultatet som JSON (commit, indstillinger, gennemløb, percentiler og fejlrate
+pr. scenarie); --compare sammenligner med en tidligere fil og markerer forværringer:
+
+    python benchmarks/bench_api.py --output før.json
+    python benchmarks/bench_api.py --compare før.json
+
+Med --rebuild-at bygges arkivet igen midt i testen (med lav prioritet, ændrede titler i én kilde),
+og latensen opgøres før buildet, mens det kører og efter serveren har skiftet til den nye version
+(aflæst i svarenes ETag):
+
+    python benchmarks/bench_api.py --rate 500 --seconds 30 --rebuild-at 5
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import random
+import shutil
+from glob import glob
+import argparse
+import tempfile
+import multiprocessing
+import subprocess
+import http.client
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic import write_tagged_files
+from bench_incremental_build import _prepare_tree, _build, _modify
+from article_store import ArticleStore, FULLTEXT_DIR
+from sort_orders import encode_cursor
+from search_index import STOPWORDS
+
+SCRAPER_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+RESULTS_VERSION = 1
+DEFAULT_MIX = {'list': 0.35, 'filter': 0.2, 'search': 0.15, 'relevant': 0.2, 'detail': 0.1}
+SCENARIOS = list(DEFAULT_MIX) + ['deep', 'cursor']
+REGRESSION = 1.2  # p99 eller gennemløb 20 % værre end sammenligningen markeres
+
+_WORD_RE = re.compile(r'[a-zæøå]{4,}')
+
+
+def _list_path(rng, store):
+    total_pages = max(1, len(store.articles) // 20)
+    sort = rng.choice(list(store.sort_orders.orders))
+    return f"/api/articles?page={rng.randint(1, min(total_pages, 50))}&pageSize=20&sort={sort}"
+
+
+def _filter_path(rng, store, facets):
+    facet = rng.choice(list(facets))
+    path = f"/api/articles?page=1&pageSize=20&{facet}={quote(rng.choice(facets[facet]))}"
+    if rng.random() < 0.3:
+        path += f"&from={datetime.now(timezone.utc).year - 1}-01-01"
+    return path
+
+
+def _deep_path(rng, store, facets, cursor):
+    """En side hvor som helst i arkivet, som offset-side eller som cursor fra artiklen lige før"""
+    sort = rng.choice(list(store.sort_orders.orders))
+    facet = rng.choice(list(facets)) if rng.random() < 0.3 else None
+    query = f"&{facet}={quote(rng.choice(facets[facet]))}" if facet else ''
+    order = store.sort_orders.orders[sort]
+    if not cursor:
+        return f"/api/articles?page={rng.randint(1, max(1, len(order) // 20))}&pageSize=20&sort={sort}{query}"
+    token = encode_cursor(sort, store.sort_key(sort, rng.choice(order)))
+    return f"/api/articles?cursor={token}&pageSize=20{query}"
+
+
+def _search_path(rng, words):
+    kind = rng.random()
+    if kind < 0.6:
+        query = rng.choice(words)
+    elif kind < 0.85:
+        query = f"{rng.choice(words)} {rng.choice(words)}"
+    else:
+        query = rng.choice(words)[:4] + '*'
+    return f"/api/articles/search?q={quote(query)}&pageSize=20"
+
+
+def _relevant_path(rng, facets):
+    # Widgets sender samme få kombinationer igen og igen: antal 1-10, evt. én kategori
+    path = f"/api/articles/relevant?min_score=3.0&limit={rng.randint(1, 10)}"
+    if 'category' in facets and rng.random() < 0.5:
+        path += f"&category={quote(rng.choice(facets['category'][:8]))}"
+    return path
+
+
+def _request_mix(store, count, mix, seed=42):
+    """(scenarie, sti) for `count` forespørgsler trukket efter vægtene i `mix`"""
+    rng = random.Random(seed)
+    facets = {facet: sorted(values) for facet, values in store.facets.masks.items() if values}
+    ids = list(store.by_id)
+    words = sorted({word for article in store.articles[:5000]
+                    for word in _WORD_RE.findall((article.get('title') or '').lower()) if word not in STOPWORDS})
+    builders = {
+        'list': lambda: _list_path(rng, store),
+        'filter': lambda: _filter_path(rng, store, facets),
+        'search': lambda: _search_path(rng, words),
+        'relevant': lambda: _relevant_path(rng, facets),
+        'detail': lambda: f"/api/articles/{quote(rng.choice(ids))}",
+        'deep': lambda: _deep_path(rng, store, facets, cursor=False),
+        'cursor': lambda: _deep_path(rng, store, facets, cursor=True)
+    }
+    scenarios = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    return [(scenario, builders[scenario]()) for scenario in scenarios]
+
+
+def _parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"ukendt scenarie: {name} (kendte: {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _version(head):
+    """Build-versionen fra svarets ETag ("<version>-<listHash>-<forespørgsel>")"""
+    etag = head.lower().split(b'etag: "', 1)
+    return int(etag[1].split(b'-', 1)[0]) if len(etag) > 1 else None
+
+
+async def _connection(port, requests, schedule, counter, samples):
+    """Én keep-alive forbindelse; rå HTTP/1.1 holder klienten billig nok til at dele kerne med serveren"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for i in counter:
+        scenario, path = requests[i]
+        delay = schedule(i) - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nAccept-Encoding: gzip\r\n\r\n".encode('ascii'))
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = int(head.lower().split(b'content-length:', 1)[1].split(b'\r\n', 1)[0])
+            await reader.readexactly(length)
+            status = int(head.split(b' ', 2)[1])
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            # Tælles som fejl; forbindelsen åbnes igen til næste forespørgsel
+            samples.append((schedule(i), time.perf_counter() - schedule(i), None, scenario, 0))
+            writer.close()
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            continue
+        samples.append((schedule(i), time.perf_counter() - schedule(i), _version(head), scenario, status))
+    writer.close()
+
+
+async def _stream(port, state):
+    """
+    En stille SSE-forbindelse som en widget. Hændelserne tælles i rå bidder frem for linje for
+    linje, så hundredvis af læsere ikke tager tid fra målingerne, når en stor delta ankommer.
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(b"GET /api/articles/stream HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    try:
+        await reader.readuntil(b'\r\n\r\n')
+        state['open'] += 1
+        tail = b''
+        while True:
+            chunk = await reader.read(256 * 1024)
+            if not chunk:
+                state['closed'] += 1
+                return
+            data = tail + chunk
+            state['updates'] += data.count(b'\nevent: update\n')
+            tail = data[-14:]
+    except (OSError, asyncio.IncompleteReadError):
+        state['closed'] += 1
+    finally:
+        writer.close()
+
+
+async def _hold_streams(port, count, pipe):
+    state = {'open': 0, 'closed': 0, 'updates': 0}
+    listeners = [asyncio.ensure_future(_stream(port, state)) for _ in range(count)]
+    while state['open'] + state['closed'] < count:
+        await asyncio.sleep(0.05)
+    pipe.send('ready')
+    await asyncio.get_running_loop().run_in_executor(None, pipe.recv)
+    for listener in listeners:
+        listener.cancel()
+    await asyncio.gather(*listeners, return_exceptions=True)
+    pipe.send(state)
+
+
+def _stream_process(port, count, pipe):
+    """Holder `count` SSE-forbindelser åbne indtil forælderen beder om tællerne"""
+    asyncio.run(_hold_streams(port, count, pipe))
+
+
+async def _run_load(port, requests, rate, connections, rebuild=None, rebuild_at=None):
+    """Målinger pr. forespørgsel som (planlagt tidspunkt, latens, version, scenarie, status); evt. med et build undervejs"""
+    samples = []
+    counter = iter(range(len(requests)))  # delt mellem forbindelserne, så de tager næste ledige tidspunkt
+    start = time.perf_counter() + 0.2
+    build = None
+    if rebuild is not None:
+        async def delayed():
+            await asyncio.sleep(rebuild_at + 0.2)
+            return await asyncio.get_running_loop().run_in_executor(None, rebuild)
+        build = asyncio.ensure_future(delayed())
+    await asyncio.gather(*(_connection(port, requests, lambda i: start + i / rate, counter, samples)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    build_times = await build if build is not None else None
+    return samples, elapsed, build_times
+
+
+def _rebuild(scraper):
+    """Ændrer titler i én kilde og bygger igen med lav prioritet, som et build ved siden af API'et"""
+    _modify(sorted(glob(os.path.join(scraper, 'data', 'tagged', 'tagged_*.json')))[0], 100)
+    started = time.perf_counter()
+    subprocess.run([sys.executable, 'build_articles.py'], cwd=scraper, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                   preexec_fn=(lambda: os.nice(19)) if hasattr(os, 'nice') else None)
+    return started, time.perf_counter()
+
+
+def _percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def _summary(samples, elapsed):
+    """Gennemløb, percentiler (ms) og fejlrate for en mængde målinger"""
+    latencies = sorted(latency for _, latency, _, _, _ in samples)
+    errors = sum(1 for sample in samples if sample[4] != 200)
+    return {
+        'requests': len(latencies),
+        'throughput': round(len(latencies) / elapsed, 1),
+        'p50': round(_percentile(latencies, 0.5), 3),
+        'p90': round(_percentile(latencies, 0.9), 3),
+        'p99': round(_percentile(latencies, 0.99), 3),
+        'max': round(latencies[-1] * 1000, 3),
+        'errors': errors,
+        'errorRate': round(errors / len(latencies), 5)
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRAPER_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_row(label, summary, baseline=None):
+    line = (f"  {label:9} {summary['requests']:7,}  {summary['throughput']:7.0f}/s  p50 {summary['p50']:6.2f}  "
+            f"p90 {summary['p90']:6.2f}  p99 {summary['p99']:7.2f}  maks {summary['max']:7.2f} ms  "
+            f"fejl {summary['errorRate'] * 100:.2f} %")
+    if baseline:
+        worse = summary['p99'] > baseline['p99'] * REGRESSION or summary['errorRate'] > baseline['errorRate']
+        line += f"   (før p99 {baseline['p99']:.2f} ms, fejl {baseline['errorRate'] * 100:.2f} %)" + \
+                ('  ⚠️ forværret' if worse else '')
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', help='eksisterende build-output (ellers syntetisk)')
+    parser.add_argument('--index-dir', default=FULLTEXT_DIR, help='fuldtekstindeks til --data-dir')
+    parser.add_argument('--articles', type=int, default=10000)
+    parser.add_argument('--rate', type=int, default=1000, help='forespørgsler pr. sekund')
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--mix', type=_parse_mix, default=DEFAULT_MIX,
+                        help='vægtede scenarier, fx list=0.5,search=0.5 (standard: ' +
+                             ','.join(f'{name}={weight}' for name, weight in DEFAULT_MIX.items()) + ')')
+    parser.add_argument('--streams', type=int, default=0, help='stille SSE-forbindelser under testen')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rebuild-at', type=float, help='sekunder inde i testen hvor arkivet bygges igen')
+    parser.add_argument('--output', help='gem resultatet som JSON')
+    parser.add_argument('--compare', help='tidligere resultat (JSON) at sammenligne med')
+    args = parser.parse_args()
+    if args.rebuild_at is not None and args.data_dir:
+        parser.error('--rebuild-at kræver det syntetiske arkiv (uden --data-dir)')
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as root:
+        data_dir = args.data_dir
+        index_dir = args.index_dir
+        command = [sys.executable, os.path.join(SCRAPER_DIR, 'api_server.py'), '--port', str(args.port)]
+        if data_dir is None:
+            scraper = _prepare_tree(root)
+            write_tagged_files(os.path.join(scraper, 'data', 'tagged'), args.articles, 5)
+            _build(scraper)
+            data_dir = os.path.join(root, 'public', 'data')
+            index_dir = os.path.join(scraper, 'data', 'index')
+            command += ['--reload-interval', '0.5']
+        command += ['--data-dir', data_dir, '--index-dir', index_dir]
+
+        store = ArticleStore(data_dir, index_dir)
+        article_count = len(store.articles)
+        requests = _request_mix(store, args.rate * args.seconds, args.mix)
+        del store
+        # taskset holder serveren på én kerne, hvor det findes
+        if shutil.which('taskset') and hasattr(os, 'sched_getaffinity'):
+            command = ['taskset', '-c', str(min(os.sched_getaffinity(0)))] + command
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            # Store arkiver tager et stykke tid at indlæse; der ventes så længe serveren kører
+            deadline = time.monotonic() + 120
+            while server.poll() is None and time.monotonic() < deadline:
+                try:
+                    conn = http.client.HTTPConnection('127.0.0.1', args.port)
+                    conn.request('GET', '/api/health')
+                    conn.getresponse().read()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            streams = None
+            if args.streams:
+                pipe, child_pipe = multiprocessing.Pipe()
+                holder = multiprocessing.Process(target=_stream_process, args=(args.port, args.streams, child_pipe),
+                                                 daemon=True)
+                holder.start()
+                pipe.recv()
+            rebuild = (lambda: _rebuild(scraper)) if args.rebuild_at is not None else None
+            samples, elapsed, build_times = asyncio.run(
+                _run_load(args.port, requests, args.rate, args.connections, rebuild, args.rebuild_at))
+            if args.streams:
+                pipe.send('stop')
+                streams = pipe.recv()
+                holder.join()
+        finally:
+            server.terminate()
+            server.wait()
+
+    overall = _summary(samples, elapsed)
+    scenarios = {name: _summary([sample for sample in samples if sample[3] == name], elapsed)
+                 for name in args.mix if any(sample[3] == name for sample in samples)}
+    print(f"{overall['requests']:,} forespørgsler på {elapsed:.1f}s ({overall['throughput']:.0f} req/s, mål {args.rate}) "
+          f"mod {article_count:,} artikler")
+    _print_row('samlet', overall, baseline and baseline.get('overall'))
+    for name, summary in scenarios.items():
+        _print_row(name, summary, baseline and baseline.get('scenarios', {}).get(name))
+    if baseline:
+        config = {'articles': article_count, 'rate': args.rate, 'connections': args.connections, 'mix': args.mix,
+                  'streams': args.streams}
+        different = [name for name, value in config.items() if baseline['config'].get(name) != value]
+        if different:
+            print(f"  ⚠️ sammenligningen er kørt med andre indstillinger: {', '.join(different)}")
+        elif overall['throughput'] * REGRESSION < baseline['overall']['throughput']:
+            # Ved fast rate falder gennemløbet kun, når serveren ikke kan følge med
+            print(f"  ⚠️ gennemløbet er faldet fra {baseline['overall']['throughput']:.0f} req/s")
+    if args.streams:
+        print(f"SSE: {streams['open']:,} af {args.streams:,} forbindelser åbnet, {streams['closed']:,} lukket undervejs, "
+              f"{streams['updates']:,} opdateringer modtaget")
+
+    windows = {}
+    if build_times is not None:
+        build_start, build_end = build_times
+        first_version = min(sample[2] for sample in samples if sample[2] is not None)
+        swapped = [sample[0] for sample in samples if sample[2] not in (None, first_version)]
+        swap = min(swapped) if swapped else float('inf')
+        print(f"Build på {build_end - build_start:.1f}s; " + (f"serveren skiftede version {swap - build_end:.1f}s efter"
+                                                               if swapped else "serveren skiftede ikke version"))
+        for label, low, high in (('før build', float('-inf'), build_start), ('build+indlæs', build_start, swap),
+                                 ('efter skift', swap, float('inf'))):
+            window = [sample for sample in samples if low <= sample[0] < high]
+            if window:
+                windows[label] = _summary(window, elapsed)
+                latencies = sorted(sample[1] for sample in window)
+                print(f"  {label:12} {len(window):6,} forespørgsler  p50 {_percentile(latencies, 0.5):.2f} ms  "
+                      f"p99 {_percentile(latencies, 0.99):.2f} ms  maks {latencies[-1] * 1000:.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': RESULTS_VERSION,
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'commit': _commit(),
+                'config': {'articles': article_count, 'dataDir': args.data_dir, 'rate': args.rate,
+                           'seconds': args.seconds, 'connections': args.connections, 'mix': args.mix,
+                           'streams': args.streams, 'rebuildAt': args.rebuild_at},
+                'elapsed': round(elapsed, 3),
+                'overall': overall,
+                'scenarios': scenarios,
+                'streams': streams,
+                'rebuild': windows or None
+            }, f, ensure_ascii=False, indent=2)
+        print(f"💾 Resultat gemt i {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark af facetindekset: byggetid, størrelse og tid for filterkombinationer.
+
+    python benchmarks/bench_facets.py --articles 1000000
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic import SyntheticCorpus, SOURCES
+from facets import build_facets, popcount, FacetIndex
+
+COMBINATIONS = [
+    {'complexity': ['begynder']},
+    {'source': [SOURCES[1]], 'complexity': ['mellem']},
+    {'category': ['Pension'], 'audience': ['pensionister']},
+    {'category': ['Investering & Aktier', 'Opsparing'], 'audience': ['studerende', 'økonomi_nybegynder'], 'complexity': ['begynder']},
+    {'source': SOURCES[:2], 'category': ['Bolig & Ejendom'], 'audience': ['børnefamilier'], 'complexity': ['avanceret']},
+]
+
+
+def _median_ms(fn, runs=7):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--articles', type=int, default=1000000)
+    args = parser.parse_args()
+
+    print(f"Bygger facetter over {args.articles:,} syntetiske artikler...")
+    started = time.perf_counter()
+    data = build_facets(SyntheticCorpus().articles(args.articles))
+    build_seconds = time.perf_counter() - started
+    encoded = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    started = time.perf_counter()
+    index = FacetIndex(data)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    print(f"Byggetid (inkl. generering): {build_seconds:.1f}s")
+    print(f"Størrelse: {len(encoded) / 1024 / 1024:.2f} MB ({len(gzip.compress(encoded)) / 1024 / 1024:.2f} MB gzip)")
+    print(f"Indlæsning/dekodning: {load_ms:.0f} ms")
+    for filters in COMBINATIONS:
+        mask_ms, mask = _median_ms(lambda: index.filter_mask(filters))
+        counts_ms, _ = _median_ms(lambda: index.counts(filters))
+        page_ms, _ = _median_ms(lambda: index.positions(mask, limit=20))
+        print(f"  {json.dumps(filters, ensure_ascii=False)}")
+        print(f"    {popcount(mask):,} hits | AND {mask_ms:.2f} ms | alle tællinger {counts_ms:.2f} ms | første side {page_ms:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark af fuldtekstindekset: byggetid, størrelse og p50/p99 for BM25-søgning på et syntetisk korpus.
+
+    python benchmarks/bench_fulltext.py --articles 100000 --body-words 300
+
+Forespørgslerne trækkes fra korpussets eget ordforråd i fire typer: ét ord, to ord,
+præfiks (ord*) og frase ("to ord" fra en artikels brødtekst). Indekset skrives og
+memory-mappes som i API'et; der måles på FullTextIndex.search uden HTTP.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic import SyntheticCorpus
+from fulltext_index import FullTextBuilder, FullTextIndex, article_fields
+from search_index import STOPWORDS
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _queries(corpus, bodies, per_type, seed=7):
+    """Forespørgsler pr. type; ordene trækkes Zipf-fordelt som i teksten, så hyppige ord er med"""
+    rnd = random.Random(seed)
+
+    def word():
+        while True:
+            candidate = rnd.choices(corpus.vocabulary, cum_weights=corpus.cumulative)[0]
+            if ' ' not in candidate and candidate not in STOPWORDS:
+                return candidate
+
+    def phrase():
+        words = rnd.choice(bodies).split()
+        start = rnd.randrange(len(words) - 1)
+        return f'"{words[start]} {words[start + 1]}"'
+
+    return {
+        'ét ord': [word() for _ in range(per_type)],
+        'to ord': [f'{word()} {word()}' for _ in range(per_type)],
+        'præfiks': [f'{word()[:4]}*' for _ in range(per_type)],
+        'frase': [phrase() for _ in range(per_type)]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--articles', type=int, default=100000)
+    parser.add_argument('--body-words', type=int, default=300)
+    parser.add_argument('--queries', type=int, default=50, help='forespørgsler pr. type')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"Genererer og indekserer {args.articles:,} syntetiske artikler med {args.body_words} ords brødtekst...")
+    corpus = SyntheticCorpus()
+    builder = FullTextBuilder()
+    bodies = []
+    started = time.perf_counter()
+    for position, article in enumerate(corpus.articles(args.articles, body_words=args.body_words)):
+        body = article['original_data']['content']
+        if position % 100 == 0:
+            bodies.append(body)
+        builder.add(position, article_fields(article, body))
+    add_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory(prefix='fulltext-') as directory:
+        started = time.perf_counter()
+        info = builder.write(directory, 1)
+        write_seconds = time.perf_counter() - started
+        del builder
+
+        started = time.perf_counter()
+        index = FullTextIndex.load(directory)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        print(f"Termer: {info['terms']:,}")
+        print(f"Byggetid: {add_seconds:.1f}s (inkl. generering og tokenisering) + {write_seconds:.1f}s (impacts og skrivning)")
+        print(f"Størrelse: {info['bytes'] / 1024 / 1024:.1f} MB, indlæsning {load_ms:.0f} ms")
+
+        all_timings = []
+        print(f"\nTop-{args.limit}, {args.queries} forespørgsler pr. type × {args.repeat} gentagelser:")
+        for kind, queries in _queries(corpus, bodies, args.queries).items():
+            timings = []
+            totals = []
+            for query in queries:
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    result = index.search(query, args.limit)
+                    timings.append((time.perf_counter() - started) * 1000)
+                totals.append(result['total'])
+            all_timings += timings
+            print(f"  {kind:8} p50 {statistics.median(timings):7.2f} ms  p99 {_percentile(timings, 0.99):7.2f} ms  "
+                  f"(median {statistics.median(totals):,.0f} træffere)")
+        print(f"  {'samlet':8} p50 {statistics.median(all_timings):7.2f} ms  p99 {_percentile(all_timings, 0.99):7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
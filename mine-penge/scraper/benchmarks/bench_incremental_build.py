@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark af inkrementelt build: fuld kørsel, kørsel uden ændringer og kørsel hvor én kilde er ændret.
+Buildet kører i en midlertidig kopi af scraper-mappen, så rigtige data ikke berøres.
+
+    python benchmarks/bench_incremental_build.py --articles 100000 --sources 10
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from glob import glob
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic import write_tagged_files
+
+SCRAPER_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def _prepare_tree(root):
+    scraper = os.path.join(root, 'scraper')
+    os.makedirs(os.path.join(scraper, 'data', 'tagged'))
+    for path in glob(os.path.join(SCRAPER_DIR, '*.py')):
+        shutil.copy(path, scraper)
+    shutil.copytree(os.path.join(SCRAPER_DIR, 'tagging'), os.path.join(scraper, 'tagging'),
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    return scraper
+
+
+def _build(scraper, *args):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, 'build_articles.py', *args], cwd=scraper, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def _modify(path, count):
+    """Ændrer titlen på `count` artikler i en tagget fil"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for article in data['articles'][:count]:
+        article['title'] += ' (opdateret)'
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--articles', type=int, default=100000)
+    parser.add_argument('--sources', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        scraper = _prepare_tree(root)
+        paths = write_tagged_files(os.path.join(scraper, 'data', 'tagged'), args.articles, args.sources)
+
+        full = _build(scraper)
+        unchanged = _build(scraper)
+        _modify(paths[0], 100)
+        one_source = _build(scraper)
+        forced = _build(scraper, '--full')
+
+    print(f"{args.articles:,} artikler fordelt på {args.sources} kilder")
+    print(f"  Første fulde build:     {full:.1f}s")
+    print(f"  Ingen ændringer:        {unchanged:.1f}s")
+    print(f"  Én kilde ændret:        {one_source:.1f}s")
+    print(f"  Fuldt build (--full):   {forced:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
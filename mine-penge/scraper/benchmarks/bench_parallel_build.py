@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark af parallel indlæsning af taggede filer: fuldt build med én proces mod en procespulje.
+Buildet kører i en midlertidig kopi af scraper-mappen, så rigtige data ikke berøres.
+
+    python benchmarks/bench_parallel_build.py --articles 100000 --sources 50
+"""
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic import write_tagged_files
+from bench_incremental_build import _prepare_tree, _build
+
+
+def _cold_build(scraper, jobs):
+    """Fuldt build uden build-cache og gemte near-duplicate signaturer"""
+    shutil.rmtree(os.path.join(scraper, 'data', 'index'), ignore_errors=True)
+    return _build(scraper, '--full', f'--jobs={jobs}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--articles', type=int, default=100000)
+    parser.add_argument('--sources', type=int, default=50)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        scraper = _prepare_tree(root)
+        write_tagged_files(os.path.join(scraper, 'data', 'tagged'), args.articles, args.sources)
+
+        sequential = _cold_build(scraper, 1)
+        parallel = _cold_build(scraper, args.jobs)
+
+    print(f"{args.articles:,} artikler fordelt på {args.sources} kilder")
+    print(f"  Én proces (--jobs=1):    {sequential:.1f}s")
+    print(f"  {args.jobs} processer (--jobs={args.jobs}): {parallel:.1f}s ({sequential / parallel:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
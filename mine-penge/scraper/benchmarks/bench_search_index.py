@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark af søgeindekset: byggetid, størrelse og opslagstid på et syntetisk korpus.
+
+    python benchmarks/bench_search_index.py --articles 100000
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic import SyntheticCorpus
+from search_index import build_search_index, SearchIndex
+
+QUERIES = ['aktier', 'boliglån', 'pension', 'opsparing budget', 'su studie', 'invest', 'skat fradrag', 'etf']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--articles', type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"Genererer {args.articles:,} syntetiske artikler...")
+    articles = list(SyntheticCorpus().articles(args.articles))
+
+    started = time.perf_counter()
+    index_data = build_search_index(articles)
+    build_seconds = time.perf_counter() - started
+    encoded = json.dumps(index_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    size = len(encoded)
+    gzip_size = len(gzip.compress(encoded))
+
+    index = SearchIndex(index_data)
+    timings = {}
+    for query in QUERIES:
+        runs = []
+        for _ in range(5):
+            started = time.perf_counter()
+            hits = index.lookup(query)
+            runs.append((time.perf_counter() - started) * 1000)
+        timings[query] = (statistics.median(runs), len(hits))
+
+    # Lineær substring-søgning som sammenligning (som articleService uden indeks)
+    started = time.perf_counter()
+    linear_hits = [a for a in articles if 'pension' in a['title'].lower() or 'pension' in a['summary'].lower()]
+    linear_ms = (time.perf_counter() - started) * 1000
+
+    print(f"Termer: {len(index_data['terms']):,}")
+    print(f"Byggetid: {build_seconds:.2f}s")
+    print(f"Størrelse: {size / 1024 / 1024:.2f} MB ({gzip_size / 1024 / 1024:.2f} MB gzip)")
+    for query, (ms, hits) in timings.items():
+        print(f"  {query!r}: {ms:.2f} ms ({hits:,} hits)")
+    print(f"Lineær scan 'pension': {linear_ms:.2f} ms ({len(linear_hits):,} hits)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark af streaming build (--stream) mod det almindelige build: tid og maksimalt hukommelsesforbrug.
+Buildet kører i en midlertidig kopi af scraper-mappen, så rigtige data ikke berøres.
+
+    python benchmarks/bench_streaming_build.py --articles 500000 --memory-mb 128
+    python benchmarks/bench_streaming_build.py --articles 5000000 --memory-mb 256 --stream-only
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic import write_tagged_files
+from bench_incremental_build import _prepare_tree
+
+
+def _build(scraper, *args):
+    """Kører build_articles.py og returnerer (sekunder, maks. RSS i MB) for processen"""
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, 'build_articles.py', *args], cwd=scraper,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+    return time.perf_counter() - started, usage.ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--articles', type=int, default=500000)
+    parser.add_argument('--sources', type=int, default=10)
+    parser.add_argument('--memory-mb', type=int, default=128)
+    parser.add_argument('--stream-only', action='store_true', help='spring det almindelige build over')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        scraper = _prepare_tree(root)
+        write_tagged_files(os.path.join(scraper, 'data', 'tagged'), args.articles, args.sources)
+
+        stream_seconds, stream_peak = _build(scraper, '--stream', f'--memory-mb={args.memory_mb}')
+        if not args.stream_only:
+            full_seconds, full_peak = _build(scraper, '--full')
+
+    print(f"{args.articles:,} artikler fordelt på {args.sources} kilder")
+    print(f"  Streaming (--memory-mb={args.memory_mb}): {stream_seconds:.1f}s, maks. {stream_peak:.0f} MB")
+    if not args.stream_only:
+        print(f"  Almindeligt build (--full): {full_seconds:.1f}s, maks. {full_peak:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Syntetisk artikelkorpus til benchmarks.
+Genererer taggede artikler med samme felter som data/tagged/ - deterministisk ud fra et seed,
+og som en generator, så meget store korpusser ikke skal ligge i hukommelsen.
+"""
+
+import os
+import sys
+import json
+import random
+import hashlib
+from itertools import accumulate
+from typing import Dict, Iterator, Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tagging', 'tag_config.json')
+
+SOURCES = ['Mitteldorf Blog', 'Nordnet Blog', 'Budgetnoerden Blog', 'Ungmedpenge Blog', 'Moneypenny Blog']
+COMPLEXITIES = ['begynder', 'mellem', 'avanceret']
+SYLLABLES = ['spar', 'pen', 'ge', 'ak', 'tie', 'bo', 'lig', 'lån', 'ren', 'te', 'skat', 'fon', 'de',
+             'ind', 'komst', 'bud', 'get', 'for', 'brug', 'øko', 'no', 'mi', 'kon', 'to', 'sik', 'ring']
+BASE_TIMESTAMP = 1420070400  # 2015-01-01
+
+
+def _load_config() -> Dict[str, Any]:
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class SyntheticCorpus:
+    """Zipf-fordelt ordforråd bygget af rigtige nøgleord plus opdigtede danske ord"""
+
+    def __init__(self, seed: int = 42, vocabulary_size: int = 20000):
+        self.random = random.Random(seed)
+        config = _load_config()
+        self.tag_categories = config['tag_categories']
+        self.audiences = list(config['target_audiences'])
+        self.all_tags = sorted({tag for tags in self.tag_categories.values() for tag in tags})
+
+        words = list(self.all_tags)
+        while len(words) < vocabulary_size:
+            words.append(''.join(self.random.choice(SYLLABLES) for _ in range(self.random.randint(2, 5))))
+        self.vocabulary = words
+        weights = [1 / (rank + 1) for rank in range(len(words))]
+        self.cumulative = list(accumulate(weights))
+
+    def _words(self, count: int) -> str:
+        return ' '.join(self.random.choices(self.vocabulary, cum_weights=self.cumulative, k=count))
+
+    def article(self, n: int, body_words: int = 0) -> Dict[str, Any]:
+        rnd = self.random
+        url = f"https://example{n % 5}.dk/blog/artikel-{n}"
+        tags = rnd.sample(self.all_tags, rnd.randint(3, 8))
+        categories = sorted({c for c, ts in self.tag_categories.items() if any(t in ts for t in tags)})
+        published_ts = BASE_TIMESTAMP + rnd.randint(0, 10 * 365 * 86400)
+        article = {
+            'article_id': hashlib.md5(url.encode()).hexdigest()[:12],
+            'title': self._words(rnd.randint(5, 10)).capitalize(),
+            'source': SOURCES[n % len(SOURCES)],
+            'url': url,
+            'summary': self._words(rnd.randint(20, 40)),
+            'target_audiences': rnd.sample(self.audiences, rnd.randint(0, 3)),
+            'complexity_level': rnd.choice(COMPLEXITIES),
+            'minepenge_tags': tags,
+            'tag_categories': categories,
+            'confidence_scores': {a: round(rnd.random(), 2) for a in self.audiences},
+            'original_data': {
+                'author': f"Forfatter {n % 97}",
+                'date_published': '',
+                'published_ts': published_ts,
+                'word_count': rnd.randint(200, 3000),
+                'categories': []
+            },
+            'tagged_at': '2025-07-05T11:52:19'
+        }
+        # Uden brødtekst trækkes intet ekstra, så eksisterende korpusser er uændrede
+        if body_words:
+            article['original_data']['content'] = self._words(body_words)
+        return article
+
+    def articles(self, count: int, start: int = 0, body_words: int = 0) -> Iterator[Dict[str, Any]]:
+        for n in range(start, start + count):
+            yield self.article(n, body_words)
+
+
+def write_tagged_files(directory: str, total: int, sources: int = 5, seed: int = 42) -> list:
+    """Skriver `sources` taggede filer med i alt `total` artikler og returnerer stierne"""
+    os.makedirs(directory, exist_ok=True)
+    corpus = SyntheticCorpus(seed)
+    paths = []
+    per_source = -(-total // sources)
+    for s in range(sources):
+        path = os.path.join(directory, f"tagged_synthetic{s:03d}_blog_posts.json")
+        count = max(0, min(per_source, total - s * per_source))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"metadata": {"original_file": "synthetic"}, "articles": [')
+            for i, article in enumerate(corpus.articles(count, start=s * per_source)):
+                if i:
+                    f.write(',')
+                f.write(json.dumps(article, ensure_ascii=False))
+            f.write(']}')
+        paths.append(path)
+    return paths
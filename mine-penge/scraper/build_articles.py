@@ -1,16 +1,79 @@
+import io
 import os
+import sys
+import gzip
 import json
+import time
+import heapq
+import base64
+import shutil
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from array import array
 from datetime import datetime
 from glob import glob
+from itertools import islice
+from operator import itemgetter
+
+from content_store import resolve_content
+from deltas import compute_delta
+from external_sort import iter_json_array, read_trailing_metadata, scratch_database
+from external_sort import DiskKeySet, ExternalSorter, SpillingPostings
+from facets import build_facets, FacetBuilder
+from fulltext_index import FullTextBuilder, analyze, article_fields, INDEX_DIR as FULLTEXT_DIR
+from int_codec import encode_sorted
+from near_duplicates import NearDuplicateIndex, DiskNearDuplicateFilter, DiskSignatureCache, remove_near_duplicates
+from near_duplicates import INDEX_PATH as NEAR_DUPLICATES_PATH, article_digest, article_text, compute_signature
+from search_index import build_search_index, article_terms, SEARCH_INDEX_VERSION
+from relevance import article_quality, build_relevance, relevance_data, relevance_score, RelevanceIndex, SCALE
+from sort_orders import build_sort_orders, sort_orders_data, relevance_key, SORT_KEYS, SORTS, DEFAULT_SORT, RELEVANCE_SORT
+from url_index import canonicalize_url
+from widgets import build_widgets, widget_file, ALL_THEMES, MAX_LIMIT
+
+try:
+    import brotli
+except ImportError:  # optional: release builds then only emit .gz siblings
+    brotli = None
+
+try:
+    import resource
+except ImportError:  # not on Windows; only used to report peak memory
+    resource = None
 
 TAGGED_DIR = os.path.join(os.path.dirname(__file__), 'data', 'tagged')
-OUTPUT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'data', 'articles.json'))
+PUBLIC_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'public', 'data'))
+INDEX_PATH = os.path.join(PUBLIC_DATA_DIR, 'articles-index.json')
+PAGES_DIR = os.path.join(PUBLIC_DATA_DIR, 'pages')
+DETAILS_DIR = os.path.join(PUBLIC_DATA_DIR, 'articles')
+WIDGETS_DIR = os.path.join(PUBLIC_DATA_DIR, 'widgets')
+SEARCH_INDEX_PATH = os.path.join(PUBLIC_DATA_DIR, 'search-index.json')
+FACETS_PATH = os.path.join(PUBLIC_DATA_DIR, 'facets.json')
+SORT_ORDERS_PATH = os.path.join(PUBLIC_DATA_DIR, 'sort-orders.json')
+RELEVANCE_PATH = os.path.join(PUBLIC_DATA_DIR, 'relevance.json')
+# Release builds: maps each top-level artifact to its content-hashed file (served without caching)
+RELEASE_MANIFEST_PATH = os.path.join(PUBLIC_DATA_DIR, 'manifest.json')
+COMPRESSED_SUFFIXES = {'.gz': 'gzipBytes', '.br': 'brotliBytes'}
+DELTAS_DIR = os.path.join(PUBLIC_DATA_DIR, 'deltas')
+DELTAS_INDEX_PATH = os.path.join(DELTAS_DIR, 'index.json')
+DELTA_HISTORY = 10  # deltas kept for clients that are up to this many versions behind
+BUILD_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'index', 'build')
+MANIFEST_PATH = os.path.join(BUILD_CACHE_DIR, 'manifest.json')
+STREAM_SIGNATURES_PATH = os.path.join(BUILD_CACHE_DIR, 'signatures.sqlite')
+BUILD_CACHE_VERSION = 8
+PAGE_SIZE = 20
+BUILD_JOBS = os.cpu_count() or 1  # worker processes for rebuilding sources (--jobs=N)
+STREAM_MEMORY_MB = 256  # --stream working memory for sort buffers and posting lists (--memory-mb=N)
+
+# Fields kept in the list index and page files; everything else lives in the detail shards
+SLIM_FIELDS = ['article_id', 'title', 'summary', 'source', 'url', 'minepenge_tags',
+               'tag_categories', 'target_audiences', 'complexity_level']
 
 
 def find_tagged_files():
     files = glob(os.path.join(TAGGED_DIR, 'tagged_*.json'))
     # Exclude report and test files
-    return [f for f in files if 'report' not in f and 'test' not in f]
+    return sorted(f for f in files if 'report' not in os.path.basename(f) and 'test' not in os.path.basename(f))
 
 
 def load_articles_from_file(filepath):
@@ -31,85 +94,965 @@ def remove_duplicates(articles):
     seen = set()
     unique = []
     for article in articles:
-        key = article.get('url') or article.get('id') or article.get('title')
+        key = canonicalize_url(article.get('url', '')) or article.get('id') or article.get('title')
         if key and key not in seen:
             seen.add(key)
             unique.append(article)
     return unique
 
 
+def sort_key(article):
+    """Publication time as epoch seconds, normalized at scrape time (0 when unknown)"""
+    return article.get('original_data', {}).get('published_ts') or 0
+
+
+def warn_missing_timestamps(source_name, missing):
+    """Articles without published_ts predate the field; the build lists them as undated"""
+    if missing:
+        print(f'⚠️  {missing} articles in {source_name} have no published_ts and are listed as undated; '
+              f'run `python date_normalizer.py backfill`')
+
+
+def list_key(article):
+    """
+    Position in the list index: the default sort's key (newest first, ties by source and id),
+    so page files, the API's default order and the 'newest' permutation all agree
+    """
+    return list(SORT_KEYS[DEFAULT_SORT](slim_article(article)))
+
+
 def sort_articles(articles):
-    def get_date(a):
-        for field in ['publishedAt', 'foundAt']:
-            val = a.get(field)
-            if val:
-                try:
-                    # Try ISO format first
-                    return datetime.fromisoformat(val.replace('Z', '+00:00'))
-                except Exception:
-                    pass
-        return datetime(1970, 1, 1)
-    return sorted(articles, key=get_date, reverse=True)
+    return sorted(articles, key=list_key)
 
 
-def main():
-    print('🚀 Starting Python article data build...')
-    files = find_tagged_files()
-    print(f'📂 Found {len(files)} tagged data files:')
+def slim_article(article):
+    slim = {field: article.get(field) for field in SLIM_FIELDS if field in article}
+    slim['date_published'] = article.get('original_data', {}).get('date_published', '')
+    slim['published_ts'] = sort_key(article) or None
+    return slim
+
+
+def detail_article(article):
+    """Full tagged record with the body resolved from the content store"""
+    detail = dict(article)
+    original = dict(article.get('original_data', {}))
+    original['content'] = resolve_content(original)
+    detail['original_data'] = original
+    return detail
+
+
+def write_bytes(path, payload):
+    """Writes a file unless it already holds exactly these bytes; returns True if written"""
+    if os.path.exists(path) and os.path.getsize(path) == len(payload):
+        with open(path, 'rb') as f:
+            if f.read() == payload:
+                return False
+    # Replaced in one step, so the API server and static hosting never read a half-written file
+    with open(path + '.tmp', 'wb') as f:
+        f.write(payload)
+    os.replace(path + '.tmp', path)
+    return True
+
+
+def compressed_suffixes():
+    return ['.gz', '.br'] if brotli is not None else ['.gz']
+
+
+def gzip_writer(fileobj):
+    """Deterministic gzip stream (no name, zero mtime); shared so both build modes emit the same bytes"""
+    return gzip.GzipFile(filename='', mode='wb', compresslevel=9, fileobj=fileobj, mtime=0)
+
+
+def compress_payload(payload):
+    """Precompressed variants keyed by file suffix (gzip always, brotli when installed)"""
+    buffer = io.BytesIO()
+    with gzip_writer(buffer) as gz:
+        gz.write(payload)
+    variants = {'.gz': buffer.getvalue()}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(payload, quality=11)
+    return variants
+
+
+def write_compressed(path, payload, changed):
+    """Writes .gz/.br siblings next to `path` and returns their sizes"""
+    sizes = {}
+    if not changed and all(os.path.exists(path + suffix) for suffix in compressed_suffixes()):
+        for suffix in compressed_suffixes():
+            sizes[COMPRESSED_SUFFIXES[suffix]] = os.path.getsize(path + suffix)
+        return sizes
+    for suffix, compressed in compress_payload(payload).items():
+        write_bytes(path + suffix, compressed)
+        sizes[COMPRESSED_SUFFIXES[suffix]] = len(compressed)
+    return sizes
+
+
+def remove_compressed(path):
+    """Drops siblings left by an earlier release build so hosts never serve stale bytes"""
+    for suffix in COMPRESSED_SUFFIXES:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def hashed_path(path, payload):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(payload).hexdigest()[:10]}{ext}"
+
+
+def write_json(path, data, release=False, hashed=False):
+    """
+    Writes compact JSON and returns its byte sizes; unchanged files are left untouched.
+    Release builds add precompressed siblings, and with `hashed` a content-hashed copy
+    (whose name is returned as 'file') that can be cached forever.
+    """
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    changed = write_bytes(path, payload)
+    sizes = {'bytes': len(payload)}
+    if not release:
+        remove_compressed(path)
+    elif hashed:
+        target = hashed_path(path, payload)
+        sizes.update(write_compressed(target, payload, write_bytes(target, payload)))
+        sizes['file'] = os.path.basename(target)
+    else:
+        sizes.update(write_compressed(path, payload, changed))
+    return sizes
+
+
+def files_equal(path, other):
+    if not os.path.exists(other) or os.path.getsize(path) != os.path.getsize(other):
+        return False
+    with open(path, 'rb') as a, open(other, 'rb') as b:
+        while True:
+            chunk = a.read(1024 * 1024)
+            if chunk != b.read(1024 * 1024):
+                return False
+            if not chunk:
+                return True
+
+
+def compress_file(path, changed):
+    """Streaming counterpart of write_compressed for files too large to hold in memory"""
+    sizes = {}
+    for suffix in compressed_suffixes():
+        target = path + suffix
+        if changed or not os.path.exists(target):
+            with open(path, 'rb') as source, open(target, 'wb') as out:
+                if suffix == '.gz':
+                    with gzip_writer(out) as gz:
+                        shutil.copyfileobj(source, gz, 1024 * 1024)
+                else:
+                    compressor = brotli.Compressor(quality=11)
+                    for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                        out.write(compressor.process(chunk))
+                    out.write(compressor.finish())
+        sizes[COMPRESSED_SUFFIXES[suffix]] = os.path.getsize(target)
+    return sizes
+
+
+def write_streamed(path, write, release=False, hashed=False):
+    """
+    Like write_json for artifacts too large to build as one string: `write(f)` streams the
+    JSON text to a temporary file, which only replaces `path` when the bytes differ.
+    """
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        write(f)
+    changed = not files_equal(temporary, path)
+    if changed:
+        os.replace(temporary, path)
+    else:
+        os.remove(temporary)
+    sizes = {'bytes': os.path.getsize(path)}
+    if not release:
+        remove_compressed(path)
+    elif hashed:
+        stem, ext = os.path.splitext(path)
+        target = f"{stem}.{file_sha256(path)[:10]}{ext}"
+        copied = not files_equal(path, target)
+        if copied:
+            shutil.copyfile(path, target)
+        sizes.update(compress_file(target, copied))
+        sizes['file'] = os.path.basename(target)
+    else:
+        sizes.update(compress_file(path, changed))
+    return sizes
+
+
+def add_sizes(total, sizes):
+    for key, value in sizes.items():
+        if isinstance(value, int):
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+def write_pages(slim_articles, release=False, total=None):
+    """
+    Writes pages/page-N.json; `slim_articles` may be any iterable when `total` is given.
+    page-1.json also carries a summary of the filter values across the whole list, so the
+    first screen renders without downloading articles-index.json.
+    """
+    os.makedirs(PAGES_DIR, exist_ok=True)
+    total = len(slim_articles) if total is None else total
+    total_pages = max(1, -(-total // PAGE_SIZE))
+    articles = iter(slim_articles)
+    summary = {'tags': set(), 'audiences': set(), 'complexities': set(), 'sources': set()}
+    first_page = None
+    sizes = {}
+    for page in range(1, total_pages + 1):
+        page_articles = list(islice(articles, PAGE_SIZE))
+        for article in page_articles:
+            summary['tags'].update(article.get('minepenge_tags') or [])
+            summary['audiences'].update(article.get('target_audiences') or [])
+            for field, values in (('complexity_level', 'complexities'), ('source', 'sources')):
+                if article.get(field):
+                    summary[values].add(article[field])
+        payload = {
+            'articles': page_articles,
+            'pagination': {
+                'currentPage': page,
+                'pageSize': PAGE_SIZE,
+                'totalArticles': total,
+                'totalPages': total_pages,
+                'hasNextPage': page < total_pages,
+                'hasPrevPage': page > 1
+            }
+        }
+        # The summary needs every page, so page 1 is written last
+        if page == 1:
+            first_page = payload
+            continue
+        add_sizes(sizes, write_json(os.path.join(PAGES_DIR, f'page-{page}.json'), payload, release))
+    first_page['summary'] = {name: sorted(values) for name, values in summary.items()}
+    add_sizes(sizes, write_json(os.path.join(PAGES_DIR, 'page-1.json'), first_page, release))
+    # Remove pages left over from a larger previous build
+    for path in glob(os.path.join(PAGES_DIR, 'page-*.json')):
+        if int(os.path.basename(path)[5:-5]) > total_pages:
+            os.remove(path)
+            remove_compressed(path)
+    return {'count': total_pages, **sizes}
+
+
+def write_widgets(slim_articles, scores, release=False):
+    """
+    Writes widgets/<theme>-<limit>.json for the embeddable widget and removes files for
+    themes or limits that are gone; `slim_articles` and `scores` follow the list index.
+    """
+    os.makedirs(WIDGETS_DIR, exist_ok=True)
+    payloads = build_widgets(slim_articles, scores, SCALE)
+    sizes = {}
+    for name, payload in payloads.items():
+        add_sizes(sizes, write_json(os.path.join(WIDGETS_DIR, name), payload, release))
+    for path in glob(os.path.join(WIDGETS_DIR, '*.json')):
+        if os.path.basename(path) not in payloads:
+            os.remove(path)
+            remove_compressed(path)
+    return {'count': len(payloads), **sizes}
+
+
+def write_details(articles, release=False):
+    """Writes detail shards for the given articles and returns their ids"""
+    os.makedirs(DETAILS_DIR, exist_ok=True)
+    ids = []
+    for article in articles:
+        article_id = article.get('article_id')
+        if not article_id:
+            continue
+        ids.append(article_id)
+        write_json(os.path.join(DETAILS_DIR, f'{article_id}.json'), detail_article(article), release)
+    return ids
+
+
+def prune_details(live_ids):
+    """Removes shards for articles no longer in any source and reports the rest"""
+    count = 0
+    sizes = {'bytes': 0}
+    with os.scandir(DETAILS_DIR) as entries:
+        for entry in entries:
+            name, suffix = os.path.splitext(entry.name)
+            if suffix in COMPRESSED_SUFFIXES:
+                name, suffix = os.path.splitext(name)
+                size_key = COMPRESSED_SUFFIXES[os.path.splitext(entry.name)[1]]
+            else:
+                size_key = 'bytes'
+            if suffix != '.json':
+                continue
+            if name in live_ids:
+                count += size_key == 'bytes'
+                sizes[size_key] = sizes.get(size_key, 0) + entry.stat().st_size
+            else:
+                os.remove(entry.path)
+    return {'count': count, **sizes}
+
+
+def prune_hashed(names, keep):
+    """Removes content-hashed copies (and their siblings) of `names` that aren't in `keep`"""
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        for path in glob(os.path.join(PUBLIC_DATA_DIR, f'{stem}.*{ext}*')):
+            base = os.path.basename(path)
+            for suffix in COMPRESSED_SUFFIXES:
+                if base.endswith(suffix):
+                    base = base[:-len(suffix)]
+            if base != name and base not in keep:
+                os.remove(path)
+
+
+def write_release_manifest(artifacts):
+    """
+    Writes manifest.json (logical name -> hashed file and sizes). Hashed files from the
+    previous release are kept, so clients that loaded the old manifest still resolve.
+    """
+    previous = {}
+    if os.path.exists(RELEASE_MANIFEST_PATH):
+        with open(RELEASE_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            previous = json.load(f).get('artifacts', {})
+    write_json(RELEASE_MANIFEST_PATH, {'builtAt': datetime.now().isoformat(), 'artifacts': artifacts})
+    keep = {info['file'] for info in list(artifacts.values()) + list(previous.values()) if info.get('file')}
+    prune_hashed(artifacts, keep)
+
+
+def load_previous_index():
+    """The list index from the previous build (articles and metadata), or None"""
+    if not os.path.exists(INDEX_PATH):
+        return None
+    with open(INDEX_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_delta(previous, slim_articles, version, metadata, release=False):
+    """
+    Writes deltas/delta-<from>-<to>.json against the previous build and updates
+    deltas/index.json, keeping the last DELTA_HISTORY deltas. Returns the delta's info.
+    """
+    from_version = previous['metadata'].get('version', 0)
+    delta = compute_delta(previous['articles'], slim_articles)
+    name = f'delta-{from_version}-{version}.json'
+    os.makedirs(DELTAS_DIR, exist_ok=True)
+    sizes = write_json(os.path.join(DELTAS_DIR, name), {
+        'from': from_version,
+        'to': version,
+        'metadata': metadata,
+        **delta
+    }, release)
+    info = {'from': from_version, 'to': version, 'file': name, 'removed': len(delta['removed']),
+            'changed': len(delta['changed']), 'added': len(delta['added']), **sizes}
+
+    history = []
+    if os.path.exists(DELTAS_INDEX_PATH):
+        with open(DELTAS_INDEX_PATH, 'r', encoding='utf-8') as f:
+            history = json.load(f).get('deltas', [])
+    history = [entry for entry in history if entry['to'] < version][-(DELTA_HISTORY - 1):] + [info]
+    write_json(DELTAS_INDEX_PATH, {'version': version, 'deltas': history})
+
+    live = {entry['file'] for entry in history}
+    for path in glob(os.path.join(DELTAS_DIR, 'delta-*.json*')):
+        if os.path.basename(path).split('.json')[0] + '.json' not in live:
+            os.remove(path)
+    return info
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(full=False, release=False):
+    """Loads the build manifest; a fresh one is returned when the cache can't be trusted"""
+    fresh = {'version': BUILD_CACHE_VERSION, 'slimFields': SLIM_FIELDS, 'release': release, 'files': {}}
+    # Cached runs rely on the near-duplicate index already holding their signatures
+    if full or not os.path.exists(MANIFEST_PATH) or not os.path.exists(NEAR_DUPLICATES_PATH):
+        return fresh
+    with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != BUILD_CACHE_VERSION or manifest.get('slimFields') != SLIM_FIELDS:
+        return fresh
+    # Shards from a release build carry compressed siblings; switching modes rewrites them
+    if manifest.get('release', False) != release:
+        return fresh
+    return manifest
+
+
+def save_manifest(manifest):
+    os.makedirs(BUILD_CACHE_DIR, exist_ok=True)
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def run_path(name):
+    return os.path.join(BUILD_CACHE_DIR, f'{name}.run.json')
+
+
+def source_name_for(filepath):
+    return os.path.basename(filepath).replace('tagged_', '').replace('_blog_posts.json', '')
+
+
+def input_unchanged(filepath, entry):
+    """True when the file matches its manifest entry and its cached run still exists"""
+    if not entry or not os.path.exists(run_path(entry['source'])):
+        return False
+    stat = os.stat(filepath)
+    if (stat.st_size, stat.st_mtime_ns) != (entry['size'], entry['mtimeNs']):
+        # Touched but possibly unchanged: fall back to comparing content hashes
+        if stat.st_size != entry['size'] or file_sha256(filepath) != entry['sha256']:
+            return False
+        entry['mtimeNs'] = stat.st_mtime_ns
+    return True
+
+
+def inputs_unchanged(files, manifest):
+    """True when the set of tagged files and all their contents match the manifest"""
+    names = {os.path.basename(f) for f in files}
+    if names != set(manifest['files']):
+        return False
+    return all(input_unchanged(f, manifest['files'][os.path.basename(f)]) for f in files)
+
+
+def load_cached_run(entry):
+    with open(run_path(entry['source']), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def shards_present(run):
+    """Detail shards may have been removed with public/data; then the run is rebuilt"""
+    return all(os.path.exists(os.path.join(DETAILS_DIR, f"{entry['slim']['article_id']}.json"))
+               for entry in run['entries'] if entry['slim'].get('article_id'))
+
+
+def build_source_run(filepath, source_name, near_index, release=False):
+    """
+    Loads one tagged file and turns it into a sorted run: deduped within the source,
+    detail shards written, near-duplicate signatures computed from the full bodies and
+    each article's full-text terms analyzed, so unchanged sources are never re-tokenized.
+    """
+    articles = load_articles_from_file(filepath)
+    for article in articles:
+        if 'source' not in article:
+            article['source'] = source_name
+    unique = sort_articles(remove_duplicates(articles))
+    warn_missing_timestamps(source_name, sum('published_ts' not in a.get('original_data', {}) for a in unique))
+    write_details(unique, release)
+
+    entries = []
+    for article in unique:
+        canonical = canonicalize_url(article.get('url', ''))
+        if canonical:
+            near_index.add(canonical, lambda: article_text(article), article_digest(article))
+        slim = slim_article(article)
+        body = resolve_content(article.get('original_data', {})) or ''
+        entries.append({'key': list(SORT_KEYS[DEFAULT_SORT](slim)), 'url': canonical, 'slim': slim, 'terms': article_terms(slim),
+                        'quality': round(article_quality(article), 3), 'fulltext': analyze(article_fields(slim, body))})
+
+    run = {'source': source_name, 'loaded': len(articles), 'entries': entries}
+    os.makedirs(BUILD_CACHE_DIR, exist_ok=True)
+    with open(run_path(source_name), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(run, ensure_ascii=False, separators=(',', ':')))
+    return run
+
+
+class SignatureCollector:
+    """
+    Stands in for NearDuplicateIndex inside a worker process: signatures the parent already
+    holds for the same text (URL -> digest in `known`) are skipped, new or stale ones are
+    collected and sent back with the run.
+    """
+
+    def __init__(self, known):
+        self.known = known
+        self.signatures = {}
+
+    def add(self, key, text_fn, digest):
+        if self.known.get(key) != digest and key not in self.signatures:
+            self.signatures[key] = (digest, compute_signature(text_fn()))
+
+
+_known_signatures = {}
+
+
+def init_worker(known):
+    global _known_signatures
+    _known_signatures = known
+
+
+def rebuild_source(filepath, release=False):
+    """Worker entry point: builds one source run and returns it with its new signatures"""
+    collector = SignatureCollector(_known_signatures)
+    run = build_source_run(filepath, source_name_for(filepath), collector, release)
+    return run, collector.signatures
+
+
+def rebuild_sources(paths, near_index, release=False, jobs=BUILD_JOBS):
+    """
+    Rebuilds the given sources, spread over a process pool when there is more than one.
+    Runs come back in input order and signatures are added to `near_index` in that order,
+    so the result does not depend on which worker finishes first.
+    """
+    jobs = min(jobs, len(paths))
+    if jobs <= 1:
+        return [build_source_run(path, source_name_for(path), near_index, release) for path in paths]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                             initargs=(near_index.digests,)) as pool:
+        results = list(pool.map(rebuild_source, paths, [release] * len(paths)))
+    runs = []
+    for run, signatures in results:
+        for key, (digest, signature) in signatures.items():
+            near_index.add_signature(key, signature, digest)
+        runs.append(run)
+    return runs
+
+
+def load_runs(files, manifest, near_index, release=False, jobs=BUILD_JOBS):
+    """Reuses cached runs for unchanged files and rebuilds the rest (in parallel)"""
+    runs = {}
+    entries = {}
     for f in files:
-        print(f'   - {os.path.basename(f)}')
+        entry = manifest['files'].get(os.path.basename(f))
+        run = load_cached_run(entry) if input_unchanged(f, entry) else None
+        if run is not None and shards_present(run):
+            runs[f] = run
+            entries[os.path.basename(f)] = entry
 
-    all_articles = []
-    source_stats = {}
+    stale = [f for f in files if f not in runs]
+    for f, run in zip(stale, rebuild_sources(stale, near_index, release, jobs)):
+        stat = os.stat(f)
+        runs[f] = run
+        entries[os.path.basename(f)] = {'source': run['source'], 'sha256': file_sha256(f),
+                                        'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns}
 
     for f in files:
-        source_name = os.path.basename(f).replace('tagged_', '').replace('_blog_posts.json', '')
-        articles = load_articles_from_file(f)
-        for article in articles:
-            if 'source' not in article:
-                article['source'] = source_name
-        all_articles.extend(articles)
-        source_stats[source_name] = len(articles)
-        print(f'✅ Loaded {len(articles)} articles from {source_name}')
-
-    unique_articles = remove_duplicates(all_articles)
-    print(f'🔄 Removed {len(all_articles) - len(unique_articles)} duplicate articles')
-
-    sorted_articles = sort_articles(unique_articles)
-
-    # Build metadata
-    metadata = {
-        'totalArticles': len(sorted_articles),
+        if f in stale:
+            print(f'✅ Rebuilt {runs[f]["source"]}: {runs[f]["loaded"]} articles')
+        else:
+            print(f'♻️  Reused {runs[f]["source"]}: {runs[f]["loaded"]} articles (unchanged)')
+
+    # Drop runs for input files that no longer exist
+    for name, entry in manifest['files'].items():
+        if name not in entries and os.path.exists(run_path(entry['source'])):
+            os.remove(run_path(entry['source']))
+    manifest['files'] = entries
+    return [runs[f] for f in files]
+
+
+def merge_runs(runs):
+    """
+    K-way merge of the pre-sorted runs in list_key order (equal keys keep file order).
+    Returns the merged run entries and their canonical URLs, keeping the first of each URL.
+    """
+    merged = heapq.merge(*(run['entries'] for run in runs), key=itemgetter('key'))
+    unique = []
+    keys = []
+    seen = set()
+    for entry in merged:
+        canonical = entry['url']
+        if canonical:
+            if canonical in seen:
+                continue
+            seen.add(canonical)
+        unique.append(entry)
+        keys.append(canonical)
+    return unique, keys
+
+
+def write_artifact(path, build, version, release=False):
+    """Builds a positional artifact, stamps it with the list version and writes it (hashed on release)"""
+    started = time.perf_counter()
+    data = build()
+    data['listVersion'] = version
+    sizes = write_json(path, data, release, hashed=True)
+    sizes['buildSeconds'] = round(time.perf_counter() - started, 3)
+    return sizes
+
+
+def write_fulltext_index(entries, version, list_digest):
+    """
+    Server-side BM25 index for the read API (data/index/fulltext.*) over the full bodies.
+    Each run entry carries its analyzed terms, so this only merges them in list order.
+    """
+    started = time.perf_counter()
+    builder = FullTextBuilder()
+    for position, entry in enumerate(entries):
+        builder.add_analyzed(position, *entry['fulltext'])
+    info = builder.write(FULLTEXT_DIR, version, list_digest)
+    info['buildSeconds'] = round(time.perf_counter() - started, 3)
+    return info
+
+
+def list_hash(slim_articles):
+    """Hash of the list index's article array, so a build can tell whether the list changed"""
+    payload = json.dumps(slim_articles, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def build_metadata(version, list_digest, total, source_stats, date_range, files, release, artifacts):
+    return {
+        'version': version,
+        'listHash': list_digest,
+        'totalArticles': total,
         'lastUpdated': datetime.now().isoformat(),
         'sources': list(source_stats.keys()),
         'articlesPerSource': source_stats,
+        'dateRange': date_range,
+        'pageSize': PAGE_SIZE,
         'buildInfo': {
             'buildDate': datetime.now().isoformat(),
             'sourceFiles': [os.path.basename(f) for f in files],
-            'totalSize': None  # Set after writing
+            'release': release,
+            'artifacts': artifacts
         }
     }
 
-    # Ensure output dir exists
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    # Write file
-    consolidated = {
-        'articles': sorted_articles,
-        'metadata': metadata
-    }
-    json_str = json.dumps(consolidated, ensure_ascii=False, indent=2)
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        f.write(json_str)
-    size_mb = os.path.getsize(OUTPUT_PATH) / 1024 / 1024
-    metadata['buildInfo']['totalSize'] = f"{size_mb:.2f} MB"
-
-    print(f'✅ Successfully created: {OUTPUT_PATH}')
-    print(f'📊 Total articles: {len(sorted_articles)}')
-    print(f'📁 File size: {size_mb:.2f} MB')
+def publish_top_level(infos, release):
+    """Release builds list the hashed top-level files in manifest.json; dev builds drop them"""
+    if release:
+        write_release_manifest({os.path.basename(path): info for path, info in infos.items()})
+    else:
+        # A dev build must not leave clients resolving to an older hashed release
+        if os.path.exists(RELEASE_MANIFEST_PATH):
+            os.remove(RELEASE_MANIFEST_PATH)
+        prune_hashed([os.path.basename(path) for path in infos], set())
+
+
+def format_size(size):
+    return f"{size / 1024 / 1024:.2f} MB" if size >= 1024 * 1024 else f"{size / 1024:.1f} KB"
+
+
+def format_sizes(sizes):
+    """'451.0 KB' plus compressed sizes when the artifact has them"""
+    text = format_size(sizes['bytes'])
+    compressed = [f"{label} {format_size(sizes[key])}"
+                  for label, key in (('gz', 'gzipBytes'), ('br', 'brotliBytes')) if key in sizes]
+    return f"{text} ({', '.join(compressed)})" if compressed else text
+
+
+def print_summary(total, version, release, delta_info, metadata, index_info):
+    artifacts = metadata['buildInfo']['artifacts']
+    pages_info, details_info = artifacts['pages'], artifacts['details']
+    print(f'✅ Successfully created: {INDEX_PATH}' + (' (release)' if release else ''))
+    print(f'📊 Total articles: {total} (version {version})')
+    if delta_info:
+        print(f'🧩 Delta {delta_info["from"]} -> {delta_info["to"]}: +{delta_info["added"]} '
+              f'-{delta_info["removed"]} ~{delta_info["changed"]}, {format_sizes(delta_info)}')
+    print('📁 Artifact sizes:')
+    print(f'   articles-index.json: {format_sizes(index_info)}')
+    print(f'   pages/: {pages_info["count"]} files, {format_sizes(pages_info)} '
+          f'(page-1.json: {format_size(os.path.getsize(os.path.join(PAGES_DIR, "page-1.json")))})')
+    print(f'   articles/: {details_info["count"]} detail shards, {format_sizes(details_info)}')
+    print(f'   widgets/: {artifacts["widgets"]["count"]} files, {format_sizes(artifacts["widgets"])}')
+    for name, key in (('search-index.json', 'searchIndex'), ('facets.json', 'facets'),
+                      ('sort-orders.json', 'sortOrders'), ('relevance.json', 'relevance')):
+        print(f'   {name}: {format_sizes(artifacts[key])} (built in {artifacts[key]["buildSeconds"]}s)')
     print('\n📈 Articles per source:')
-    for source, count in source_stats.items():
+    for source, count in metadata['articlesPerSource'].items():
         print(f'   {source}: {count} articles')
 
+
+def option_value(name, default):
+    """Value of a `--name=value` command line option"""
+    for arg in sys.argv[1:]:
+        if arg.startswith(f'{name}='):
+            return arg.split('=', 1)[1]
+    return default
+
+
+def load_previous_metadata():
+    """
+    Metadata of the previous list index without parsing its articles: it is written
+    last, so it can be read from the end of the file.
+    """
+    return read_trailing_metadata(INDEX_PATH)
+
+
+def stream_source(filepath, file_index, records, file_keys, live_ids, signatures, release=False):
+    """
+    Streaming counterpart of build_source_run: reads one tagged file article by article,
+    dedupes it through the on-disk `file_keys`, writes detail shards and adds a sortable
+    record per article to `records`. Returns the number of articles loaded.
+    """
+    source_name = source_name_for(filepath)
+    file_keys.clear()
+    loaded = missing = 0
+    for sequence, article in enumerate(iter_json_array(filepath)):
+        loaded += 1
+        if 'source' not in article:
+            article['source'] = source_name
+        canonical = canonicalize_url(article.get('url', ''))
+        key = canonical or article.get('id') or article.get('title')
+        if not key or not file_keys.add(key):
+            continue
+        missing += 'published_ts' not in article.get('original_data', {})
+        for article_id in write_details([article], release):
+            live_ids.add(article_id)
+        # Signatures travel with the record; only canonical URLs take part in near-dup removal
+        signature = signatures.get(canonical, lambda: article_text(article), article_digest(article)) \
+            if canonical else None
+        slim = slim_article(article)
+        records.add({
+            'order': list(SORT_KEYS[DEFAULT_SORT](slim)) + [file_index, sequence],
+            'url': canonical,
+            'signature': base64.b64encode(signature.tobytes()).decode('ascii') if signature else None,
+            'quality': round(article_quality(article), 3),
+            'slim': slim
+        })
+    warn_missing_timestamps(source_name, missing)
+    return loaded
+
+
+def write_streamed_search_index(path, postings, doc_count, version, spill_dir, release=False):
+    """Writes the same bytes as build_search_index + write_json, one term at a time"""
+    started = time.perf_counter()
+    postings_path = os.path.join(spill_dir, 'postings.part')
+
+    def write(f):
+        f.write(f'{{"version":{SEARCH_INDEX_VERSION},"docCount":{doc_count},"terms":[')
+        with open(postings_path, 'w', encoding='utf-8') as part:
+            for i, (term, positions) in enumerate(postings.items()):
+                separator = ',' if i else ''
+                f.write(separator + json.dumps(term, ensure_ascii=False))
+                part.write(f'{separator}"{encode_sorted(positions)}"')
+        f.write('],"postings":[')
+        with open(postings_path, 'r', encoding='utf-8') as part:
+            shutil.copyfileobj(part, f, 1024 * 1024)
+        f.write(f'],"listVersion":{version}}}')
+
+    sizes = write_streamed(path, write, release, hashed=True)
+    os.remove(postings_path)
+    sizes['buildSeconds'] = round(time.perf_counter() - started, 3)
+    return sizes
+
+
+def iter_list(list_path):
+    with open(list_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def stream_build(files, release=False, memory_limit=STREAM_MEMORY_MB * 1024 * 1024):
+    """
+    Bounded-memory build for archives that don't fit in RAM. Articles are read one at a
+    time, deduplicated through SQLite key sets and ordered by an external merge sort; the
+    list index, search index and sort orders are written as streams. The output matches
+    the in-memory build, but there is no build cache and no delta against the previous list.
+    """
+    started = time.perf_counter()
+    print(f'🌊 Streaming build with a {memory_limit // (1024 * 1024)} MB working memory budget')
+    os.makedirs(BUILD_CACHE_DIR, exist_ok=True)
+    os.makedirs(PUBLIC_DATA_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix='stream-', dir=BUILD_CACHE_DIR) as spill_dir:
+        database = scratch_database(os.path.join(spill_dir, 'keys.sqlite'))
+        live_ids = DiskKeySet(database, 'live_ids')
+        file_keys = DiskKeySet(database, 'file_keys')
+
+        # Pass 1: per-source dedupe, detail shards and records for the global sort
+        records = ExternalSorter(spill_dir, memory_limit // 2, key=itemgetter('order'), name='articles')
+        signatures = DiskSignatureCache(STREAM_SIGNATURES_PATH)
+        source_stats = {}
+        for file_index, filepath in enumerate(files):
+            loaded = stream_source(filepath, file_index, records, file_keys, live_ids, signatures, release)
+            source_stats[source_name_for(filepath)] = loaded
+            print(f'✅ Streamed {source_name_for(filepath)}: {loaded} articles')
+        pruned = signatures.prune()
+        signatures.close()
+        database.commit()
+        print(f'🔏 Computed {signatures.computed} new near-duplicate signatures, pruned {pruned} for removed URLs')
+        print(f'🗂️  Sorted {records.count} articles through {len(records.spills)} spill files')
+
+        # Pass 2: merge in list order, drop cross-source and near duplicates, feed the indexes
+        urls = DiskKeySet(database, 'urls')
+        near_filter = DiskNearDuplicateFilter(database)
+        postings = SpillingPostings(spill_dir, memory_limit // 4)
+        facet_builder = FacetBuilder()
+        orders = {sort: ExternalSorter(spill_dir, memory_limit // (4 * len(SORTS)), name=f'order-{sort}')
+                  for sort in SORTS}
+        relevance_order = ExternalSorter(spill_dir, memory_limit // 8, name='relevance')
+        scores = array('H')
+        list_path = os.path.join(spill_dir, 'articles.jsonl')
+        digest = hashlib.sha256(b'[')
+        total = duplicates = near_duplicates = 0
+        date_from = date_to = None
+        with open(list_path, 'w', encoding='utf-8') as listing:
+            for record in records.sorted():
+                canonical = record['url']
+                if canonical:
+                    if not urls.add(canonical):
+                        duplicates += 1
+                        continue
+                    signature = array('I')
+                    signature.frombytes(base64.b64decode(record['signature']))
+                    if near_filter.check(canonical, signature):
+                        near_duplicates += 1
+                        continue
+                slim = record['slim']
+                line = json.dumps(slim, ensure_ascii=False, separators=(',', ':'))
+                listing.write(line + '\n')
+                digest.update(f"{',' if total else ''}{line}".encode('utf-8'))
+                postings.add(total, article_terms(slim))
+                facet_builder.add(total, slim)
+                timestamp = slim.get('published_ts')
+                if timestamp:
+                    date_from = timestamp if date_from is None else min(date_from, timestamp)
+                    date_to = timestamp if date_to is None else max(date_to, timestamp)
+                # The list is newest first, so date_to already holds the newest timestamp
+                score = relevance_score(record['quality'], timestamp, date_to or 0)
+                scores.append(score)
+                relevance_order.add([-score, total])
+                for sort in SORT_KEYS:
+                    orders[sort].add([SORT_KEYS[sort](slim), total])
+                orders[RELEVANCE_SORT].add([relevance_key(slim, score), total])
+                total += 1
+        database.commit()
+        digest.update(b']')
+        print(f'🔄 Removed {sum(source_stats.values()) - records.count + duplicates} duplicate articles')
+        print(f'🔄 Removed {near_duplicates} near-duplicate articles')
+
+        # Without the previous list there is no delta; a changed list breaks every client's chain
+        previous = load_previous_metadata()
+        previous_version = previous.get('version', 0) if previous else 0
+        list_changed = previous is None or previous.get('listHash') != digest.hexdigest()[:16]
+        version = previous_version + 1 if list_changed else previous_version
+        if list_changed and os.path.isdir(DELTAS_DIR):
+            shutil.rmtree(DELTAS_DIR)
+
+        # Pass 3: pages and the positional artifacts
+        pages_info = write_pages(iter_list(list_path), release, total=total)
+        details_info = prune_details(live_ids)
+        search_info = write_streamed_search_index(SEARCH_INDEX_PATH, postings, total, version, spill_dir, release)
+        facets_info = write_artifact(FACETS_PATH, facet_builder.build, version, release)
+        sort_info = write_artifact(SORT_ORDERS_PATH, lambda: sort_orders_data(
+            total, {sort: (item[1] for item in sorter.sorted()) for sort, sorter in orders.items()}), version, release)
+        relevance_info = write_artifact(RELEVANCE_PATH, lambda: relevance_data(
+            scores, (item[1] for item in relevance_order.sorted()), total), version, release)
+        widgets_info = write_widgets(iter_list(list_path), scores, release)
+
+        date_range = {'from': date_from, 'to': date_to} if date_from is not None else None
+        metadata = build_metadata(version, digest.hexdigest()[:16], total, source_stats, date_range,
+                                  files, release, {'pages': pages_info, 'details': details_info,
+                                                   'searchIndex': search_info, 'facets': facets_info,
+                                                   'sortOrders': sort_info, 'relevance': relevance_info,
+                                                   'widgets': widgets_info})
+
+        def write_index(f):
+            f.write('{"articles":[')
+            with open(list_path, 'r', encoding='utf-8') as listing:
+                for i, line in enumerate(listing):
+                    f.write(f"{',' if i else ''}{line[:-1]}")
+            f.write('],"metadata":')
+            f.write(json.dumps(metadata, ensure_ascii=False, separators=(',', ':')))
+            f.write('}')
+
+        index_info = write_streamed(INDEX_PATH, write_index, release, hashed=True)
+        publish_top_level({INDEX_PATH: index_info, SEARCH_INDEX_PATH: search_info, FACETS_PATH: facets_info,
+                           SORT_ORDERS_PATH: sort_info, RELEVANCE_PATH: relevance_info}, release)
+        database.close()
+
+    print_summary(total, version, release, None, metadata, index_info)
+    # Its postings are held in memory, so the API builds a title/summary/tags index at startup instead
+    print('🔎 Full-text index is not built by --stream')
+    peak = f', peak memory {peak_rss_mb():.0f} MB' if resource is not None else ''
+    print(f'\n⏱️  Streaming build took {time.perf_counter() - started:.1f}s{peak}')
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def main():
+    print('🚀 Starting Python article data build...')
+    files = find_tagged_files()
+    print(f'📂 Found {len(files)} tagged data files:')
+    for f in files:
+        print(f'   - {os.path.basename(f)}')
+
+    release = '--release' in sys.argv
+    if '--stream' in sys.argv:
+        stream_build(files, release, int(option_value('--memory-mb', STREAM_MEMORY_MB)) * 1024 * 1024)
+        return
+    manifest = load_manifest(full='--full' in sys.argv, release=release)
+    outputs = [INDEX_PATH, SEARCH_INDEX_PATH, FACETS_PATH, SORT_ORDERS_PATH, RELEVANCE_PATH,
+               os.path.join(FULLTEXT_DIR, 'fulltext.json'),
+               os.path.join(WIDGETS_DIR, widget_file(ALL_THEMES, MAX_LIMIT))] + ([RELEASE_MANIFEST_PATH] if release else [])
+    if inputs_unchanged(files, manifest) and all(os.path.exists(path) for path in outputs):
+        save_manifest(manifest)
+        print(f'✨ No tagged files changed since the last build, {os.path.basename(INDEX_PATH)} is up to date')
+        return
+
+    near_index = NearDuplicateIndex(NEAR_DUPLICATES_PATH)
+    runs = load_runs(files, manifest, near_index, release, int(option_value('--jobs', BUILD_JOBS)))
+    # Signatures for URLs that left every source would otherwise stay in the index forever
+    pruned = near_index.prune({entry['url'] for run in runs for entry in run['entries'] if entry['url']})
+    if pruned:
+        print(f'🧹 Pruned {pruned} near-duplicate signatures for removed URLs')
+
+    source_stats = {run['source']: run['loaded'] for run in runs}
+    unique_entries, keys = merge_runs(runs)
+    total_loaded = sum(run['loaded'] for run in runs)
+    print(f'🔄 Removed {total_loaded - len(unique_entries)} duplicate articles')
+
+    kept_entries = remove_near_duplicates(unique_entries, near_index, keys)
+    print(f'🔄 Removed {len(unique_entries) - len(kept_entries)} near-duplicate articles')
+    slim_articles = [entry['slim'] for entry in kept_entries]
+
+    # The version only moves when the list actually changed
+    previous = load_previous_index()
+    previous_version = previous['metadata'].get('version', 0) if previous else 0
+    list_changed = previous is None or previous['articles'] != slim_articles
+    version = previous_version + 1 if list_changed else previous_version
+    if previous is None and os.path.isdir(DELTAS_DIR):
+        # Without the previous list no chain can reach this build; clients reload in full
+        shutil.rmtree(DELTAS_DIR)
+
+    os.makedirs(PUBLIC_DATA_DIR, exist_ok=True)
+    pages_info = write_pages(slim_articles, release)
+    # Shards are kept for every article in a run, so reused runs never need rewriting
+    details_info = prune_details({entry['slim'].get('article_id') for run in runs for entry in run['entries']})
+
+    term_sets = (entry['terms'] for entry in kept_entries)
+    search_info = write_artifact(SEARCH_INDEX_PATH, lambda: build_search_index(slim_articles, term_sets),
+                                 version, release)
+    facets_info = write_artifact(FACETS_PATH, lambda: build_facets(slim_articles), version, release)
+    relevance = build_relevance((entry['quality'] for entry in kept_entries),
+                                (slim.get('published_ts') for slim in slim_articles))
+    scores = RelevanceIndex(relevance).scores
+    sort_info = write_artifact(SORT_ORDERS_PATH, lambda: build_sort_orders(slim_articles, scores), version, release)
+    relevance_info = write_artifact(RELEVANCE_PATH, lambda: relevance, version, release)
+    widgets_info = write_widgets(slim_articles, scores, release)
+
+    # Timestamps were normalized at scrape time, so the range is a plain min/max
+    timestamps = [a['published_ts'] for a in slim_articles if a.get('published_ts')]
+    date_range = {'from': min(timestamps), 'to': max(timestamps)} if timestamps else None
+    list_digest = list_hash(slim_articles)
+    fulltext_info = write_fulltext_index(kept_entries, version, list_digest)
+    metadata = build_metadata(version, list_digest, len(slim_articles), source_stats, date_range,
+                              files, release, {'pages': pages_info, 'details': details_info,
+                                               'searchIndex': search_info, 'facets': facets_info,
+                                               'sortOrders': sort_info, 'relevance': relevance_info,
+                                               'widgets': widgets_info})
+
+    # Delta against the previous build for clients that already hold it
+    delta_info = None
+    if previous is not None and list_changed:
+        delta_info = write_delta(previous, slim_articles, version, metadata, release)
+
+    # Slim list index: everything the list views, filters and search need.
+    # Its own sizes can't live inside it, so release builds record them in manifest.json
+    index_info = write_json(INDEX_PATH, {
+        'articles': slim_articles,
+        'metadata': metadata
+    }, release, hashed=True)
+    publish_top_level({INDEX_PATH: index_info, SEARCH_INDEX_PATH: search_info, FACETS_PATH: facets_info,
+                       SORT_ORDERS_PATH: sort_info, RELEVANCE_PATH: relevance_info}, release)
+    # Only record the inputs once every artifact for them has been written
+    save_manifest(manifest)
+
+    print_summary(len(slim_articles), version, release, delta_info, metadata, index_info)
+    print(f'🔎 Full-text index: {fulltext_info["terms"]} terms, {format_size(fulltext_info["bytes"])} '
+          f'(built in {fulltext_info["buildSeconds"]}s)')
+
+
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -0,0 +1,8 @@
+# Testene ligger ved siden af modulerne og importerer dem som scripterne gør (scraper/ på sys.path)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Manuelt testscript der kører taggeren på en datafil; ikke en pytest-test
+collect_ignore = [os.path.join('tagging', 'test_tagger.py')]
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Content Store
+Content-addresseret lager for artikeltekster, så hver brødtekst kun gemmes én gang
+på tværs af rå, taggede og byggede filer.
+
+Rå og taggede artikler refererer til teksten via `content_ref` (SHA-256 af teksten).
+Forbrugere slår teksten op dovent med `resolve_content`.
+"""
+
+import os
+import sys
+import json
+import gzip
+import hashlib
+import logging
+from glob import glob
+from typing import Dict, Any, Iterable, Optional
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+CONTENT_DIR = os.path.join(DATA_DIR, 'content')
+
+
+class ContentStore:
+    """Gemmer tekster under deres SHA-256 hash i data/content/<xx>/<hash>.txt.gz"""
+
+    def __init__(self, root: str = CONTENT_DIR):
+        self.root = root
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Returnerer hash-nøglen for en tekst"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _path(self, ref: str) -> str:
+        return os.path.join(self.root, ref[:2], f"{ref}.txt.gz")
+
+    def has(self, ref: str) -> bool:
+        return os.path.exists(self._path(ref))
+
+    def put(self, text: str) -> str:
+        """Gemmer tekst hvis den ikke allerede findes og returnerer dens reference"""
+        ref = self.content_hash(text)
+        path = self._path(ref)
+        if os.path.exists(path):
+            return ref
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Skriv til midlertidig fil og omdøb, så en afbrudt kørsel aldrig efterlader halve tekster
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return ref
+
+    def get(self, ref: str) -> str:
+        """Henter tekst for en reference"""
+        with gzip.open(self._path(ref), 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def prune(self, live_refs: Iterable[str]) -> int:
+        """Sletter tekster der ikke længere refereres og returnerer antal slettede"""
+        live = set(live_refs)
+        removed = 0
+        for path in glob(os.path.join(self.root, '*', '*.txt.gz')):
+            ref = os.path.basename(path)[:-len('.txt.gz')]
+            if ref not in live:
+                os.remove(path)
+                removed += 1
+        return removed
+
+
+_default_store: Optional[ContentStore] = None
+
+
+def get_default_store() -> ContentStore:
+    """Returnerer det delte lager under data/content"""
+    global _default_store
+    if _default_store is None:
+        _default_store = ContentStore()
+    return _default_store
+
+
+def externalize_content(record: Dict[str, Any], store: ContentStore = None) -> Dict[str, Any]:
+    """Returnerer en kopi af artiklen hvor `content` er erstattet af `content_ref`"""
+    if 'content' not in record:
+        return record
+    store = store or get_default_store()
+    externalized = {k: v for k, v in record.items() if k != 'content'}
+    externalized['content_ref'] = store.put(record.get('content') or '')
+    return externalized
+
+
+def resolve_content(record: Dict[str, Any], store: ContentStore = None) -> str:
+    """Returnerer artiklens tekst, uanset om den ligger inline eller i lageret"""
+    if 'content' in record:
+        return record.get('content') or ''
+    ref = record.get('content_ref')
+    if not ref:
+        return ''
+    return (store or get_default_store()).get(ref)
+
+
+def migrate_file(filepath: str, store: ContentStore = None) -> int:
+    """Flytter inline brødtekster i en rå eller tagget JSON fil ind i lageret"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    migrated = 0
+    if 'blog_posts' in data:
+        posts = []
+        for post in data['blog_posts']:
+            if 'content' in post:
+                migrated += 1
+            posts.append(externalize_content(post, store))
+        data['blog_posts'] = posts
+    for article in data.get('articles', []):
+        original = article.get('original_data', {})
+        if 'content' in original:
+            migrated += 1
+            article['original_data'] = externalize_content(original, store)
+        # Sammendraget ligger allerede på topplan
+        article.get('original_data', {}).pop('summary', None)
+
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return migrated
+
+
+def collect_refs(filepaths: Iterable[str]) -> set:
+    """Samler alle content_ref værdier fra rå og taggede filer"""
+    refs = set()
+    for filepath in filepaths:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for post in data.get('blog_posts', []):
+            if post.get('content_ref'):
+                refs.add(post['content_ref'])
+        for article in data.get('articles', []):
+            ref = article.get('original_data', {}).get('content_ref')
+            if ref:
+                refs.add(ref)
+    return refs
+
+
+def data_files() -> list:
+    """Returnerer rå og taggede artikelfiler (uden rapporter)"""
+    files = glob(os.path.join(DATA_DIR, '*_blog_posts.json'))
+    files += glob(os.path.join(DATA_DIR, 'tagged', 'tagged_*_blog_posts.json'))
+    return sorted(files)
+
+
+def main():
+    """Hovedfunktion: `migrate` flytter eksisterende tekster ind i lageret, `prune` rydder op"""
+    command = sys.argv[1] if len(sys.argv) > 1 else 'migrate'
+    store = get_default_store()
+    files = data_files()
+
+    if command == 'migrate':
+        for filepath in files:
+            before = os.path.getsize(filepath)
+            migrated = migrate_file(filepath, store)
+            after = os.path.getsize(filepath)
+            logger.info(f"{os.path.basename(filepath)}: {migrated} tekster flyttet, "
+                        f"{before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+    elif command == 'prune':
+        removed = store.prune(collect_refs(files))
+        logger.info(f"Slettede {removed} ubrugte tekster fra {store.root}")
+    else:
+        print(f"Ukendt kommando: {command} (brug 'migrate' eller 'prune')")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
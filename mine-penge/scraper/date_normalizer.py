@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Date Normalizer
+Normaliserer udgivelsesdatoer fra bloggene til et epoch-heltal (sekunder, UTC).
+
+Bloggene leverer datoer som ISO-tidsstempler fra meta tags, RFC 2822 fra feeds eller
+danske tekster som "5. juli 2025", "31. August 2024" og "13. jan." (uden år).
+De hurtige ISO/RFC-veje prøves først; danske månedsnavne parses til sidst.
+Resultatet caches, da de samme formater og strenge går igen på tværs af artikler.
+
+Datoer uden år (Budgetnoerden viser kun "9. maj") får året fra et referencetidspunkt:
+scrape-tidspunktet, eller for taggede filer tagging-tidspunktet, der ligger lige efter.
+Datoen lægges på seneste forekomst på eller før referencen. Uden reference afvises de (None),
+så et år aldrig gættes ud fra hvornår et script tilfældigvis køres.
+"""
+
+import re
+import sys
+import json
+import logging
+from datetime import datetime, date, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional, Union
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+try:
+    from zoneinfo import ZoneInfo
+    LOCAL_TZ = ZoneInfo('Europe/Copenhagen')
+except Exception:  # tzdata mangler på nogle systemer
+    LOCAL_TZ = timezone.utc
+
+DANISH_MONTHS = {
+    'jan': 1, 'januar': 1, 'feb': 2, 'februar': 2, 'mar': 3, 'marts': 3,
+    'apr': 4, 'april': 4, 'maj': 5, 'jun': 6, 'juni': 6, 'jul': 7, 'juli': 7,
+    'aug': 8, 'august': 8, 'sep': 9, 'sept': 9, 'september': 9,
+    'okt': 10, 'oktober': 10, 'nov': 11, 'november': 11, 'dec': 12, 'december': 12
+}
+
+_DANISH_RE = re.compile(r'(\d{1,2})\.?\s*([a-zæøå]+)\.?(?:\s+(\d{4}))?', re.IGNORECASE)
+_NUMERIC_RE = re.compile(r'(\d{1,2})[./-](\d{1,2})[./-](\d{4})')
+
+
+def _to_epoch(parsed: datetime) -> int:
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=LOCAL_TZ)
+    return int(parsed.timestamp())
+
+
+def _from_parts(year: int, month: int, day: int) -> Optional[int]:
+    try:
+        return _to_epoch(datetime(year, month, day))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def _normalize(value: str, reference: Optional[date]) -> Optional[int]:
+    # 1. ISO 8601 (meta tags, <time datetime>): "2025-05-16T14:29:08+02:00", "2025-05-16"
+    if len(value) >= 10 and value[4] == '-' and value[:4].isdigit():
+        try:
+            return _to_epoch(datetime.fromisoformat(value.replace('Z', '+00:00')))
+        except ValueError:
+            pass
+
+    # 2. RFC 2822 (RSS): "Mon, 16 Jun 2025 08:00:00 +0200"
+    if ',' in value and value[:3].isalpha():
+        try:
+            return _to_epoch(parsedate_to_datetime(value))
+        except (TypeError, ValueError):
+            pass
+
+    # 3. Numerisk dansk dato: "05.07.2025", "5/7-2025"
+    match = _NUMERIC_RE.search(value)
+    if match:
+        day, month, year = (int(part) for part in match.groups())
+        return _from_parts(year, month, day)
+
+    # 4. Danske månedsnavne: "5. juli 2025", "13. jan." (uden år: seneste forekomst før reference)
+    for match in _DANISH_RE.finditer(value):
+        month = DANISH_MONTHS.get(match.group(2).lower())
+        if not month:
+            continue
+        day = int(match.group(1))
+        if match.group(3):
+            return _from_parts(int(match.group(3)), month, day)
+        if reference is None:
+            return None
+        year = reference.year
+        if (month, day) > (reference.month, reference.day):
+            year -= 1
+        return _from_parts(year, month, day)
+    return None
+
+
+def normalize_date(value: Optional[str], reference: Union[datetime, str, None] = None) -> Optional[int]:
+    """
+    Returnerer udgivelsestidspunktet som epoch-sekunder, eller None hvis datoen ikke kan læses.
+    `reference` (scrape-tidspunktet) giver året til datoer uden årstal; uden den afvises de.
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    if isinstance(reference, str):
+        try:
+            reference = datetime.fromisoformat(reference)
+        except ValueError:
+            reference = None
+    return _normalize(value, reference.date() if reference else None)
+
+
+def article_timestamp(article: Dict[str, Any]) -> Optional[int]:
+    """
+    `published_ts` for en tagget artikel; normaliseres fra `date_published` med tagging-tidspunktet
+    som reference, hvis filen er fra før feltet fandtes
+    """
+    original = article.get('original_data', {})
+    if 'published_ts' in original:
+        return original['published_ts']
+    return normalize_date(original.get('date_published'), article.get('tagged_at'))
+
+
+def cache_info():
+    """Cache-statistik, nyttig til at se hvor mange datoer der genbruges"""
+    return _normalize.cache_info()
+
+
+def backfill_file(filepath: str) -> int:
+    """Tilføjer `published_ts` til rå og taggede artikler der mangler det; returnerer antal"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    updated = 0
+    for post in data.get('blog_posts', []):
+        if 'published_ts' not in post:
+            post['published_ts'] = normalize_date(post.get('date_published'), post.get('scraped_at'))
+            updated += 1
+    for article in data.get('articles', []):
+        original = article.get('original_data', {})
+        if 'published_ts' not in original:
+            # Taggede artikler har ikke scrape-tidspunktet; tagging sker lige efter scraping
+            original['published_ts'] = article_timestamp(article)
+            updated += 1
+
+    if updated:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    return updated
+
+
+def main():
+    """Hovedfunktion: `backfill` normaliserer datoer i eksisterende rå og taggede filer"""
+    from content_store import data_files
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'backfill'
+    if command != 'backfill':
+        print(f"Ukendt kommando: {command} (brug 'backfill')")
+        sys.exit(1)
+    for filepath in data_files():
+        updated = backfill_file(filepath)
+        logger.info(f"{filepath}: {updated} datoer normaliseret")
+    logger.info(f"Cache: {cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Deltas
+Forskelle mellem to versioner af listeindekset, så klienter kan hente små patches i stedet
+for hele articles-index.json.
+
+En delta indeholder fjernede artikel-ID'er, ændrede artikler og tilføjede artikler med
+deres endelige position. Artikler der har skiftet plads i forhold til de øvrige (fx fordi
+datoen er rettet) sendes som fjernet + tilføjet, så klienten kan genskabe den nye rækkefølge
+præcist: fjern, erstat ændrede, og indsæt de tilføjede i stigende positionsorden.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Any, Set
+
+
+def _stable_ids(old_positions: List[int]) -> Set[int]:
+    """
+    Indekser (i den nye rækkefølge) for den længste delmængde af fælles artikler, der står
+    i samme indbyrdes rækkefølge som før (længste voksende delsekvens, O(n log n)).
+    """
+    tails: List[int] = []       # mindste slutværdi for en delsekvens af længde i+1
+    tail_index: List[int] = []  # hvor i old_positions den slutværdi står
+    previous = [-1] * len(old_positions)
+    for i, position in enumerate(old_positions):
+        length = bisect_left(tails, position)
+        if length == len(tails):
+            tails.append(position)
+            tail_index.append(i)
+        else:
+            tails[length] = position
+            tail_index[length] = i
+        previous[i] = tail_index[length - 1] if length else -1
+
+    stable = set()
+    i = tail_index[-1] if tail_index else -1
+    while i >= 0:
+        stable.add(i)
+        i = previous[i]
+    return stable
+
+
+def compute_delta(old_articles: List[Dict[str, Any]], new_articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Beregner deltaen fra `old_articles` til `new_articles` (begge i listeindeksets rækkefølge)"""
+    old_by_id = {article['article_id']: (position, article) for position, article in enumerate(old_articles)}
+    new_ids = {article['article_id'] for article in new_articles}
+
+    common = [(position, article) for position, article in enumerate(new_articles)
+              if article['article_id'] in old_by_id]
+    stable = _stable_ids([old_by_id[article['article_id']][0] for _, article in common])
+
+    removed = [article['article_id'] for article in old_articles if article['article_id'] not in new_ids]
+    changed = []
+    moved = set()
+    for i, (position, article) in enumerate(common):
+        if i not in stable:
+            moved.add(position)
+            removed.append(article['article_id'])
+        elif old_by_id[article['article_id']][1] != article:
+            changed.append(article)
+
+    added = [{'position': position, 'article': article} for position, article in enumerate(new_articles)
+             if article['article_id'] not in old_by_id or position in moved]
+    return {'removed': removed, 'changed': changed, 'added': added}
+
+
+def apply_delta(articles: List[Dict[str, Any]], delta: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Anvender en delta på en artikelliste og returnerer den nye liste"""
+    removed = set(delta['removed'])
+    changed = {article['article_id']: article for article in delta['changed']}
+    result = [changed.get(article['article_id'], article) for article in articles
+              if article['article_id'] not in removed]
+    for entry in delta['added']:
+        result.insert(entry['position'], entry['article'])
+    return result
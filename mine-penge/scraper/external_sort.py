@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge External Sort
+Byggeklodser til build med begrænset hukommelse, når arkivet ikke kan ligge i RAM på én gang.
+
+- iter_json_array: læser artiklerne fra en stor JSON-fil én ad gangen (raw_decode over bidder)
+- read_trailing_metadata: listeindeksets metadata fra filens slutning uden at læse artiklerne
+- DiskKeySet: en mængde af nøgler i SQLite til deduplikering
+- ExternalSorter: sortering med spill-filer og k-vejs fletning (stabil, som sorted())
+- SpillingPostings: posting lists der skrives til sorterede spill-filer og flettes pr. term
+
+Spill-filer er JSON lines i en midlertidig mappe, som kalderen ejer og rydder op.
+"""
+
+import os
+import json
+import heapq
+import sqlite3
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+CHUNK_SIZE = 1024 * 1024
+METADATA_TAIL_BYTES = 1024 * 1024
+MERGE_FAN_IN = 64     # maks. antal spill-filer der flettes på én gang
+ITEM_OVERHEAD = 120   # anslået Python-overhead pr. element i hukommelsen (bytes)
+_WHITESPACE = ' \t\r\n'
+_DELIMITERS = _WHITESPACE + ',:]}'
+
+
+class _JsonStream:
+    """Tegnbuffer over en fil, hvor værdier afkodes med raw_decode og bufferen fyldes efter behov"""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Smid det forbrugte stykke, så bufferen ikke vokser med filen
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Næste tegn der ikke er whitespace ('' ved filslut)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Forventede '{char}' ved position {self.pos}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # Et tal kan være skåret over ved bufferens ende ("1." af "1.5"), så værdien
+                # skal efterfølges af en skilletegn før den accepteres
+                if self.eof or (end < len(self.buffer) and self.buffer[end] in _DELIMITERS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def iter_json_array(path: str, keys: Tuple[str, ...] = ('articles', 'data'),
+                    chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Gennemløber elementerne i en JSON-liste uden at indlæse hele filen. Filen kan være
+    selve listen eller et objekt, hvor listen ligger under en af `keys`.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f, chunk_size)
+        start = stream.peek()
+        if start == '{':
+            stream.expect('{')
+            while stream.peek() != '}':
+                key = stream.value()
+                stream.expect(':')
+                if key in keys and stream.peek() == '[':
+                    break
+                stream.value()  # spring værdien over (fx metadata)
+                if stream.peek() == ',':
+                    stream.expect(',')
+            else:
+                return
+        elif start != '[':
+            return
+
+        stream.expect('[')
+        if stream.peek() == ']':
+            return
+        while True:
+            yield stream.value()
+            if stream.peek() == ',':
+                stream.expect(',')
+            else:
+                stream.expect(']')
+                return
+
+
+def read_trailing_metadata(path: str, tail_bytes: int = METADATA_TAIL_BYTES) -> Optional[Dict[str, Any]]:
+    """
+    `metadata` fra en fil skrevet som {"articles":[...],"metadata":{...}}: den står sidst,
+    så den kan læses fra slutningen af filen. None hvis filen mangler eller ikke har den form.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - tail_bytes))
+        tail = f.read().decode('utf-8', errors='ignore')
+    start = tail.rfind('],"metadata":')
+    if start < 0:
+        return None
+    try:
+        return json.loads(tail[start + len('],"metadata":'):-1])
+    except ValueError:
+        return None
+
+
+def scratch_database(path: str) -> sqlite3.Connection:
+    """SQLite-fil til midlertidige data: ingen journal eller fsync, da filen smides væk bagefter"""
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode=OFF')
+    connection.execute('PRAGMA synchronous=OFF')
+    connection.execute('PRAGMA temp_store=FILE')
+    return connection
+
+
+class DiskKeySet:
+    """Mængde af strenge i en SQLite-tabel, så deduplikering ikke kræver alle nøgler i RAM"""
+
+    def __init__(self, connection: sqlite3.Connection, table: str):
+        self.connection = connection
+        self.table = table
+        connection.execute(f'CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY) WITHOUT ROWID')
+
+    def add(self, key: str) -> bool:
+        """Tilføjer nøglen; returnerer True hvis den ikke var der i forvejen"""
+        cursor = self.connection.execute(f'INSERT OR IGNORE INTO {self.table} (key) VALUES (?)', (key,))
+        return cursor.rowcount == 1
+
+    def __contains__(self, key: str) -> bool:
+        return self.connection.execute(f'SELECT 1 FROM {self.table} WHERE key = ?', (key,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.connection.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+    def clear(self):
+        self.connection.execute(f'DELETE FROM {self.table}')
+
+
+def _read_lines(path: str) -> Iterator[Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _write_lines(path: str, items: Iterable[Any]):
+    with open(path, 'w', encoding='utf-8') as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False, separators=(',', ':')))
+            f.write('\n')
+
+
+def _merge_spills(paths: List[str], key: Callable[[Any], Any], directory: str, name: str) -> Iterator[Any]:
+    """
+    K-vejs fletning af sorterede spill-filer, som slettes bagefter. heapq.merge afgør lige
+    nøgler efter inputrækkefølgen, så fletningen er stabil. Er der flere end MERGE_FAN_IN
+    filer, flettes nabogrupper først, så antallet af åbne filer er begrænset.
+    """
+    level = 0
+    while len(paths) > MERGE_FAN_IN:
+        merged = []
+        for start in range(0, len(paths), MERGE_FAN_IN):
+            group = paths[start:start + MERGE_FAN_IN]
+            path = os.path.join(directory, f'{name}-merge{level}-{len(merged):05d}.jsonl')
+            _write_lines(path, heapq.merge(*(_read_lines(spilled) for spilled in group), key=key))
+            for spilled in group:
+                os.remove(spilled)
+            merged.append(path)
+        paths = merged
+        level += 1
+    yield from heapq.merge(*(_read_lines(path) for path in paths), key=key)
+    for path in paths:
+        os.remove(path)
+
+
+class ExternalSorter:
+    """
+    Sorterer flere elementer end der er plads til i hukommelsen. Elementerne serialiseres som
+    JSON ved indsættelse og kommer ud efter en tur gennem JSON (tupler bliver til lister), så
+    `key` skal give samme rækkefølge for begge former. Når bufferen overstiger `memory_limit`
+    bytes, sorteres den og skrives som spill-fil. Sorteringen er stabil som sorted().
+    """
+
+    def __init__(self, directory: str, memory_limit: int, key: Callable[[Any], Any] = None, name: str = 'sort'):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.key = key or (lambda item: item)
+        self.name = name
+        self.buffer: List[Tuple[Any, str]] = []  # (nøgle, JSON-linje)
+        self.buffer_bytes = 0
+        self.spills: List[str] = []
+        self.count = 0
+
+    def add(self, item: Any):
+        line = json.dumps(item, ensure_ascii=False, separators=(',', ':'))
+        self.buffer.append((self.key(item), line))
+        self.buffer_bytes += len(line) + ITEM_OVERHEAD
+        self.count += 1
+        if self.buffer_bytes >= self.memory_limit:
+            self._spill()
+
+    def _spill(self):
+        if not self.buffer:
+            return
+        path = os.path.join(self.directory, f'{self.name}-{len(self.spills):05d}.jsonl')
+        self.buffer.sort(key=itemgetter(0))
+        with open(path, 'w', encoding='utf-8') as f:
+            for _, line in self.buffer:
+                f.write(line)
+                f.write('\n')
+        self.spills.append(path)
+        self.buffer = []
+        self.buffer_bytes = 0
+
+    def sorted(self) -> Iterator[Any]:
+        """Gennemløber alle elementer i sorteret rækkefølge (kan kun kaldes én gang)"""
+        if not self.spills:
+            self.buffer.sort(key=itemgetter(0))
+            lines, self.buffer = self.buffer, []
+            for _, line in lines:
+                yield json.loads(line)
+            return
+        self._spill()
+        spills, self.spills = self.spills, []
+        yield from _merge_spills(spills, self.key, self.directory, self.name)
+
+
+class SpillingPostings:
+    """
+    Posting lists (term -> stigende positioner) bygget i hukommelsen og skrevet til en sorteret
+    spill-fil, når de fylder mere end `memory_limit`. Da positionerne tilføjes i stigende
+    rækkefølge, giver fletningen af spill-filerne i oprettelsesrækkefølge sorterede lister.
+    """
+
+    def __init__(self, directory: str, memory_limit: int, name: str = 'postings'):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.name = name
+        self.postings: Dict[str, List[int]] = {}
+        self.buffer_bytes = 0
+        self.spills: List[str] = []
+
+    def add(self, position: int, terms: Iterable[str]):
+        postings = self.postings
+        for term in terms:
+            positions = postings.get(term)
+            if positions is None:
+                postings[term] = [position]
+                self.buffer_bytes += len(term) + ITEM_OVERHEAD
+            else:
+                positions.append(position)
+                self.buffer_bytes += 36  # listeplads plus int-objekt
+        if self.buffer_bytes >= self.memory_limit:
+            self._spill()
+
+    def _spill(self):
+        if not self.postings:
+            return
+        path = os.path.join(self.directory, f'{self.name}-{len(self.spills):05d}.jsonl')
+        _write_lines(path, ([term, self.postings[term]] for term in sorted(self.postings)))
+        self.spills.append(path)
+        self.postings = {}
+        self.buffer_bytes = 0
+
+    def items(self) -> Iterator[Tuple[str, Iterator[int]]]:
+        """(term, positioner) i termrækkefølge; positionerne skal forbruges før næste term"""
+        if not self.spills:
+            postings, self.postings = self.postings, {}
+            for term in sorted(postings):
+                yield term, iter(postings[term])
+            return
+        self._spill()
+        spills, self.spills = self.spills, []
+        merged = _merge_spills(spills, itemgetter(0), self.directory, self.name)
+        for term, entries in groupby(merged, key=itemgetter(0)):
+            yield term, (position for entry in entries for position in entry[1])
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Facets
+Forudberegnede facet-tællinger og filter-bitsets, som build_articles.py skriver til frontend.
+
+For hver facet-værdi (kilde, tag-kategori, målgruppe, kompleksitet) gemmes artikelpositionerne
+i listeindekset - som bitset når værdien er tæt, ellers som delta-kodet ID-liste, alt efter
+hvad der fylder mindst. Enhver kombination af filtre bliver dermed en AND af bitsets.
+Frontendens udgave ligger i src/services/facetIndex.js.
+"""
+
+import base64
+from typing import Dict, List, Iterable, Any, Optional
+
+from int_codec import encode_sorted, decode_sorted
+
+FACET_INDEX_VERSION = 1
+
+# Facetnavn -> artikelfelt (streng eller liste af strenge)
+FACET_FIELDS = {
+    'source': 'source',
+    'category': 'tag_categories',
+    'audience': 'target_audiences',
+    'complexity': 'complexity_level'
+}
+
+
+def popcount(mask: int) -> int:
+    """Antal sat bits i et bitset (int.bit_count findes først i Python 3.10)"""
+    return bin(mask).count('1')
+
+
+def _values(article: Dict[str, Any], field: str) -> List[str]:
+    value = article.get(field)
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else list(dict.fromkeys(value))
+
+
+def _encode_bitmap(bitmap: bytearray, count: int, doc_count: int) -> Dict[str, Any]:
+    """Vælger den mindste repræsentation: bitset eller delta/varint ID-liste"""
+    bitmap.extend(bytes((doc_count + 7) // 8 - len(bitmap)))
+    # Hvert ID fylder mindst 4/3 base64-tegn, så tætte værdier kan afgøres uden at kode listen
+    if count * 4 / 3 * 8 <= doc_count:
+        ids = encode_sorted(FacetIndex.positions(int.from_bytes(bitmap, 'little')))
+        if len(ids) * 8 <= doc_count:
+            return {'count': count, 'ids': ids}
+    return {'count': count, 'bits': base64.b64encode(bytes(bitmap)).decode('ascii')}
+
+
+class FacetBuilder:
+    """
+    Bygger facetindekset én artikel ad gangen. Hver facet-værdi holdes som et bitmap
+    (doc_count / 8 bytes), så hukommelsen ikke afhænger af hvor mange artikler der matcher.
+    """
+
+    def __init__(self):
+        self.bitmaps: Dict[str, Dict[str, bytearray]] = {facet: {} for facet in FACET_FIELDS}
+        self.counts: Dict[str, Dict[str, int]] = {facet: {} for facet in FACET_FIELDS}
+        self.doc_count = 0
+
+    def add(self, position: int, article: Dict[str, Any]):
+        """Tilføjer artiklen på `position` (positionerne skal komme i stigende rækkefølge)"""
+        self.doc_count = position + 1
+        byte, bit = position >> 3, 1 << (position & 7)
+        for facet, field in FACET_FIELDS.items():
+            for value in _values(article, field):
+                bitmap = self.bitmaps[facet].get(value)
+                if bitmap is None:
+                    bitmap = self.bitmaps[facet][value] = bytearray()
+                    self.counts[facet][value] = 0
+                if len(bitmap) <= byte:
+                    bitmap.extend(bytes(byte + 1 - len(bitmap)))
+                bitmap[byte] |= bit
+                self.counts[facet][value] += 1
+
+    def build(self) -> Dict[str, Any]:
+        """Værdierne i hver facet er sorteret efter antal (flest først)"""
+        facets = {}
+        for facet, values in self.bitmaps.items():
+            counts = self.counts[facet]
+            ordered = sorted(values, key=lambda value: (-counts[value], value))
+            facets[facet] = {value: _encode_bitmap(values[value], counts[value], self.doc_count)
+                             for value in ordered}
+        return {
+            'version': FACET_INDEX_VERSION,
+            'docCount': self.doc_count,
+            'facets': facets
+        }
+
+
+def build_facets(articles: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Bygger facetindekset. Positionerne svarer til artiklernes rækkefølge i listeindekset.
+    Værdierne i hver facet er sorteret efter antal (flest først).
+    """
+    builder = FacetBuilder()
+    for position, article in enumerate(articles):
+        builder.add(position, article)
+    return builder.build()
+
+
+def _decode_mask(entry: Dict[str, Any]) -> int:
+    """Dekoder en facet-værdi til et Python int-bitset (bit p = artikel p)"""
+    if 'bits' in entry:
+        return int.from_bytes(base64.b64decode(entry['bits']), 'little')
+    positions = decode_sorted(entry['ids'])
+    if not positions:
+        return 0
+    bitmap = bytearray(positions[-1] // 8 + 1)
+    for position in positions:
+        bitmap[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bitmap, 'little')
+
+
+# Bitpositioner for hver byte-værdi, så positioner kan udtrækkes byte for byte
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+class FacetIndex:
+    """Filtrering og facet-tællinger over et bygget facetindeks"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.doc_count: int = data['docCount']
+        self.all_mask = (1 << self.doc_count) - 1
+        self.masks: Dict[str, Dict[str, int]] = {
+            facet: {value: _decode_mask(entry) for value, entry in values.items()}
+            for facet, values in data['facets'].items()
+        }
+
+    def filter_mask(self, filters: Dict[str, Iterable[str]], exclude: Optional[str] = None) -> int:
+        """
+        AND på tværs af facetter, OR mellem valgte værdier i samme facet.
+        `exclude` udelader én facet (bruges til tællinger for den facet).
+        """
+        mask = self.all_mask
+        for facet, selected in filters.items():
+            if facet == exclude or not selected:
+                continue
+            if isinstance(selected, str):
+                selected = [selected]
+            values = self.masks.get(facet, {})
+            facet_mask = 0
+            for value in selected:
+                facet_mask |= values.get(value, 0)
+            mask &= facet_mask
+            if not mask:
+                break
+        return mask
+
+    def counts(self, filters: Dict[str, Iterable[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Antal artikler pr. facet-værdi givet de øvrige facetters filtre"""
+        filters = filters or {}
+        result = {}
+        for facet, values in self.masks.items():
+            mask = self.filter_mask(filters, exclude=facet)
+            result[facet] = {value: popcount(mask & value_mask) for value, value_mask in values.items()}
+        return result
+
+    @staticmethod
+    def positions(mask: int, limit: Optional[int] = None) -> List[int]:
+        """Returnerer sorterede artikelpositioner for et bitset (evt. kun de første `limit`)"""
+        result = []
+        raw = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+        for offset, byte in enumerate(raw):
+            if byte:
+                base = offset << 3
+                result.extend(base + bit for bit in _BYTE_BITS[byte])
+                if limit is not None and len(result) >= limit:
+                    return result[:limit]
+        return result
+
+    def filter(self, filters: Dict[str, Iterable[str]], limit: Optional[int] = None) -> List[int]:
+        """Artikelpositioner der matcher alle filtre"""
+        return self.positions(self.filter_mask(filters), limit)
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Full-Text Index
+Positionelt inverted index over titel, tags, resume og brødtekst med BM25-rangering til
+API'ets søgning (/api/articles/search). build_articles.py bygger det i data/index/.
+
+Termerne normaliseres som søgeindekset (search_index.tokenize: dansk stemming og foldning af
+æ/ø/å). Felterne vægtes i term-frekvensen (BM25F-agtigt), og hver (term, artikel)-score
+beregnes allerede i buildet og gemmes kvantiseret som "impact", så en forespørgsel kun lægger
+tal sammen. Postings for hver term ligger tre gange: artikler stigende (til binær søgning),
+impact pr. artikel og rækkefølgen efter impact (højest først), så top-k kan findes med tidlig
+afbrydelse i stedet for at score alle træffere. Antallet af træffere tælles med bitsets som i
+facets.py.
+
+Forespørgsler: alle led skal matche; `"to ord"` er en frase (ordene lige efter hinanden i
+samme felt) og `invest*` et præfiks.
+
+Filformat: fulltext.json (termer, offsets, parametre) og fulltext.bin med pr. term
+docs (uint32), impacts (uint16), impact-orden (uint32), positions-offsets (uint32, df+1)
+og positioner som delta/varint-bytes, for hyppige termer også et bitmap over artiklerne.
+Felterne nummereres fortløbende med et hul imellem.
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import math
+import mmap
+import heapq
+import logging
+from array import array
+from itertools import accumulate
+from bisect import bisect_left
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from facets import FacetIndex, popcount
+from search_index import tokenize, normalize_prefix
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'index')
+FULLTEXT_VERSION = 1
+
+# Felt -> vægt i term-frekvensen og dokumentlængden
+FIELDS = (('title', 3.0), ('tags', 2.0), ('summary', 1.5), ('body', 1.0))
+BM25_K1 = 1.2
+BM25_B = 0.75
+IMPACT_SCALE = 1000  # impacts gemmes som uint16 i tusindedele
+MAX_PREFIX_TERMS = 64
+PHRASE_VERIFY_LIMIT = 2000  # højst så mange frasekandidater tjekkes mod positionerne pr. søgning
+DENSE_FRACTION = 32  # termer i mindst hver 32. artikel får også et bitmap i filen (højst så stort som docs)
+
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def article_fields(article: Dict[str, Any], body: str = '') -> List[str]:
+    """Teksten for hvert felt i FIELDS-rækkefølge"""
+    return [article.get('title') or '', ' '.join(article.get('minepenge_tags') or []),
+            article.get('summary') or '', body]
+
+
+def _varints(values: List[int]) -> bytes:
+    if max(values) < 0x80:
+        return bytes(values)
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def _bitmap(docs: Iterable[int], size: int) -> bytearray:
+    bits = bytearray(size)
+    for doc in docs:
+        bits[doc >> 3] |= 1 << (doc & 7)
+    return bits
+
+
+def _decode_positions(raw: bytes) -> List[int]:
+    if raw.isascii():
+        # Alle deltaer fylder én byte
+        return list(accumulate(raw))
+    positions = []
+    value = shift = previous = 0
+    for byte in raw:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            previous += value
+            positions.append(previous)
+            value = shift = 0
+    return positions
+
+
+def analyze(fields: List[str]) -> Tuple[float, Dict[str, List[float]]]:
+    """
+    Den vægtede længde og pr. term [tf, positioner...] for én artikels felter. Resultatet
+    afhænger ikke af artiklens plads i listen, så buildet kan cache det pr. kilde.
+    """
+    terms: Dict[str, List[float]] = {}
+    length = 0.0
+    offset = 0
+    for (_, weight), text in zip(FIELDS, fields):
+        tokens = tokenize(text)
+        length += weight * len(tokens)
+        for term in tokens:
+            entry = terms.get(term)
+            if entry is None:
+                terms[term] = [weight, offset]
+            else:
+                entry[0] += weight
+                entry.append(offset)
+            offset += 1
+        # Et hul mellem felterne, så en frase aldrig matcher hen over to felter
+        offset += 1
+    return length, terms
+
+
+class _Postings:
+    __slots__ = ('docs', 'tfs', 'offsets', 'positions')
+
+    def __init__(self):
+        self.docs = array('I')
+        self.tfs = array('f')
+        self.offsets = array('I', [0])
+        self.positions = bytearray()
+
+
+class FullTextBuilder:
+    """Bygger indekset én artikel ad gangen; positionerne skal komme i stigende rækkefølge"""
+
+    def __init__(self):
+        self.postings: Dict[str, _Postings] = {}
+        self.lengths = array('f')
+
+    def add(self, position: int, fields: List[str]):
+        self.add_analyzed(position, *analyze(fields))
+
+    def add_analyzed(self, position: int, length: float, terms: Dict[str, List[float]]):
+        """Tilføjer en artikel ud fra `analyze`, fx cachet af buildet"""
+        while len(self.lengths) < position:
+            self.lengths.append(0.0)
+        self.lengths.append(length)
+
+        postings = self.postings
+        for term, occurrences in terms.items():
+            entry = postings.get(term)
+            if entry is None:
+                entry = postings[term] = _Postings()
+            entry.docs.append(position)
+            entry.tfs.append(occurrences[0])
+            if len(occurrences) == 2 and occurrences[1] < 0x80:
+                entry.positions.append(occurrences[1])
+            else:
+                entry.positions += _varints([occurrences[1]] + [b - a for a, b in zip(occurrences[1:], occurrences[2:])])
+            entry.offsets.append(len(entry.positions))
+
+    def _write_postings(self, f, list_version: int, list_hash: Optional[str]) -> Dict[str, Any]:
+        """Beregner impacts, skriver postings til `f` og returnerer metadata med termtabellen"""
+        doc_count = len(self.lengths)
+        average = (sum(self.lengths) / doc_count) if doc_count else 1.0
+        # Længdenormaliseringen pr. artikel er fælles for alle termer
+        norms = [BM25_K1 * (1 - BM25_B + BM25_B * length / (average or 1.0)) for length in self.lengths]
+
+        terms = sorted(self.postings)
+        table = []
+        offset = 0
+        bitmap_size = (doc_count + 7) // 8
+        for term in terms:
+            entry = self.postings[term]
+            df = len(entry.docs)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            scale = idf * (BM25_K1 + 1) * IMPACT_SCALE
+            impacts = array('H', (min(65535, max(1, round(scale * tf / (tf + norms[doc]))))
+                                  for doc, tf in zip(entry.docs, entry.tfs)))
+            order = array('I', sorted(range(df), key=impacts.__getitem__, reverse=True))
+            for part in (entry.docs, impacts, order, entry.offsets):
+                f.write(part.tobytes())
+            f.write(entry.positions)
+            bitmap = _bitmap(entry.docs, bitmap_size) if df * DENSE_FRACTION >= doc_count else b''
+            f.write(bitmap)
+            table.append([offset, df, len(entry.positions), len(bitmap)])
+            offset += 14 * df + 4 + len(entry.positions) + len(bitmap)
+        return {
+            'version': FULLTEXT_VERSION,
+            'listVersion': list_version,
+            'listHash': list_hash,
+            'docCount': doc_count,
+            'byteorder': sys.byteorder,
+            'fields': [name for name, _ in FIELDS],
+            'terms': terms,
+            'table': table
+        }
+
+    def write(self, directory: str, list_version: int, list_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Skriver fulltext.bin og fulltext.json til `directory` og returnerer størrelserne"""
+        os.makedirs(directory, exist_ok=True)
+        bin_path = os.path.join(directory, 'fulltext.bin')
+        meta_path = os.path.join(directory, 'fulltext.json')
+        with open(bin_path + '.tmp', 'wb') as f:
+            meta = self._write_postings(f, list_version, list_hash)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(json.dumps(meta, ensure_ascii=False, separators=(',', ':')))
+        # Metadata sidst, så en læser aldrig ser en ny termtabel med gamle postings
+        os.replace(bin_path + '.tmp', bin_path)
+        os.replace(meta_path + '.tmp', meta_path)
+        return {'terms': len(meta['terms']), 'bytes': os.path.getsize(bin_path) + os.path.getsize(meta_path)}
+
+    def build(self, list_version: Optional[int] = None, list_hash: Optional[str] = None) -> 'FullTextIndex':
+        """Indekset direkte i hukommelsen uden at skrive filer"""
+        buffer = io.BytesIO()
+        meta = self._write_postings(buffer, list_version, list_hash)
+        return FullTextIndex(meta, buffer.getvalue())
+
+
+class _Term:
+    """Postings for én term, kopieret ud af indeksets buffer ved opslag"""
+    __slots__ = ('df', 'docs', 'impacts', 'order', 'offsets', 'positions', 'max_impact', '_bitmap', '_bitmap_size')
+
+    def __init__(self, buffer, offset: int, df: int, positions_length: int, bitmap_length: int,
+                 swap: bool, bitmap_size: int):
+        self.df = df
+        self.docs = array('I', buffer[offset:offset + 4 * df])
+        offset += 4 * df
+        self.impacts = array('H', buffer[offset:offset + 2 * df])
+        offset += 2 * df
+        self.order = array('I', buffer[offset:offset + 4 * df])
+        offset += 4 * df
+        self.offsets = array('I', buffer[offset:offset + 4 * (df + 1)])
+        offset += 4 * (df + 1)
+        if swap:
+            for part in (self.docs, self.impacts, self.order, self.offsets):
+                part.byteswap()
+        self.positions = buffer[offset:offset + positions_length]
+        offset += positions_length
+        self._bitmap = buffer[offset:offset + bitmap_length] if bitmap_length else None
+        self._bitmap_size = bitmap_size
+        self.max_impact = self.impacts[self.order[0]] if df else 0
+
+    def mask(self) -> int:
+        """Artiklerne som bitset"""
+        return int.from_bytes(self._bitmap or _bitmap(self.docs, self._bitmap_size), 'little')
+
+    def impact(self, doc: int) -> Optional[int]:
+        i = bisect_left(self.docs, doc)
+        if i < self.df and self.docs[i] == doc:
+            return self.impacts[i]
+        return None
+
+    def doc_positions(self, doc: int) -> List[int]:
+        i = bisect_left(self.docs, doc)
+        return _decode_positions(self.positions[self.offsets[i]:self.offsets[i + 1]])
+
+    def ranked(self) -> Iterable[Tuple[int, int]]:
+        return ((self.docs[i], self.impacts[i]) for i in self.order)
+
+
+class _Clause:
+    """Ét led i forespørgslen: en term, et præfiks (OR af termer) eller en frase (AND med positioner)"""
+
+    def __init__(self, kind: str, terms: List[_Term]):
+        self.kind = kind
+        self.terms = terms
+        if kind == 'prefix':
+            # En artikel med flere af præfiksets termer får den bedste af dem
+            self.max_impact = max(term.max_impact for term in terms)
+            self.df = sum(term.df for term in terms)
+        else:
+            self.max_impact = sum(term.max_impact for term in terms)
+            self.df = min(term.df for term in terms)
+
+    def mask(self) -> int:
+        result = self.terms[0].mask()
+        for term in self.terms[1:]:
+            if self.kind == 'prefix':
+                result |= term.mask()
+            else:
+                result &= term.mask()
+        return result
+
+    def count(self) -> int:
+        return self.terms[0].df if self.kind == 'term' else popcount(self.mask())
+
+    def score(self, doc: int) -> int:
+        """Leddets score for en artikel der matcher det"""
+        impacts = [term.impact(doc) for term in self.terms]
+        if self.kind == 'prefix':
+            return max(impact for impact in impacts if impact is not None)
+        return sum(impacts)
+
+    def ranked(self) -> Iterable[Tuple[int, int]]:
+        """(artikel, øvre grænse for leddets score) med faldende grænse"""
+        if self.kind == 'prefix':
+            # Termernes impact-ordener flettes dovent; første forekomst er artiklens bedste
+            seen = set()
+            merged = heapq.merge(*(((-impact, doc) for doc, impact in term.ranked()) for term in self.terms))
+            for negated, doc in merged:
+                if doc not in seen:
+                    seen.add(doc)
+                    yield doc, -negated
+            return
+        # Driv fra frasens sjældneste term; resten bidrager højst deres maksimum
+        driver = min(self.terms, key=lambda term: term.df)
+        rest = self.max_impact - driver.max_impact
+        for doc, impact in driver.ranked():
+            yield doc, impact + rest
+
+    def phrase_match(self, doc: int) -> bool:
+        if self.kind != 'phrase':
+            return True
+        # Stopord tæller ikke med i positionerne, så "penge i banken" matcher "penge banken"
+        starts = set(self.terms[0].doc_positions(doc))
+        for i, term in enumerate(self.terms[1:], 1):
+            starts.intersection_update([position - i for position in term.doc_positions(doc)])
+            if not starts:
+                return False
+        return True
+
+
+def parse_query(query: str) -> List[Tuple[str, List[str]]]:
+    """Forespørgslen som led: ('term', [t]), ('prefix', [p]) eller ('phrase', [t1, t2, ...])"""
+    clauses = []
+    for phrase, word in _QUERY_RE.findall(query):
+        if phrase:
+            terms = tokenize(phrase)
+            if terms:
+                clauses.append(('phrase' if len(terms) > 1 else 'term', terms))
+        elif word.endswith('*') and len(word) > 1:
+            tokens = re.findall(r'\w+', word.lower())
+            if tokens:
+                # Præfikset foldes men stemmes ikke: "invest*" skal ramme "investering"
+                clauses.extend(('term', [term]) for term in tokenize(' '.join(tokens[:-1])))
+                clauses.append(('prefix', [normalize_prefix(tokens[-1])]))
+        else:
+            clauses.extend(('term', [term]) for term in tokenize(word))
+    return clauses
+
+
+class FullTextIndex:
+    """Søgning i et bygget indeks; kun postings for de termer der søges på læses fra bufferen"""
+
+    def __init__(self, meta: Dict[str, Any], buffer):
+        if meta.get('version') != FULLTEXT_VERSION:
+            raise ValueError(f"Fuldtekstindekset har version {meta.get('version')}, forventede {FULLTEXT_VERSION}")
+        self.list_version = meta.get('listVersion')
+        self.list_hash = meta.get('listHash')
+        self.doc_count: int = meta['docCount']
+        self.terms: List[str] = meta['terms']
+        self.table: List[List[int]] = meta['table']
+        self._ids = {term: i for i, term in enumerate(self.terms)}
+        self._swap = meta.get('byteorder', sys.byteorder) != sys.byteorder
+        self._bitmap_size = (self.doc_count + 7) // 8
+        self._buffer = buffer
+        self.size = len(buffer)
+
+    @classmethod
+    def load(cls, directory: str = INDEX_DIR) -> Optional['FullTextIndex']:
+        """Indekset fra `directory` (fulltext.bin memory-mappes), eller None hvis det ikke er bygget"""
+        meta_path = os.path.join(directory, 'fulltext.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(directory, 'fulltext.bin'), 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+        return cls(meta, buffer)
+
+    def _read(self, i: int) -> _Term:
+        return _Term(self._buffer, *self.table[i], self._swap, self._bitmap_size)
+
+    def _prefix_terms(self, prefix: str) -> Tuple[List[_Term], bool]:
+        i = bisect_left(self.terms, prefix)
+        candidates = []
+        while i < len(self.terms) and self.terms[i].startswith(prefix):
+            candidates.append(i)
+            i += 1
+        # Ved meget korte præfikser bruges kun de hyppigste termer
+        candidates.sort(key=lambda j: -self.table[j][1])
+        return [self._read(j) for j in candidates[:MAX_PREFIX_TERMS]], len(candidates) > MAX_PREFIX_TERMS
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, allowed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Top `offset + limit` træffere rangeret efter BM25 (summen af leddenes impacts).
+        `allowed` begrænser til et bitset af listepositioner (fx FacetIndex.filter_mask).
+        Returnerer {'hits': [(position, score)], 'total': antal, 'exact': om antallet er præcist}.
+        """
+        clauses = []
+        exact = True
+        for kind, words in parse_query(query):
+            if kind == 'prefix':
+                terms, truncated = self._prefix_terms(words[0])
+                exact = exact and not truncated
+            else:
+                ids = [self._ids.get(word) for word in words]
+                terms = [self._read(i) for i in ids] if None not in ids else []
+            if not terms:
+                return {'hits': [], 'total': 0, 'exact': True}
+            clauses.append(_Clause(kind, terms))
+        if not clauses:
+            return {'hits': [], 'total': 0, 'exact': True}
+
+        phrases = [clause for clause in clauses if clause.kind == 'phrase']
+        verified = True
+        bits = None
+        if len(clauses) == 1 and not phrases and allowed is None:
+            # Alle artikler i leddet matcher; antallet kendes uden bitset
+            total = clauses[0].count()
+        else:
+            matches = clauses[0].mask()
+            for clause in clauses[1:]:
+                matches &= clause.mask()
+            if allowed is not None:
+                matches &= allowed
+            total = popcount(matches)
+            if phrases and total <= PHRASE_VERIFY_LIMIT:
+                docs = [doc for doc in FacetIndex.positions(matches)
+                        if all(clause.phrase_match(doc) for clause in phrases)]
+                matches = int.from_bytes(_bitmap(docs, self._bitmap_size), 'little')
+                total = len(docs)
+            elif phrases:
+                verified = False
+            bits = matches.to_bytes(self._bitmap_size, 'little')
+
+        wanted = offset + limit
+        heap: List[Tuple[int, int]] = []
+        if total:
+            # Tidlig afbrydelse: gennemløb det sjældneste led i faldende impact; når dets grænse plus de
+            # øvrige leds maksimum ikke kan slå den k'te bedste, kan ingen senere artikel heller
+            driver = min(clauses, key=lambda clause: clause.df)
+            others = [clause for clause in clauses if clause is not driver]
+            others_max = sum(clause.max_impact for clause in others)
+            budget = PHRASE_VERIFY_LIMIT
+            for doc, bound in driver.ranked():
+                if len(heap) >= wanted and bound + others_max <= heap[0][0]:
+                    break
+                if bits is not None and not bits[doc >> 3] >> (doc & 7) & 1:
+                    continue
+                if not verified:
+                    # For mange kandidater til at tælle fraserne præcist; de bedste tjekkes indtil budgettet er brugt
+                    budget -= 1
+                    if budget < 0:
+                        break
+                    if not all(clause.phrase_match(doc) for clause in phrases):
+                        continue
+                score = driver.score(doc) + sum(clause.score(doc) for clause in others)
+                # Lige scorer blandt de fundne ordnes efter listeposition (nyeste først)
+                entry = (score, -doc)
+                if len(heap) < wanted:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+        ranked = sorted(heap, reverse=True)[offset:]
+        return {'hits': [(-doc, score / IMPACT_SCALE) for score, doc in ranked],
+                'total': total, 'exact': exact and verified}
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Integer Codec
+Kompakt kodning af sorterede heltalslister (posting lists, permutationer) til build-artefakter.
+
+Lister kodes som varints (7 bit pr. byte, høj bit = fortsættelse) og base64, så de kan
+ligge i JSON. Sorterede lister delta-kodes først, så små huller giver én byte pr. tal.
+Usorterede lister (permutationer) delta-kodes med fortegn via zigzag, så både stigende og
+faldende løb koster én byte pr. tal. Koderne tager generatorer, så lister ikke skal i RAM.
+Frontendens dekoder ligger i src/services/intCodec.js.
+"""
+
+import base64
+from typing import Iterable, Iterator, List
+
+
+def encode_varints(values: Iterable[int]) -> str:
+    """Koder ikke-negative heltal som base64-varints"""
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return base64.b64encode(bytes(out)).decode('ascii')
+
+
+def decode_varints(encoded: str) -> List[int]:
+    """Dekoder base64-varints til en liste af heltal"""
+    values = []
+    value = 0
+    shift = 0
+    for byte in base64.b64decode(encoded):
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = 0
+            shift = 0
+    return values
+
+
+def encode_sorted(values: Iterable[int]) -> str:
+    """Delta- og varint-koder en stigende liste af heltal"""
+    return encode_varints(_sorted_deltas(values))
+
+
+def _sorted_deltas(values: Iterable[int]) -> Iterator[int]:
+    previous = 0
+    for value in values:
+        yield value - previous
+        previous = value
+
+
+def decode_sorted(encoded: str) -> List[int]:
+    """Modsat `encode_sorted`"""
+    total = 0
+    values = []
+    for delta in decode_varints(encoded):
+        total += delta
+        values.append(total)
+    return values
+
+
+def encode_deltas(values: Iterable[int]) -> str:
+    """Zigzag-delta- og varint-koder en vilkårlig liste af ikke-negative heltal"""
+    return encode_varints(_zigzag_deltas(values))
+
+
+def _zigzag_deltas(values: Iterable[int]) -> Iterator[int]:
+    previous = 0
+    for value in values:
+        delta = value - previous
+        yield delta * 2 if delta >= 0 else -delta * 2 - 1
+        previous = value
+
+
+def decode_deltas(encoded: str) -> List[int]:
+    """Modsat `encode_deltas`"""
+    total = 0
+    values = []
+    for zigzag in decode_varints(encoded):
+        total += zigzag >> 1 if not zigzag & 1 else -((zigzag + 1) >> 1)
+        values.append(total)
+    return values
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Metrics
+Målinger til drift: pipelinens tider og fejl pr. kilde (update_all_data.py) og læse-API'ets
+tællere (api_server.py), som /metrics udstiller i Prometheus' tekstformat.
+
+Pipelinen skriver sin seneste kørsel til data/tagged/pipeline_run.json; API'et læser filen,
+når /metrics eller /health kaldes, så de to processer kun deler den fil.
+"""
+
+import os
+import json
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SCRAPER_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_RUN_PATH = os.path.join(SCRAPER_DIR, 'data', 'tagged', 'pipeline_run.json')
+
+# Sekunder; de fleste svar ligger under et millisekund, søgninger og hele listen højere
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Linjer i en scrapers output der tælles som fejl (logging-format og scripternes egne prints)
+ERROR_MARKERS = (' - ERROR - ', '❌')
+
+
+def source_name(script: str) -> str:
+    """Kildens navn ud fra scriptet: "scraperMoneypenny.py" -> "moneypenny\""""
+    name = os.path.splitext(os.path.basename(script))[0]
+    return (name[len('scraper'):] if name.startswith('scraper') else name).lower()
+
+
+def count_errors(lines: Iterable[str]) -> int:
+    return sum(1 for line in lines if any(marker in line for marker in ERROR_MARKERS))
+
+
+class PipelineRun:
+    """Tider og udfald for én kørsel af pipelinen (scrapere, tagging og build)"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages: Dict[str, float] = {}
+        self.sources: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(time.perf_counter() - started, 3)
+
+    def record_source(self, script: str, seconds: float, success: bool, errors: int):
+        self.sources[source_name(script)] = {'script': script, 'seconds': round(seconds, 3),
+                                             'success': success, 'errors': errors}
+
+    def save(self, success: bool, path: str = PIPELINE_RUN_PATH):
+        """Skriver kørslen atomisk; tidspunktet for seneste vellykkede kørsel føres videre"""
+        finished = time.time()
+        previous = load_pipeline_run(path) or {}
+        run = {
+            'started': round(self.started, 3),
+            'finished': round(finished, 3),
+            'success': success,
+            'lastSuccess': round(finished, 3) if success else previous.get('lastSuccess'),
+            'stages': self.stages,
+            'sources': self.sources
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(run, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+def load_pipeline_run(path: str = PIPELINE_RUN_PATH) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class Histogram:
+    """Latens-histogram med faste spande; tælles pr. spand og summeres først ved udskrivning"""
+    __slots__ = ('counts', 'total')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+
+
+class RequestMetrics:
+    """Svar pr. endpoint og status og et latens-histogram pr. endpoint"""
+
+    def __init__(self):
+        self.latency: Dict[str, Histogram] = {}
+        self.responses: Counter = Counter()
+
+    def observe(self, endpoint: str, status: int, seconds: float):
+        histogram = self.latency.get(endpoint)
+        if histogram is None:
+            histogram = self.latency[endpoint] = Histogram()
+        histogram.observe(seconds)
+        self.responses[endpoint, status] += 1
+
+
+class MetricsText:
+    """Opbygger Prometheus' tekstformat (version 0.0.4)"""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> str:
+        if not labels:
+            return ''
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                   for value in labels.values())
+        return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+    def add(self, name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict[str, Any], float]]):
+        samples = list(samples)
+        if not samples:
+            return
+        self.lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        self.lines += [f'{name}{self._labels(labels)} {float(value)!r}' for labels, value in samples]
+
+    def value(self, name: str, kind: str, help_text: str, value: Optional[float]):
+        if value is not None:
+            self.add(name, kind, help_text, [({}, value)])
+
+    def histograms(self, name: str, help_text: str, histograms: Dict[str, Histogram], label: str):
+        if not histograms:
+            return
+        self.lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for key, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), histogram.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                self.lines.append(f'{name}_bucket{self._labels({label: key, "le": le})} {cumulative}')
+            self.lines.append(f'{name}_sum{self._labels({label: key})} {histogram.total!r}')
+            self.lines.append(f'{name}_count{self._labels({label: key})} {cumulative}')
+
+    def render(self) -> bytes:
+        return ('\n'.join(self.lines) + '\n').encode('utf-8')
+
+
+def add_pipeline_metrics(text: MetricsText, run: Optional[Dict[str, Any]]):
+    """Seneste pipelinekørsel som gauges; intet hvis pipelinen ikke har kørt med målinger endnu"""
+    if not run:
+        return
+    sources = run.get('sources', {})
+    text.value('minepenge_pipeline_last_run_timestamp_seconds', 'gauge',
+               'Tidspunkt hvor seneste pipelinekørsel sluttede', run.get('finished'))
+    text.value('minepenge_pipeline_last_success_timestamp_seconds', 'gauge',
+               'Tidspunkt for seneste vellykkede pipelinekørsel', run.get('lastSuccess'))
+    text.value('minepenge_pipeline_last_run_success', 'gauge',
+               '1 hvis seneste pipelinekørsel lykkedes', int(bool(run.get('success'))))
+    text.add('minepenge_pipeline_stage_seconds', 'gauge', 'Varighed af hvert trin i seneste kørsel',
+             (({'stage': stage}, seconds) for stage, seconds in sorted(run.get('stages', {}).items())))
+    text.add('minepenge_pipeline_source_seconds', 'gauge', 'Scraperens varighed pr. kilde i seneste kørsel',
+             (({'source': source}, info['seconds']) for source, info in sorted(sources.items())))
+    text.add('minepenge_pipeline_source_errors', 'gauge', 'Fejllinjer i scraperens output pr. kilde i seneste kørsel',
+             (({'source': source}, info['errors']) for source, info in sorted(sources.items())))
+    text.add('minepenge_pipeline_source_success', 'gauge', '1 hvis scraperen for kilden lykkedes i seneste kørsel',
+             (({'source': source}, int(info['success'])) for source, info in sorted(sources.items())))
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Near-Duplicate Detection
+Finder krydspostede og syndikerede artikler med forskellige URLs via MinHash og LSH.
+
+Signaturer beregnes med one-permutation MinHash (ét hash pr. shingle, fordelt i
+NUM_PERM spande), så beregningen er lineær i tekstens længde. LSH-indekset gemmes
+på disk, så nye artikler kan tjekkes uden at hashe hele arkivet igen.
+
+Hver gemt signatur har et fingeraftryk af teksten (`article_digest`: titel og brødtekstens
+content_ref), så en rettet artikel på samme URL hashes igen i stedet for at genbruge den
+gamle signatur. URLs der ikke længere findes i nogen kilde fjernes med `prune`.
+"""
+
+import os
+import re
+import json
+import base64
+import sqlite3
+import hashlib
+import logging
+from array import array
+from typing import Dict, List, Optional, Callable
+
+from content_store import ContentStore, resolve_content
+from url_index import canonicalize_url
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+INDEX_PATH = os.path.join(DATA_DIR, 'index', 'near_duplicates.json')
+
+NUM_PERM = 128
+BANDS = 16            # 16 bånd á 8 rækker giver en LSH-tærskel omkring Jaccard 0.7
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+SIMILARITY_THRESHOLD = 0.8
+_EMPTY = 0xFFFFFFFF
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def compute_signature(text: str) -> array:
+    """Beregner en MinHash signatur (NUM_PERM x 32 bit) for en tekst"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = {' '.join(words)} if words else set()
+    else:
+        shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+    signature = array('I', [_EMPTY]) * NUM_PERM
+    for shingle in shingles:
+        h = _hash64(shingle)
+        slot = h % NUM_PERM
+        value = h >> 32
+        if value < signature[slot]:
+            signature[slot] = value
+
+    # Udfyld tomme spande fra nærmeste ikke-tomme spand til højre (rotation)
+    if shingles and _EMPTY in signature:
+        original = signature.tolist()
+        for slot in range(NUM_PERM):
+            offset = 1
+            while original[slot] == _EMPTY and signature[slot] == _EMPTY:
+                donor = original[(slot + offset) % NUM_PERM]
+                if donor != _EMPTY:
+                    signature[slot] = (donor + offset * 0x9E3779B1) & 0xFFFFFFFE
+                offset += 1
+    return signature
+
+
+def estimate_similarity(sig_a: array, sig_b: array) -> float:
+    """Estimerer Jaccard-lighed ud fra to signaturer"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def _band_keys(signature: array) -> List[bytes]:
+    # Båndets rå bytes (med båndnummer foran) bruges direkte som bucket-nøgle
+    raw = signature.tobytes()
+    width = ROWS * signature.itemsize
+    return [bytes((band,)) + raw[band * width:(band + 1) * width] for band in range(BANDS)]
+
+
+def article_digest(article: Dict) -> str:
+    """Fingeraftryk af teksten bag en signatur uden at læse lageret: titlen og brødtekstens content_ref"""
+    record = article.get('original_data', article)
+    ref = ContentStore.content_hash(record.get('content') or '') if 'content' in record \
+        else record.get('content_ref') or ''
+    return ContentStore.content_hash(f"{article.get('title', '')}\n{ref}")[:16]
+
+
+class NearDuplicateIndex:
+    """Persistent LSH-indeks over MinHash signaturer nøglet på kanonisk artikel-URL"""
+
+    def __init__(self, index_path: str = INDEX_PATH, threshold: float = SIMILARITY_THRESHOLD):
+        self.index_path = index_path
+        self.threshold = threshold
+        self.signatures: Dict[str, array] = {}
+        self.digests: Dict[str, str] = {}
+        self.band_keys: Dict[str, List[bytes]] = {}
+        self.buckets: Dict[bytes, List[str]] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """Indlæser indekset fra disk hvis det findes"""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('num_perm') != NUM_PERM or data.get('bands') != BANDS:
+            logger.warning("Near-duplicate indeks har andre parametre - bygges forfra")
+            return
+        # Signaturer uden fingeraftryk (fra før det fandtes) beregnes igen første gang de bruges
+        digests = data.get('digests', {})
+        for key, encoded in data.get('signatures', {}).items():
+            signature = array('I')
+            signature.frombytes(base64.b64decode(encoded))
+            self._insert(key, signature, digests.get(key))
+
+    def save(self):
+        """Gemmer indekset hvis det er ændret"""
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        data = {
+            'num_perm': NUM_PERM,
+            'bands': BANDS,
+            'signatures': {key: base64.b64encode(sig.tobytes()).decode('ascii')
+                           for key, sig in self.signatures.items()},
+            'digests': self.digests
+        }
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            # json.dumps bruger C-encoderen; json.dump streamer via den langsomme Python-encoder
+            f.write(json.dumps(data, ensure_ascii=False))
+        self.dirty = False
+
+    def _insert(self, key: str, signature: array, digest: Optional[str] = None):
+        if key in self.signatures:
+            self._remove(key)
+        self.signatures[key] = signature
+        if digest is not None:
+            self.digests[key] = digest
+        band_keys = self.band_keys[key] = _band_keys(signature)
+        for band_key in band_keys:
+            self.buckets.setdefault(band_key, []).append(key)
+
+    def _remove(self, key: str):
+        del self.signatures[key]
+        self.digests.pop(key, None)
+        for band_key in self.band_keys.pop(key):
+            bucket = self.buckets[band_key]
+            bucket.remove(key)
+            if not bucket:
+                del self.buckets[band_key]
+
+    def is_current(self, key: str, digest: Optional[str]) -> bool:
+        """True hvis signaturen for `key` findes og er beregnet af teksten med fingeraftrykket `digest`"""
+        return key in self.signatures and (digest is None or self.digests.get(key) == digest)
+
+    def add(self, key: str, text_fn: Callable[[], str], digest: Optional[str] = None) -> array:
+        """
+        Tilføjer en artikel; teksten hentes kun hvis artiklen ikke allerede er hashet med
+        samme fingeraftryk. Uden `digest` genbruges enhver gemt signatur for nøglen.
+        """
+        if self.is_current(key, digest):
+            return self.signatures[key]
+        signature = compute_signature(text_fn())
+        self._insert(key, signature, digest)
+        self.dirty = True
+        return signature
+
+    def add_signature(self, key: str, signature: array, digest: Optional[str] = None):
+        """Tilføjer en signatur beregnet andetsteds (fx i en worker-proces), hvis den gemte er forældet"""
+        if not self.is_current(key, digest):
+            self._insert(key, signature, digest)
+            self.dirty = True
+
+    def prune(self, live_keys: set) -> int:
+        """Fjerner signaturer for nøgler der ikke er i `live_keys` og returnerer antallet"""
+        stale = [key for key in self.signatures if key not in live_keys]
+        for key in stale:
+            self._remove(key)
+        self.dirty = self.dirty or bool(stale)
+        return len(stale)
+
+    def find_similar(self, key: str, candidates: Optional[set] = None) -> List[str]:
+        """Returnerer nøgler over lighedstærsklen, evt. begrænset til `candidates`"""
+        signature = self.signatures[key]
+        seen = set()
+        similar = []
+        for band_key in self.band_keys[key]:
+            for other in self.buckets.get(band_key, []):
+                if other == key or other in seen:
+                    continue
+                seen.add(other)
+                if candidates is not None and other not in candidates:
+                    continue
+                if estimate_similarity(signature, self.signatures[other]) >= self.threshold:
+                    similar.append(other)
+        return similar
+
+
+class DiskSignatureCache:
+    """
+    Persistent signatur-cache i SQLite til streaming build, hvor NearDuplicateIndex ikke kan
+    ligge i RAM. Som NearDuplicateIndex.add genbruges signaturen for en kendt nøgle med samme
+    fingeraftryk. Hver kørsel stempler de nøgler den slår op, så `prune` kan fjerne resten.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA synchronous=OFF')
+        # Tabellen uden fingeraftryk fra tidligere versioner kan ikke bruges
+        self.connection.execute('DROP TABLE IF EXISTS signatures')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS article_signatures (key TEXT PRIMARY KEY, '
+                                'digest TEXT, num_perm INTEGER, signature BLOB, run INTEGER) WITHOUT ROWID')
+        self.run = (self.connection.execute('SELECT MAX(run) FROM article_signatures').fetchone()[0] or 0) + 1
+        self.computed = 0
+
+    def get(self, key: str, text_fn: Callable[[], str], digest: str) -> array:
+        """Signaturen for `key`; teksten hentes og hashes kun hvis den ikke er gemt med `digest`"""
+        row = self.connection.execute('SELECT digest, num_perm, signature FROM article_signatures WHERE key = ?',
+                                      (key,)).fetchone()
+        signature = array('I')
+        if row and row[0] == digest and row[1] == NUM_PERM:
+            self.connection.execute('UPDATE article_signatures SET run = ? WHERE key = ?', (self.run, key))
+            signature.frombytes(row[2])
+            return signature
+        signature = compute_signature(text_fn())
+        self.connection.execute('INSERT OR REPLACE INTO article_signatures (key, digest, num_perm, signature, run) '
+                                'VALUES (?, ?, ?, ?, ?)', (key, digest, NUM_PERM, signature.tobytes(), self.run))
+        self.computed += 1
+        return signature
+
+    def prune(self) -> int:
+        """Fjerner signaturer som denne kørsel ikke har slået op; kaldes når alle kilder er læst"""
+        return self.connection.execute('DELETE FROM article_signatures WHERE run < ?', (self.run,)).rowcount
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+class DiskNearDuplicateFilter:
+    """
+    Near-duplicate filter for en strøm af artikler i listerækkefølge (streaming build).
+    Signaturer og LSH-bånd for de beholdte artikler ligger i SQLite i stedet for i RAM;
+    resultatet er det samme som remove_near_duplicates over hele listen.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, threshold: float = SIMILARITY_THRESHOLD):
+        self.connection = connection
+        self.threshold = threshold
+        connection.execute('CREATE TABLE IF NOT EXISTS near_signatures (key TEXT PRIMARY KEY, signature BLOB) WITHOUT ROWID')
+        connection.execute('CREATE TABLE IF NOT EXISTS near_bands (band BLOB, key TEXT)')
+        connection.execute('CREATE INDEX IF NOT EXISTS near_bands_band ON near_bands (band)')
+        self._candidates_sql = f"SELECT key FROM near_bands WHERE band IN ({','.join('?' * BANDS)})"
+
+    def check(self, key: str, signature: array) -> Optional[str]:
+        """Returnerer en tidligere beholdt artikel som `key` ligner; ellers beholdes `key` og None returneres"""
+        band_keys = _band_keys(signature)
+        seen = set()
+        for (other,) in self.connection.execute(self._candidates_sql, band_keys).fetchall():
+            if other == key or other in seen:
+                continue
+            seen.add(other)
+            row = self.connection.execute('SELECT signature FROM near_signatures WHERE key = ?', (other,)).fetchone()
+            other_signature = array('I')
+            other_signature.frombytes(row[0])
+            if estimate_similarity(signature, other_signature) >= self.threshold:
+                return other
+        self.connection.execute('INSERT OR REPLACE INTO near_signatures (key, signature) VALUES (?, ?)',
+                                (key, signature.tobytes()))
+        self.connection.executemany('INSERT INTO near_bands (band, key) VALUES (?, ?)',
+                                    [(band_key, key) for band_key in band_keys])
+        return None
+
+
+def article_text(article: Dict) -> str:
+    """Samler titel og brødtekst for en rå eller tagget artikel"""
+    body_record = article.get('original_data', article)
+    return f"{article.get('title', '')} {resolve_content(body_record)}"
+
+
+def remove_near_duplicates(articles: List[Dict], index: NearDuplicateIndex = None,
+                           keys: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Fjerner artikler der næsten er identiske med en tidligere artikel i listen.
+    `keys` kan give de kanoniske URLs på forhånd, så de ikke beregnes igen.
+    """
+    index = index or NearDuplicateIndex()
+    kept_keys = set()
+    unique = []
+    for position, article in enumerate(articles):
+        key = (keys[position] if keys is not None else canonicalize_url(article.get('url', ''))) \
+            or article.get('article_id')
+        if not key:
+            unique.append(article)
+            continue
+        # Med `keys` er det buildets poster uden brødtekst; deres signaturer ligger allerede i indekset
+        index.add(key, lambda: article_text(article), article_digest(article) if keys is None else None)
+        duplicates = index.find_similar(key, kept_keys)
+        if duplicates:
+            logger.info(f"Near-duplicate: {key} ligner {duplicates[0]}")
+            continue
+        kept_keys.add(key)
+        unique.append(article)
+    index.save()
+    return unique
+
+
+def find_near_duplicate_pairs(articles: List[Dict], index: NearDuplicateIndex = None) -> List[tuple]:
+    """Returnerer (url, url) par af næsten identiske artikler, fx på tværs af kilder"""
+    index = index or NearDuplicateIndex()
+    keys = []
+    for article in articles:
+        key = canonicalize_url(article.get('url', ''))
+        if key:
+            index.add(key, lambda: article_text(article), article_digest(article))
+            keys.append(key)
+
+    key_set = set(keys)
+    pairs = []
+    for key in keys:
+        for other in index.find_similar(key, key_set):
+            if key < other:
+                pairs.append((key, other))
+    index.save()
+    return pairs
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Relevance
+Relevansscore (0-10) pr. artikel, beregnet i buildet og skrevet til relevance.json sammen med
+et forsorteret scoreindeks, så API'et kan give top-k uden at scanne arkivet.
+
+Scoren er summen af:
+- målgruppe-confidence fra taggeren (højeste værdi, op til 3 point)
+- antal matchede Mine Penge tags (op til 1,5 point)
+- aktualitet: halveres for hver RECENCY_HALF_LIFE_DAYS før arkivets nyeste artikel (op til 3 point)
+- længde: ordantal op til FULL_WORD_COUNT (op til 1 point)
+- kildekvalitet fra SOURCE_QUALITY (op til 1,5 point)
+
+Alt undtagen aktualiteten afhænger kun af artiklen selv og gemmes i buildets cachede kørsler.
+Aktualiteten måles mod den nyeste artikel i stedet for byggetidspunktet, så scorerne kun
+ændres når listen gør. Scorerne ligger ikke i listeindekset, da én ny artikel flytter dem alle.
+"""
+
+import math
+from typing import Dict, List, Any, Iterable
+
+from int_codec import encode_varints, decode_varints, encode_deltas, decode_deltas
+
+RELEVANCE_VERSION = 1
+SCALE = 10  # scorerne gemmes som heltal i tiendedele
+RECENCY_HALF_LIFE_DAYS = 180
+FULL_WORD_COUNT = 1000
+MAX_TAGS = 5
+
+# Redaktionel vurdering af kilderne; ukendte kilder får DEFAULT_SOURCE_QUALITY
+SOURCE_QUALITY = {
+    'Nordnet Blog': 0.9,
+    'Budgetnoerden Blog': 0.8,
+    'Ungmedpenge Blog': 0.7,
+    'Mitteldorf Blog': 0.7
+}
+DEFAULT_SOURCE_QUALITY = 0.5
+
+
+def article_quality(article: Dict[str, Any]) -> float:
+    """Den tidsuafhængige del af scoren for en tagget artikel (0-7)"""
+    # JSON tillader NaN; en ugyldig confidence må ikke gøre scoren (og buildets round) til NaN
+    confidence = max((value for value in (article.get('confidence_scores') or {}).values()
+                      if isinstance(value, (int, float)) and math.isfinite(value)), default=0.0)
+    tags = min(len(article.get('minepenge_tags') or []), MAX_TAGS)
+    words = (article.get('original_data') or {}).get('word_count') or 0
+    source = SOURCE_QUALITY.get(article.get('source'), DEFAULT_SOURCE_QUALITY)
+    return 3.0 * min(confidence, 1.0) + 1.5 * tags / MAX_TAGS + min(words / FULL_WORD_COUNT, 1.0) + 1.5 * source
+
+
+def recency(timestamp: int, newest: int) -> float:
+    """Aktualitetsdelen (0-3); udaterede artikler får 0"""
+    if not timestamp or not newest:
+        return 0.0
+    age_days = max(0, newest - timestamp) / 86400
+    return 3.0 * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+
+def relevance_score(quality: float, timestamp: int, newest: int) -> int:
+    """Den samlede score i tiendedele"""
+    return round((quality + recency(timestamp, newest)) * SCALE)
+
+
+def relevance_data(scores: Iterable[int], order: Iterable[int], doc_count: int) -> Dict[str, Any]:
+    """Artefaktet for færdige scorer og scoreindeks (lister eller generatorer, fx fra ekstern sortering)"""
+    return {
+        'version': RELEVANCE_VERSION,
+        'docCount': doc_count,
+        'scale': SCALE,
+        'scores': encode_varints(scores),
+        'order': encode_deltas(order)
+    }
+
+
+def build_relevance(qualities: Iterable[float], timestamps: Iterable[int]) -> Dict[str, Any]:
+    """
+    Scorerne i listerækkefølge og positionerne sorteret efter score (højest først,
+    uafgjort i listerækkefølge). `qualities` og `timestamps` følger listeindekset.
+    """
+    timestamps = list(timestamps)
+    newest = max((timestamp for timestamp in timestamps if timestamp), default=0)
+    scores = [relevance_score(quality, timestamp, newest) for quality, timestamp in zip(qualities, timestamps)]
+    order = sorted(range(len(scores)), key=lambda position: -scores[position])
+    return relevance_data(scores, order, len(scores))
+
+
+class RelevanceIndex:
+    """Top-k opslag over et bygget relevance.json"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.doc_count: int = data['docCount']
+        self.scale: int = data.get('scale', SCALE)
+        self.scores: List[int] = decode_varints(data['scores'])
+        self.order: List[int] = decode_deltas(data['order'])
+
+    def score(self, position: int) -> float:
+        return self.scores[position] / self.scale
+
+    def top(self, k: int, min_score: float = 0.0, mask: int = None) -> List[int]:
+        """De `k` højest scorede positioner med score >= min_score (evt. kun dem i bitsettet `mask`)"""
+        if not math.isfinite(min_score):
+            # NaN sammenligner falsk med alt og ville returnere hele arkivet
+            raise ValueError(f'min_score skal være et endeligt tal, ikke {min_score}')
+        threshold = min_score * self.scale - 1e-9
+        # Bitsettet som bytes én gang; `mask >> position` bygger et nyt stort heltal pr. kandidat
+        raw = None if mask is None else mask.to_bytes((self.doc_count + 7) // 8, 'little')
+        result = []
+        for position in self.order:
+            if self.scores[position] < threshold or len(result) >= k:
+                break
+            if raw is None or raw[position >> 3] >> (position & 7) & 1:
+                result.append(position)
+        return result
@@ -6,6 +6,14 @@ import re
 from urllib.parse import urljoin, urlparse
 from datetime import datetime
 import logging
+import os
+import sys
+
+# Delte moduler ligger i scraper/ mappen
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from content_store import externalize_content
+from date_normalizer import normalize_date
+from url_index import SeenUrlIndex, merge_with_existing
 
 # Opsætning af logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,6 +28,7 @@ class MoneypennyBlogScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         self.blog_posts = []
+        self.seen_urls = SeenUrlIndex()
 
     def get_page_content(self, url, retry_count=3):
         """Henter indhold fra en URL med retry funktionalitet"""
@@ -205,14 +214,18 @@ class MoneypennyBlogScraper:
                                 date_element.get_text()).strip()
                 break
         
+        scraped_at = datetime.now()
         blog_post = {
             'url': url,
             'title': title,
             'summary': summary,
             'content': content,
             'date_published': date_published,
-            'scraped_at': datetime.now().isoformat(),
-            'word_count': len(content.split())
+            # Datoer uden årstal ("13. jan.") dateres ud fra scrape-tidspunktet
+            'published_ts': normalize_date(date_published, scraped_at),
+            'scraped_at': scraped_at.isoformat(),
+            'word_count': len(content.split()),
+            'source': 'Moneypenny Blog'
         }
         
         return blog_post
@@ -241,33 +254,47 @@ class MoneypennyBlogScraper:
         
         logger.info(f"Total antal unikke blog URLs fundet: {len(all_urls)}")
         
+        # Spring URLs over der allerede er hentet (på tværs af opdagelsesmetoder og kørsler)
+        new_urls = self.seen_urls.filter_unseen(all_urls)
+        logger.info(f"{len(new_urls)} nye URLs efter tjek mod globalt URL-indeks")
+        
         # Scrape hvert blog indlæg
         successful_scrapes = 0
-        for i, url in enumerate(all_urls, 1):
-            logger.info(f"Scraper {i}/{len(all_urls)}: {url}")
+        for i, url in enumerate(new_urls, 1):
+            logger.info(f"Scraper {i}/{len(new_urls)}: {url}")
             
             blog_post = self.extract_blog_content(url)
             if blog_post:
                 self.blog_posts.append(blog_post)
+                self.seen_urls.register(url, blog_post['source'])
                 successful_scrapes += 1
             
             # Vær høflig og vent mellem requests
             time.sleep(1)
         
-        logger.info(f"Scraping færdig! {successful_scrapes}/{len(all_urls)} indlæg scraped succesfuldt")
+        logger.info(f"Scraping færdig! {successful_scrapes}/{len(new_urls)} indlæg scraped succesfuldt")
         
         return self.blog_posts
 
     def save_to_json(self, filename="data/moneypenny_blog_posts.json"):
         """Gemmer alle blog indlæg til JSON fil"""
+        # Tidligere hentede indlæg springes over ved scraping, så de flettes ind her
+        blog_posts = merge_with_existing(filename, self.blog_posts)
         output = {
             'scraped_at': datetime.now().isoformat(),
-            'total_posts': len(self.blog_posts),
-            'blog_posts': self.blog_posts
+            'source': 'Moneypenny Blog (moneypennyandmore.dk/blog/)',
+            'total_posts': len(blog_posts),
+            # Brødtekster gemmes i content store og refereres via content_ref
+            'blog_posts': [externalize_content(post) for post in blog_posts]
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
+        # Skriv til midlertidig fil og omdøb, så en fejlet skrivning ikke efterlader en halv fil
+        tmp_path = f"{filename}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             json.dump(output, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, filename)
+        # URL-indekset gemmes først når indlæggene ligger på disk, ellers springes de over for altid
+        self.seen_urls.save()
         
         logger.info(f"Data gemt til {filename}")
         return filename
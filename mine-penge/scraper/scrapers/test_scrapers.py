@@ -0,0 +1,51 @@
+import importlib
+import json
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('bs4')
+
+from url_index import SeenUrlIndex, canonicalize_url
+
+SCRAPERS = [
+    ('scraperBudgetNoerd', 'BudgetnoerdenBlogScraper', 'Budgetnoerden Blog'),
+    ('scraperMitteldorfDK', 'MitteldorfBlogScraper', 'Mitteldorf Blog'),
+    ('scraperMoneypenny', 'MoneypennyBlogScraper', 'Moneypenny Blog'),
+    ('scraperNordNet', 'NordnetBlogScraper', 'Nordnet Blog'),
+    ('scraperUngMedPenge', 'UngmedpengeBlogScraper', 'Ungmedpenge Blog'),
+]
+
+PAGE = ('<html><head><title>Sådan kommer du i gang med opsparing</title>'
+        '<meta name="description" content="Et indlæg om opsparing"></head>'
+        '<body><article><h1>Sådan kommer du i gang med opsparing</h1>'
+        '<p>Læg et fast beløb til side hver måned, og lad renters rente gøre resten.</p>'
+        '</article></body></html>').encode('utf-8')
+
+
+class _Response:
+    status_code = 200
+    content = PAGE
+    text = PAGE.decode('utf-8')
+
+
+@pytest.mark.parametrize('module_name, class_name, source', SCRAPERS)
+def test_scraped_posts_are_registered_with_their_source(tmp_path, monkeypatch, module_name, class_name, source):
+    module = importlib.import_module(module_name)
+    index_path = tmp_path / 'seen_urls.json'
+    index_path.write_text(json.dumps({'urls': {}}), encoding='utf-8')
+    monkeypatch.setattr(module, 'SeenUrlIndex', lambda: SeenUrlIndex(str(index_path)))
+    monkeypatch.setattr(module.time, 'sleep', lambda seconds: None)
+
+    scraper = getattr(module, class_name)()
+    url = scraper.base_url + '/blog/saadan-kommer-du-i-gang-med-opsparing/'
+    # Kun det fundne indlæg hentes; ingen netværk
+    for name in dir(scraper):
+        if name.startswith(('find_', 'discover_', 'scrape_blog_listing', 'scrape_main_page')):
+            monkeypatch.setattr(scraper, name, lambda *args, **kwargs: {url})
+    monkeypatch.setattr(scraper, 'get_page_content', lambda *args, **kwargs: _Response())
+
+    posts = scraper.scrape_all_blogs()
+    assert [post['source'] for post in posts] == [source]
+    assert scraper.seen_urls.entries[canonicalize_url(url)]['source'] == source
+    assert scraper.seen_urls.filter_unseen([url]) == []
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Search Index
+Kompakt inverted index over titel, resume og tags, som build_articles.py skriver til frontend.
+
+Normaliseringen er dansk-venlig: små bogstaver, let stemming af bøjningsendelser og
+foldning af æ/ø/å til ae/oe/aa, så "boliglån", "boliglaan" og "boliglånene" giver samme term.
+Frontendens udgave af normaliseringen ligger i src/services/searchIndex.js og skal holdes i sync.
+"""
+
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, List, Iterable, Any, Optional
+
+from int_codec import encode_sorted, decode_sorted
+
+SEARCH_INDEX_VERSION = 1
+
+_TOKEN_RE = re.compile(r'\w+')
+_FOLD = str.maketrans({'æ': 'ae', 'ø': 'oe', 'å': 'aa', 'é': 'e', 'ü': 'u', 'ö': 'oe', 'ä': 'ae'})
+
+# Længste endelse først; stammen skal have mindst MIN_STEM tegn tilbage
+SUFFIXES = ('ernes', 'erne', 'enes', 'ene', 'ers', 'ens', 'ets', 'er', 'en', 'et', 'e', 's')
+MIN_STEM = 3
+
+STOPWORDS = {
+    'og', 'i', 'at', 'det', 'en', 'et', 'er', 'til', 'på', 'af', 'for', 'med', 'som', 'de',
+    'den', 'der', 'du', 'jeg', 'vi', 'har', 'kan', 'om', 'så', 'men', 'ikke', 'fra', 'eller',
+    'din', 'dine', 'dit', 'hvad', 'hvordan', 'man', 'sig', 'skal', 'vil', 'være', 'var', 'the'
+}
+
+
+@lru_cache(maxsize=65536)
+def normalize_token(token: str) -> str:
+    """Små bogstaver, let stemming og foldning af danske bogstaver"""
+    token = token.lower()
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM:
+            token = token[:-len(suffix)]
+            break
+    return token.translate(_FOLD)
+
+
+def normalize_prefix(token: str) -> str:
+    """Som `normalize_token` uden stemming, til præfikser der stadig skrives"""
+    return token.lower().translate(_FOLD)
+
+
+def tokenize(text: str) -> List[str]:
+    """Opdeler tekst i normaliserede termer uden stopord"""
+    return [normalize_token(token) for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def unique_terms(text: str) -> set:
+    """Som `tokenize`, men hver rå token normaliseres kun én gang pr. tekst"""
+    return {normalize_token(token) for token in set(_TOKEN_RE.findall(text.lower())) - STOPWORDS}
+
+
+def searchable_text(article: Dict[str, Any]) -> str:
+    tags = ' '.join(article.get('minepenge_tags') or [])
+    return f"{article.get('title') or ''} {article.get('summary') or ''} {tags}"
+
+
+def article_terms(article: Dict[str, Any]) -> List[str]:
+    """Sorterede unikke termer for en artikel (kan caches mellem builds)"""
+    return sorted(unique_terms(searchable_text(article)))
+
+
+def build_search_index(articles: Iterable[Dict[str, Any]],
+                       term_sets: Optional[Iterable[Iterable[str]]] = None) -> Dict[str, Any]:
+    """
+    Bygger indekset. Positionerne svarer til artiklernes rækkefølge i listeindekset.
+    Termerne er sorterede, så præfiks-opslag kan laves med binær søgning.
+    `term_sets` kan give hver artikels termer på forhånd (fx fra build-cachen).
+    """
+    if term_sets is None:
+        term_sets = (unique_terms(searchable_text(article)) for article in articles)
+    postings: Dict[str, List[int]] = {}
+    doc_count = 0
+    for position, terms in enumerate(term_sets):
+        doc_count += 1
+        for term in terms:
+            postings.setdefault(term, []).append(position)
+
+    terms = sorted(postings)
+    return {
+        'version': SEARCH_INDEX_VERSION,
+        'docCount': doc_count,
+        'terms': terms,
+        'postings': [encode_sorted(postings[term]) for term in terms]
+    }
+
+
+class SearchIndex:
+    """Opslag i et bygget indeks: alle termer skal matche, sidste term matches som præfiks"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.terms: List[str] = data['terms']
+        self.postings: List[str] = data['postings']
+        self._exact = {term: i for i, term in enumerate(self.terms)}
+
+    def _positions_for(self, term: str, prefix: bool) -> set:
+        if not prefix:
+            i = self._exact.get(term)
+            return set(decode_sorted(self.postings[i])) if i is not None else set()
+        result = set()
+        i = bisect_left(self.terms, term)
+        while i < len(self.terms) and self.terms[i].startswith(term):
+            result.update(decode_sorted(self.postings[i]))
+            i += 1
+        return result
+
+    def lookup(self, query: str) -> List[int]:
+        """Returnerer sorterede artikelpositioner der matcher alle termer i forespørgslen"""
+        query_terms = tokenize(query)
+        result = None
+        for i, term in enumerate(query_terms):
+            # Sidste ord skrives måske stadig, så det matches som præfiks
+            positions = self._positions_for(term, prefix=(i == len(query_terms) - 1))
+            result = positions if result is None else result & positions
+            if not result:
+                return []
+        return sorted(result or ())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Sort Orders
+Forudberegnede permutationer af listeindekset for hver sortering, som build_articles.py
+skriver til frontend, så en side blot er et udsnit af en færdig positionsliste.
+
+Hver sortering gemmes som zigzag-delta-kodede varints (se int_codec.py). Listeindekset er
+allerede sorteret nyeste først, så de fleste permutationer består af korte løb og koster
+omkring én byte pr. artikel. Frontendens udgave ligger i src/services/sortOrders.js.
+
+'relevance' følger rangeringen i relevance.json: scoren (i tiendedele) og derefter
+standardrækkefølgen. Scoren står ikke i listeindekset, så dens nøgle får scoren med udefra.
+
+Nøglerne slutter med artikel-ID'et, så hver permutation er totalt ordnet efter nøglen. Et
+cursor-token (`encode_cursor`) er nøglen for den sidst viste artikel; næste side findes ved
+binær søgning i permutationen og er den samme, selvom nye artikler er kommet til foran.
+"""
+
+import json
+import base64
+import binascii
+from typing import Dict, List, Any, Callable, Iterable, Tuple
+
+from int_codec import encode_deltas, decode_deltas
+
+SORT_ORDERS_VERSION = 3
+DEFAULT_SORT = 'newest'
+RELEVANCE_SORT = 'relevance'
+
+
+def _timestamp(article: Dict[str, Any]) -> int:
+    return article.get('published_ts') or 0
+
+
+def _id(article: Dict[str, Any]) -> str:
+    return article.get('article_id') or ''
+
+
+# Sorteringsnavn -> nøgle; uafgjort afgøres af artikel-ID'et, så en side kan findes ud fra nøglen alene
+SORT_KEYS: Dict[str, Callable[[Dict[str, Any]], Tuple]] = {
+    'newest': lambda article: (-_timestamp(article), article.get('source') or '', _id(article)),
+    # Artikler uden dato står sidst i begge retninger
+    'oldest': lambda article: (not _timestamp(article), _timestamp(article), article.get('source') or '',
+                               _id(article)),
+    'source': lambda article: (article.get('source') or '', -_timestamp(article), _id(article))
+}
+
+
+def relevance_key(article: Dict[str, Any], score: int) -> Tuple:
+    """Nøglen for 'relevance': scoren fra relevance.json (højest først), derefter standardrækkefølgen"""
+    return (-score,) + SORT_KEYS[DEFAULT_SORT](article)
+
+
+# Alle sorteringer; 'relevance' har ingen nøgle i SORT_KEYS, da den kræver scorerne
+SORTS = tuple(SORT_KEYS) + (RELEVANCE_SORT,)
+
+
+def encode_cursor(sort: str, key: Tuple) -> str:
+    """Uigennemsigtigt token for en position i sorteringen `sort` (base64url af [sort, nøgle])"""
+    raw = json.dumps([sort, list(key)], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[str, Tuple]:
+    """(sort, nøgle) fra et token; ValueError hvis det ikke kommer fra `encode_cursor`"""
+    try:
+        sort, key = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Ugyldig cursor")
+    if sort not in SORTS or not isinstance(key, list):
+        raise ValueError("Ugyldig cursor")
+    return sort, tuple(key)
+
+
+def sort_permutation(articles: List[Dict[str, Any]], sort: str) -> List[int]:
+    """Positioner i listeindekset i den rækkefølge sorteringen `sort` viser dem"""
+    key = SORT_KEYS[sort]
+    return sorted(range(len(articles)), key=lambda position: key(articles[position]))
+
+
+def sort_orders_data(doc_count: int, permutations: Dict[str, Iterable[int]]) -> Dict[str, Any]:
+    """Artefaktet for færdige permutationer (lister eller generatorer, fx fra ekstern sortering)"""
+    return {
+        'version': SORT_ORDERS_VERSION,
+        'docCount': doc_count,
+        'default': DEFAULT_SORT,
+        'orders': {sort: encode_deltas(permutation) for sort, permutation in permutations.items()}
+    }
+
+
+def build_sort_orders(articles: List[Dict[str, Any]], scores: List[int]) -> Dict[str, Any]:
+    """Bygger permutationerne for alle sorteringer; `scores` er relevance.json's scorer i listerækkefølge"""
+    permutations = {sort: sort_permutation(articles, sort) for sort in SORT_KEYS}
+    permutations[RELEVANCE_SORT] = sorted(range(len(articles)),
+                                          key=lambda position: relevance_key(articles[position], scores[position]))
+    return sort_orders_data(len(articles), permutations)
+
+
+class SortOrders:
+    """Sideopslag over byggede permutationer"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.doc_count: int = data['docCount']
+        self.default: str = data.get('default', DEFAULT_SORT)
+        self.orders: Dict[str, List[int]] = {sort: decode_deltas(encoded) for sort, encoded in data['orders'].items()}
+
+    def page(self, sort: str, page: int, page_size: int) -> List[int]:
+        """Positionerne for én side (1-indekseret); ukendte sorteringer bruger standarden"""
+        order = self.orders.get(sort) or self.orders[self.default]
+        start = (page - 1) * page_size
+        return order[start:start + page_size]
@@ -8,22 +8,197 @@ Automatisk kategorisering og tagging af danske økonomiblog artikler
 import json
 import os
 import re
+import codecs
 from datetime import datetime
 from collections import Counter
-import hashlib
+from glob import glob
+import sys
 from typing import Dict, List, Tuple, Any
 import logging
 
+# Delte moduler ligger i scraper/ mappen
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from content_store import ContentStore, get_default_store, resolve_content
+from date_normalizer import normalize_date
+from url_index import SeenUrlIndex
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+
+def _build_translation_table(letter: bytes, terminator: bytes) -> bytes:
+    """Bygger en 256-bytes oversættelsestabel til latin-1 tekst"""
+    table = bytearray(b' ' * 256)
+    letters = list(range(ord('A'), ord('Z') + 1)) + list(range(ord('a'), ord('z') + 1))
+    letters += [i for i in range(0xC0, 0x100) if i not in (0xD7, 0xF7)]  # æ, ø, å m.fl.
+    for i in letters:
+        table[i] = letter[0]
+    for i in range(ord('0'), ord('9') + 1):
+        table[i] = ord('0')
+    for c in b'.!?:':
+        table[c] = terminator[0]
+    return bytes(table)
+
+
+def _fold_beyond_latin1(error: UnicodeEncodeError) -> Tuple[str, int]:
+    """
+    Tegn uden for latin-1 foldes før byte-oversættelsen: bogstaver -> 'a', cifre -> '0',
+    '…' -> '.', alt andet -> ' '. Tankestreger og typografiske citationstegn (–, “, ”, ’) er
+    almindelige i dansk tekst og må ikke blive til '?', som ellers ville afslutte en sætning.
+    """
+    folded = ''.join('a' if char.isalpha() else '0' if char.isdigit() else '.' if char == '…' else ' '
+                     for char in error.object[error.start:error.end])
+    return folded, error.end
+
+
+codecs.register_error('lix_fold', _fold_beyond_latin1)
+
+# Ord-tabel: bogstaver -> 'a', cifre -> '0', alt andet (inkl. tegnsætning) -> ' '
+_WORD_TABLE = _build_translation_table(b'a', b' ')
+# Sætnings-tabel: sætningstegn -> '.', ordtegn -> 'a', alt andet -> ' '
+_SENTENCE_TABLE = _build_translation_table(b'a', b'.')
+_LONG_WORD = b' ' + b'a' * 7
+
+
+def compute_text_statistics(text: str) -> Dict[str, float]:
+    """
+    Beregner ord, sætninger, lange ord (>6 bogstaver) og LIX i ét gennemløb.
+
+    Teksten oversættes til en latin-1 byte-maske, hvorefter alle tællinger
+    er rene substring-tællinger i C - der opbygges ingen ord- eller
+    sætningslister.
+    """
+    raw = text.encode('latin-1', 'lix_fold')
+    words_mask = b' ' + raw.translate(_WORD_TABLE)
+    # Et ord starter hvor et mellemrum efterfølges af et ordtegn
+    words = words_mask.count(b' a') + words_mask.count(b' 0')
+    long_words = words_mask.count(_LONG_WORD)
+
+    sentence_mask = raw.translate(_SENTENCE_TABLE) + b' '
+    # En sætning slutter ved en række sætningstegn efterfulgt af mellemrum
+    sentences = sentence_mask.count(b'. ')
+    if words and not sentence_mask.rstrip().endswith(b'.'):
+        sentences += 1  # Sidste sætning mangler afsluttende tegn
+
+    if words and sentences:
+        lix = words / sentences + long_words * 100 / words
+    else:
+        lix = 0.0
+
+    return {
+        "words": words,
+        "sentences": sentences,
+        "long_words": long_words,
+        "lix": round(lix, 1)
+    }
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tag_config.json')
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'index')
+TERM_INDEX_PATH = os.path.join(INDEX_DIR, 'tag_terms.json')
+TAGGED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'tagged')
+
+_TERM_RE = re.compile(r'\w+')
+
+
+class TermIndex:
+    """Persistent inverted indeks: ord -> artikel-ID'er, gemt sammen med den kompilerede konfiguration"""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        self.config = config or {}
+        self.article_ids: List[str] = []
+        self.terms: Dict[str, List[int]] = {}
+        self._positions: Dict[str, int] = {}
+
+    def add(self, article_id: str, text_lower: str):
+        """Registrerer alle ord i en artikels (små bogstaver) tekst"""
+        if article_id in self._positions:
+            return
+        position = len(self.article_ids)
+        self._positions[article_id] = position
+        self.article_ids.append(article_id)
+        for term in set(_TERM_RE.findall(text_lower)):
+            self.terms.setdefault(term, []).append(position)
+
+    def articles_containing(self, keyword: str) -> set:
+        """
+        Returnerer artikler der kan indeholde nøgleordet som substring.
+        Hvert ord i nøgleordet matches mod alle ord i vokabularet der indeholder det.
+        """
+        candidates = None
+        for word in _TERM_RE.findall(keyword.lower()):
+            positions = set()
+            for term, postings in self.terms.items():
+                if word in term:
+                    positions.update(postings)
+            candidates = positions if candidates is None else candidates & positions
+        return {self.article_ids[p] for p in candidates or ()}
+
+    def save(self, path: str = TERM_INDEX_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"config": self.config, "article_ids": self.article_ids, "terms": self.terms},
+                      f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: str = TERM_INDEX_PATH):
+        """Indlæser indekset, eller returnerer None hvis det ikke findes"""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls(data.get("config"))
+        index.article_ids = data.get("article_ids", [])
+        index.terms = data.get("terms", {})
+        index._positions = {article_id: i for i, article_id in enumerate(index.article_ids)}
+        return index
+
+
+def diff_compiled_configs(old: Dict[str, Any], new: Dict[str, Any]) -> Tuple[set, bool]:
+    """
+    Sammenligner to kompilerede konfigurationer.
+    Returnerer (berørte nøgleord, kræver fuld retagging).
+    """
+    if (old.get("settings") != new.get("settings") or
+            set(old.get("target_audiences", {})) != set(new.get("target_audiences", {}))):
+        return set(), True
+
+    affected = set()
+
+    # Tags: nøgleord der er tilføjet, fjernet eller flyttet mellem kategorier
+    def membership(section):
+        groups = {}
+        for group, keywords in section.items():
+            for keyword in keywords:
+                groups.setdefault(keyword, set()).add(group)
+        return groups
+
+    old_tags, new_tags = membership(old.get("tag_categories", {})), membership(new.get("tag_categories", {}))
+    for keyword in old_tags.keys() | new_tags.keys():
+        if old_tags.get(keyword) != new_tags.get(keyword):
+            affected.add(keyword)
+
+    # Målgrupper: scoren normaliseres med listens længde, så alle nøgleord i en ændret liste er berørt
+    for audience, new_keywords in new.get("target_audiences", {}).items():
+        old_keywords = old["target_audiences"].get(audience, [])
+        if set(old_keywords) != set(new_keywords):
+            affected |= set(old_keywords) | set(new_keywords)
+
+    affected |= set(old.get("technical_terms", [])) ^ set(new.get("technical_terms", []))
+    return affected, False
+
+
 class ContentTagger:
     """Automatisk kategorisering og tagging af økonomiblog artikler"""
     
-    def __init__(self, config_file="tag_config.json"):
+    def __init__(self, config_file=CONFIG_PATH, content_store: ContentStore = None,
+                 url_index: SeenUrlIndex = None, term_index_path: str = TERM_INDEX_PATH):
         """Initialiserer tagger med konfiguration fra fil"""
         self.config_file = config_file
+        self.content_store = content_store or get_default_store()
+        self.url_index = url_index or SeenUrlIndex()
+        self.term_index = None
+        self.term_index_path = term_index_path
         self.load_config()
         
     def load_config(self):
@@ -47,6 +222,17 @@ class ContentTagger:
             logger.error(f"Fejl ved indlæsning af konfiguration: {e}")
             self._load_default_config()
     
+    def compiled_config(self) -> Dict[str, Any]:
+        """Normaliseret udgave af de dele af konfigurationen der påvirker tagging"""
+        return {
+            "tag_categories": {category: sorted(tag.lower() for tag in tags)
+                               for category, tags in self.tag_categories.items()},
+            "target_audiences": {audience: sorted(keyword.lower() for keyword in keywords)
+                                 for audience, keywords in self.target_audiences.items()},
+            "technical_terms": sorted(term.lower() for term in self.technical_terms),
+            "settings": self.settings
+        }
+    
     def _load_default_config(self):
         """Indlæser standardkonfiguration hvis fil ikke findes"""
         self.tag_categories = {
@@ -90,34 +276,33 @@ class ContentTagger:
             "confidence_threshold": 0.3,
             "max_tags_per_article": 10,
             "max_audiences_per_article": 3,
-            "min_word_count": 50
+            "min_word_count": 50,
+            "lix_thresholds": {"mellem": 40, "avanceret": 50},
+            "technical_density_thresholds": {"mellem": 1.0, "avanceret": 3.0}
         }
 
-    def generate_article_id(self, url: str, title: str) -> str:
-        """Genererer unikt ID for artikel"""
-        content = f"{url}{title}"
-        return hashlib.md5(content.encode()).hexdigest()[:12]
+    def generate_article_id(self, url: str, source: str = '') -> str:
+        """Returnerer stabilt ID for artikel ud fra dens kanoniske URL"""
+        return self.url_index.register(url, source)
 
-    def analyze_text_complexity(self, text: str) -> str:
-        """Analyserer tekst kompleksitet"""
+    def analyze_text_complexity(self, text: str, stats: Dict[str, float] = None) -> str:
+        """Analyserer tekst kompleksitet ud fra LIX og tæthed af tekniske termer"""
+        if stats is None:
+            stats = compute_text_statistics(text)
         text_lower = text.lower()
         
-        # Tæl tekniske termer og komplekse ord
-        technical_count = sum(1 for term in self.technical_terms if term in text_lower)
-        
-        # Tæl sætninger og ord
-        sentences = len(re.split(r'[.!?]+', text))
-        words = len(text.split())
+        # Tekniske termer pr. 1000 ord
+        technical_count = sum(text_lower.count(term) for term in self.technical_terms)
+        technical_density = technical_count * 1000 / stats["words"] if stats["words"] else 0.0
         
-        if sentences > 0:
-            avg_words_per_sentence = words / sentences
-        else:
-            avg_words_per_sentence = 0
+        lix = stats["lix"]
+        lix_thresholds = self.settings.get("lix_thresholds", {"mellem": 40, "avanceret": 50})
+        density_thresholds = self.settings.get("technical_density_thresholds", {"mellem": 1.0, "avanceret": 3.0})
         
         # Vurder kompleksitet
-        if technical_count > 3 or avg_words_per_sentence > 25:
+        if lix >= lix_thresholds["avanceret"] or technical_density >= density_thresholds["avanceret"]:
             return "avanceret"
-        elif technical_count > 1 or avg_words_per_sentence > 20:
+        elif lix >= lix_thresholds["mellem"] or technical_density >= density_thresholds["mellem"]:
             return "mellem"
         else:
             return "begynder"
@@ -132,8 +317,8 @@ class ContentTagger:
                 if tag.lower() in text_lower:
                     matched_tags.append(tag)
         
-        # Fjern duplikater og begræns antal tags
-        unique_tags = list(set(matched_tags))
+        # Fjern duplikater (i konfigurationens rækkefølge, så resultatet er deterministisk) og begræns antal tags
+        unique_tags = list(dict.fromkeys(matched_tags))
         max_tags = self.settings.get("max_tags_per_article", 10)
         
         if len(unique_tags) > max_tags:
@@ -155,7 +340,7 @@ class ContentTagger:
             for category, category_tags in self.tag_categories.items():
                 if tag in category_tags:
                     categories.append(category)
-        return list(set(categories))
+        return list(dict.fromkeys(categories))
 
     def calculate_audience_confidence(self, text: str) -> Dict[str, float]:
         """Beregner confidence scores for forskellige målgrupper"""
@@ -192,10 +377,15 @@ class ContentTagger:
     def tag_article(self, article: Dict[str, Any]) -> Dict[str, Any]:
         """Tagger en enkelt artikel"""
         # Kombiner titel, summary og content til analyse
-        full_text = f"{article.get('title', '')} {article.get('summary', '')} {article.get('content', '')}"
+        content = resolve_content(article, self.content_store)
+        full_text = f"{article.get('title', '')} {article.get('summary', '')} {content}"
         
         # Generer artikel ID
-        article_id = self.generate_article_id(article.get('url', ''), article.get('title', ''))
+        article_id = self.generate_article_id(article.get('url', ''), article.get('source', ''))
+        
+        # Registrer artiklens ord til delta-retagging
+        if self.term_index is not None:
+            self.term_index.add(article_id, full_text.lower())
         
         # Find matchende tags
         minepenge_tags = self.find_matching_tags(full_text)
@@ -204,7 +394,8 @@ class ContentTagger:
         tag_categories = self.get_tag_categories(minepenge_tags)
         
         # Analyser kompleksitet
-        complexity_level = self.analyze_text_complexity(full_text)
+        text_statistics = compute_text_statistics(full_text)
+        complexity_level = self.analyze_text_complexity(full_text, text_statistics)
         
         # Beregn audience confidence scores
         confidence_scores = self.calculate_audience_confidence(full_text)
@@ -221,14 +412,18 @@ class ContentTagger:
             "summary": article.get('summary', ''),
             "target_audiences": target_audiences,
             "complexity_level": complexity_level,
+            "lix_score": text_statistics["lix"],
             "minepenge_tags": minepenge_tags,
             "tag_categories": tag_categories,
             "confidence_scores": confidence_scores,
             "original_data": {
-                "summary": article.get('summary', ''),
-                "content": article.get('content', ''),
+                # Brødteksten gemmes kun én gang i content store
+                "content_ref": self.content_store.put(content),
                 "author": article.get('author', ''),
                 "date_published": article.get('date_published', ''),
+                # Normaliseret ved scraping; ældre rå filer normaliseres her
+                "published_ts": article['published_ts'] if 'published_ts' in article else
+                normalize_date(article.get('date_published'), article.get('scraped_at')),
                 "word_count": article.get('word_count', 0),
                 "categories": article.get('categories', [])
             },
@@ -293,6 +488,9 @@ class ContentTagger:
         
         logger.info(f"Fandt {len(json_files)} JSON filer at behandle")
         
+        # Fuld tagging genopbygger ordindekset til senere delta-retagging
+        self.term_index = TermIndex(self.compiled_config())
+        
         tagged_files = []
         for filepath in json_files:
             try:
@@ -301,8 +499,71 @@ class ContentTagger:
             except Exception as e:
                 logger.error(f"Fejl ved behandling af {filepath}: {e}")
         
+        self.url_index.save()
+        self.term_index.save(self.term_index_path)
         return tagged_files
 
+    def retag_config_changes(self) -> Dict[str, Any]:
+        """
+        Retagger kun de artikler der berøres af ændringer i tag_config.json siden sidste kørsel.
+        Returnerer en rapport, eller None hvis en fuld tagging er nødvendig.
+        """
+        term_index = TermIndex.load(self.term_index_path)
+        if term_index is None or not term_index.config:
+            logger.warning("Intet ordindeks fundet - kør fuld tagging først")
+            return None
+
+        new_config = self.compiled_config()
+        affected_keywords, needs_full = diff_compiled_configs(term_index.config, new_config)
+        if needs_full:
+            logger.warning("Indstillinger eller målgrupper er ændret - fuld tagging er nødvendig")
+            return None
+
+        affected_ids = set()
+        for keyword in affected_keywords:
+            affected_ids |= term_index.articles_containing(keyword)
+        logger.info(f"{len(affected_keywords)} ændrede nøgleord berører {len(affected_ids)} artikler")
+
+        retagged = 0
+        updated_files = []
+        for filepath in sorted(glob(os.path.join(TAGGED_DIR, 'tagged_*_blog_posts.json'))):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            changed = False
+            metadata = data.get('metadata', {})
+            if metadata.get('tag_categories_used') != list(self.tag_categories.keys()):
+                metadata['tag_categories_used'] = list(self.tag_categories.keys())
+                changed = True
+
+            articles = data.get('articles', [])
+            for i, tagged in enumerate(articles):
+                if tagged.get('article_id') not in affected_ids:
+                    continue
+                # Genskab den rå artikel ud fra den taggede og tag den igen
+                original = tagged.get('original_data', {})
+                raw_article = dict(original, title=tagged.get('title', ''), summary=tagged.get('summary', ''),
+                                   url=tagged.get('url', ''), source=tagged.get('source', ''))
+                articles[i] = self.tag_article(raw_article)
+                retagged += 1
+                changed = True
+
+            if changed:
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                updated_files.append(filepath)
+
+        # Ordene i artiklerne er uændrede - kun den kompilerede konfiguration opdateres
+        term_index.config = new_config
+        term_index.save(self.term_index_path)
+        self.url_index.save()
+
+        return {
+            "changed_keywords": sorted(affected_keywords),
+            "articles_retagged": retagged,
+            "updated_files": updated_files
+        }
+
     def generate_summary_report(self, tagged_files: List[str]) -> Dict[str, Any]:
         """Genererer en samlet rapport over tagging processen"""
         total_articles = 0
@@ -348,6 +609,15 @@ def main():
     
     tagger = ContentTagger()
     
+    # Delta-retagging efter ændringer i tag_config.json
+    if '--delta' in sys.argv:
+        delta_report = tagger.retag_config_changes()
+        if delta_report is not None:
+            print(f"✅ Delta-retagging færdig: {delta_report['articles_retagged']} artikler retagget "
+                  f"({len(delta_report['changed_keywords'])} ændrede nøgleord)")
+            return
+        print("↩️ Falder tilbage til fuld tagging")
+    
     # Behandl alle filer
     tagged_files = tagger.process_all_files()
     
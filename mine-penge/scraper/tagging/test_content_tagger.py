@@ -0,0 +1,87 @@
+import json
+
+import content_tagger
+from content_store import ContentStore
+from content_tagger import ContentTagger, compute_text_statistics, CONFIG_PATH
+from url_index import SeenUrlIndex
+
+
+def test_counts_words_sentences_and_long_words():
+    stats = compute_text_statistics("Jeg sparer op. Pensionsopsparing er vigtig! Hvad med dig?")
+    assert stats == {"words": 9, "sentences": 3, "long_words": 1, "lix": 14.1}
+
+
+def test_last_sentence_without_terminator_counts():
+    assert compute_text_statistics("Første sætning. Anden sætning")["sentences"] == 2
+
+
+def test_dashes_and_curly_quotes_do_not_end_sentences():
+    assert compute_text_statistics("Han sagde – det er godt – og gik hjem.")["sentences"] == 1
+    assert compute_text_statistics("“Det er dyrt”, sagde hun, og det’s rigtigt.")["sentences"] == 1
+
+
+def test_letters_beyond_latin1_are_words():
+    stats = compute_text_statistics("Łukasz og Ōsaka sparer.")
+    assert stats["words"] == 4
+    assert stats["sentences"] == 1
+
+
+def test_ellipsis_ends_a_sentence():
+    assert compute_text_statistics("Det var dyrt… Men det gik.")["sentences"] == 2
+
+
+def test_empty_text():
+    assert compute_text_statistics("") == {"words": 0, "sentences": 0, "long_words": 0, "lix": 0.0}
+
+
+POSTS = [
+    {'url': 'https://a.dk/etf', 'title': 'Kom i gang med ETF', 'summary': 'Billig investering',
+     'content': 'En etf spreder din investering på mange aktier. Det er simpelt og billigt.', 'source': 'A'},
+    {'url': 'https://a.dk/indeksfond', 'title': 'Indeksfonde', 'summary': 'Passiv investering',
+     'content': 'En indeksfond følger markedet. Mange vælger en indeksfond til pensionen.', 'source': 'A'},
+    {'url': 'https://a.dk/pension', 'title': 'Pension i 30erne', 'summary': 'Start tidligt',
+     'content': 'Din pension vokser med renters rente. Tjek din ratepension og aldersopsparing.', 'source': 'A'},
+    {'url': 'https://a.dk/budget', 'title': 'Madbudget', 'summary': 'Spar på maden',
+     'content': 'Et budget for maden giver mindre madspild i familien.', 'source': 'A'},
+]
+TAG_FIELDS = ['minepenge_tags', 'tag_categories', 'target_audiences', 'complexity_level', 'confidence_scores']
+
+
+def _tagger(tmp_path, config):
+    config_path = tmp_path / 'tag_config.json'
+    config_path.write_text(json.dumps(config, ensure_ascii=False), encoding='utf-8')
+    index_path = tmp_path / 'seen_urls.json'
+    if not index_path.exists():
+        index_path.write_text(json.dumps({'urls': {}}), encoding='utf-8')
+    return ContentTagger(str(config_path), ContentStore(str(tmp_path / 'content')),
+                         SeenUrlIndex(str(index_path)), str(tmp_path / 'tag_terms.json'))
+
+
+def test_delta_retags_only_articles_with_the_changed_keyword(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(content_tagger, 'TAGGED_DIR', str(tmp_path / 'data' / 'tagged'))
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'test_blog_posts.json').write_text(json.dumps({'blog_posts': POSTS}), encoding='utf-8')
+    with open(CONFIG_PATH, encoding='utf-8') as f:
+        config = json.load(f)
+    [tagged_path] = _tagger(tmp_path, config).process_all_files()
+
+    investing = config['tag_categories']['Investering & Aktier']
+    investing[investing.index('etf')] = 'indeksfond'
+    tagger = _tagger(tmp_path, config)
+    retagged = []
+    tag_article = tagger.tag_article
+    monkeypatch.setattr(tagger, 'tag_article', lambda article: retagged.append(article['url']) or tag_article(article))
+    report = tagger.retag_config_changes()
+
+    assert report['changed_keywords'] == ['etf', 'indeksfond']
+    assert sorted(retagged) == ['https://a.dk/etf', 'https://a.dk/indeksfond']
+    with open(tagged_path, encoding='utf-8') as f:
+        delta = {article['url']: article for article in json.load(f)['articles']}
+    full = _tagger(tmp_path, config)
+    for post in POSTS:
+        expected = full.tag_article(post)
+        assert {field: delta[post['url']][field] for field in TAG_FIELDS} == \
+            {field: expected[field] for field in TAG_FIELDS}
+    assert 'indeksfond' in delta['https://a.dk/indeksfond']['minepenge_tags']
+    assert 'etf' not in delta['https://a.dk/etf']['minepenge_tags']
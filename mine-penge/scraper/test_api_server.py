@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from api_server import ApiServer, HttpProtocol, ResponseCache, handle_get, CACHE_ENTRY_OVERHEAD, QUERY_CACHE_ENTRY_SHARE
+from article_store import ArticleStore
+
+DAY = 86400
+ARTICLES = [
+    {'article_id': 'n1', 'title': 'Pension i 30erne', 'summary': 'Start tidligt', 'source': 'Nordnet Blog',
+     'minepenge_tags': ['pension', 'opsparing'], 'tag_categories': ['Pension'], 'published_ts': 1750000000},
+    {'article_id': 'u1', 'title': 'SU og budget', 'summary': 'Budget som studerende', 'source': 'Ungmedpenge Blog',
+     'minepenge_tags': ['budget'], 'tag_categories': ['SU & Studerende'], 'published_ts': 1750000000},
+    {'article_id': 'b1', 'title': 'Madbudget', 'summary': 'Spar på maden', 'source': 'Budgetnoerden Blog',
+     'minepenge_tags': ['budget', 'forbrug'], 'tag_categories': ['Forbrug'], 'published_ts': 1750000000 - DAY},
+    {'article_id': 'n2', 'title': 'Aktier for begyndere', 'summary': 'Investering og pension',
+     'source': 'Nordnet Blog', 'minepenge_tags': ['aktier', 'investering', 'pension'],
+     'tag_categories': ['Investering & Aktier'], 'published_ts': 1750000000 - 10 * DAY},
+    {'article_id': 'm1', 'title': 'Rente og lån', 'summary': 'Når renten stiger', 'source': 'Mitteldorf Blog',
+     'minepenge_tags': ['rente'], 'tag_categories': ['Rente'], 'published_ts': 1750000000 - 400 * DAY},
+    {'article_id': 'u2', 'title': 'Første job', 'summary': 'Løn og skat', 'source': 'Ungmedpenge Blog',
+     'minepenge_tags': [], 'tag_categories': [], 'published_ts': None},
+]
+
+
+def write_index(data_dir, articles, version, list_hash):
+    # Erstattes i ét trin som buildets write_bytes, så serveren ser en ny fil
+    path = data_dir / 'articles-index.json'
+    metadata = {'version': version, 'listHash': list_hash, 'totalArticles': len(articles)}
+    (data_dir / 'articles-index.json.tmp').write_text(json.dumps({'articles': articles, 'metadata': metadata},
+                                                                 ensure_ascii=False, separators=(',', ':')))
+    os.replace(data_dir / 'articles-index.json.tmp', path)
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp('data')
+    write_index(data_dir, ARTICLES, 3, 'abc')
+    return ArticleStore(str(data_dir), str(data_dir / 'index'))
+
+
+def get(store, target, if_none_match=''):
+    response = handle_get(store, target, if_none_match, ResponseCache())
+    return response.status, json.loads(response.body) if response.body else None
+
+
+def ids(body):
+    return [article['article_id'] for article in body['articles']]
+
+
+def test_full_list_is_newest_first_with_ties_by_source(store):
+    status, body = get(store, '/api/articles')
+    assert status == 200
+    assert ids(body) == ['n1', 'u1', 'b1', 'n2', 'm1', 'u2']
+    assert body['metadata']['version'] == 3
+
+
+def test_pages_slice_the_newest_order(store):
+    status, body = get(store, '/api/articles?page=2&pageSize=2')
+    assert status == 200
+    assert ids(body) == ['b1', 'n2']
+    assert body['pagination'] == {'currentPage': 2, 'pageSize': 2, 'totalArticles': 6, 'totalPages': 3,
+                                  'hasNextPage': True, 'hasPrevPage': True}
+
+
+def test_facet_and_date_filters(store):
+    assert ids(get(store, '/api/articles?source=Nordnet Blog')[1]) == ['n1', 'n2']
+    assert ids(get(store, '/api/articles?source=Nordnet Blog,Mitteldorf Blog&sort=oldest')[1]) == ['m1', 'n2', 'n1']
+    assert ids(get(store, f'/api/articles?from={1750000000 - 10 * DAY}&to={1750000000 - DAY}')[1]) == ['b1', 'n2']
+
+
+@pytest.mark.parametrize('sort', ['newest', 'oldest', 'source', 'relevance'])
+def test_cursor_pages_match_numbered_pages(store, sort):
+    paged = ids(get(store, f'/api/articles?sort={sort}&page=1&pageSize=100')[1])
+    walked = []
+    status, body = get(store, f'/api/articles?sort={sort}&cursor=&pageSize=4')
+    while True:
+        assert status == 200
+        walked += ids(body)
+        if not body['pagination']['hasNextPage']:
+            break
+        status, body = get(store, f"/api/articles?cursor={body['pagination']['nextCursor']}&pageSize=4")
+    assert walked == paged
+    assert len(walked) == len(ARTICLES)
+
+
+def test_relevance_sort_follows_the_scores(store):
+    _, body = get(store, '/api/articles/relevant?limit=100')
+    scores = [article['relevance_score'] for article in body['articles']]
+    assert scores == sorted(scores, reverse=True)
+    assert ids(get(store, '/api/articles?sort=relevance')[1]) == ids(body)
+
+
+@pytest.mark.parametrize('target', [
+    '/api/articles?sort=tilfældig',
+    '/api/articles?page=0',
+    '/api/articles?pageSize=101',
+    '/api/articles?from=igår',
+    '/api/articles?cursor=ikke-en-cursor',
+    '/api/articles?cursor=&page=2',
+    '/api/articles/relevant?min_score=nan',
+    '/api/articles/relevant?min_score=inf',
+    '/api/articles/relevant?min_score=høj',
+    '/api/articles/search?q=',
+])
+def test_bad_requests(store, target):
+    status, body = get(store, target)
+    assert status == 400
+    assert body['error']
+
+
+def test_cursor_from_another_sort_is_rejected(store):
+    cursor = get(store, '/api/articles?sort=oldest&cursor=&pageSize=1')[1]['pagination']['nextCursor']
+    assert get(store, f'/api/articles?sort=newest&cursor={cursor}')[0] == 400
+
+
+def test_relevant_respects_min_score_and_filters(store):
+    _, everything = get(store, '/api/articles/relevant?limit=100')
+    threshold = everything['articles'][2]['relevance_score']
+    _, body = get(store, f'/api/articles/relevant?min_score={threshold}&source=Nordnet Blog')
+    assert all(article['relevance_score'] >= threshold for article in body['articles'])
+    assert all(article['source'] == 'Nordnet Blog' for article in body['articles'])
+
+
+def test_search_ranks_hits(store):
+    status, body = get(store, '/api/articles/search?q=pension')
+    assert status == 200
+    assert set(ids(body)) == {'n1', 'n2'}
+    assert all(article['search_score'] > 0 for article in body['articles'])
+
+
+def test_etag_gives_304(store):
+    response = handle_get(store, '/api/articles?page=1', '', ResponseCache())
+    assert handle_get(store, '/api/articles?page=1', response.etag, ResponseCache()).status == 304
+
+
+def test_watch_swaps_to_a_newer_build_and_serves_its_etag(tmp_path):
+    write_index(tmp_path, ARTICLES, 3, 'abc')
+    server = ApiServer(ArticleStore(str(tmp_path), str(tmp_path / 'index')), reload_interval=0.01,
+                       pipeline_run_path=str(tmp_path / 'pipeline_run.json'))
+    old = handle_get(server.store, '/api/articles?source=Nordnet Blog', '', server.cache)
+    assert server.cache.entries
+
+    async def reload():
+        watcher = asyncio.get_running_loop().create_task(server.watch())
+        write_index(tmp_path, ARTICLES[:2], 4, 'def')
+        try:
+            for _ in range(500):
+                if server.store.version == 4:
+                    return
+                await asyncio.sleep(0.01)
+        finally:
+            watcher.cancel()
+
+    asyncio.run(reload())
+    assert server.store.version == 4 and server.reloads == 1 and server.feed.version == 4
+    # Svar fra det gamle build er glemt, og den gamle ETag giver ikke længere 304
+    assert not server.cache.entries
+    new = handle_get(server.store, '/api/articles?source=Nordnet Blog', old.etag, server.cache)
+    assert new.status == 200 and new.etag != old.etag and new.etag.startswith('"4-def-')
+    assert ids(json.loads(new.body)) == ['n1']
+    assert handle_get(server.store, '/api/articles?source=Nordnet Blog', new.etag, server.cache).status == 304
+
+
+def test_swap_is_skipped_while_the_build_is_unchanged(tmp_path):
+    write_index(tmp_path, ARTICLES, 3, 'abc')
+    server = ApiServer(ArticleStore(str(tmp_path), str(tmp_path / 'index')), reload_interval=0.01,
+                       pipeline_run_path=str(tmp_path / 'pipeline_run.json'))
+
+    async def idle():
+        watcher = asyncio.get_running_loop().create_task(server.watch())
+        await asyncio.sleep(0.1)
+        watcher.cancel()
+
+    asyncio.run(idle())
+    assert server.reloads == 0 and server.store.version == 3
+
+
+def test_response_cache_evicts_least_recently_used_by_bytes():
+    entry = 100 + CACHE_ENTRY_OVERHEAD
+    # Plads til præcis 32 svar; et enkelt svar må fylde op til 2 * entry (1/QUERY_CACHE_ENTRY_SHARE)
+    cache = ResponseCache(max_bytes=QUERY_CACHE_ENTRY_SHARE * 2 * entry)
+    keys = [f'k{n}' for n in range(32)]
+    for key in keys:
+        cache.put(key, b'x' * 100)
+    assert cache.bytes == cache.max_bytes and cache.evictions == 0
+    # Et opslag gør k0 nyest, så k1 er den der skubbes ud
+    assert cache.get('k0', 'articles') == b'x' * 100
+    cache.put('ny', b'y' * 100)
+    assert cache.evictions == 1 and 'k1' not in cache.entries and list(cache.entries)[-2:] == ['k0', 'ny']
+    assert cache.get('k1', 'articles') is None
+
+    # Et dobbelt så stort svar skubber to ud
+    cache.put('stor', b'z' * (2 * entry - CACHE_ENTRY_OVERHEAD))
+    assert cache.evictions == 3 and 'k2' not in cache.entries and 'k3' not in cache.entries
+    assert cache.bytes == cache.max_bytes
+    # Genindsættelse af en nøgle tæller kun den nye størrelse med
+    cache.put('ny', b'y' * 50)
+    assert cache.bytes == cache.max_bytes - 50 and list(cache.entries)[-1] == 'ny'
+    assert cache.hits == {'articles': 1} and cache.misses == {'articles': 1}
+
+
+def test_response_cache_skips_responses_too_large_to_share():
+    cache = ResponseCache(max_bytes=QUERY_CACHE_ENTRY_SHARE * 1000)
+    cache.put('stor', b'x' * (1000 - CACHE_ENTRY_OVERHEAD + 1))
+    cache.put('passer', b'x' * (1000 - CACHE_ENTRY_OVERHEAD))
+    assert list(cache.entries) == ['passer'] and cache.bytes == 1000
+    cache.reset()
+    assert not cache.entries and cache.bytes == 0
+
+
+def test_detail_and_unknown_paths(store):
+    assert get(store, '/api/articles/n2')[1]['title'] == 'Aktier for begyndere'
+    assert get(store, '/api/articles/findes-ikke')[0] == 404
+    assert get(store, '/api/andet')[0] == 404
+
+
+class _Transport:
+    def __init__(self):
+        self.written = b''
+        self.closed = False
+
+    def write(self, data):
+        self.written += data
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize('length', ['abc', '-5', '1_0', '²'])
+def test_malformed_content_length_gives_400_and_closes(length):
+    protocol = HttpProtocol(server=None)
+    transport = _Transport()
+    protocol.connection_made(transport)
+    protocol.data_received(f'POST /api/articles HTTP/1.1\r\nContent-Length: {length}\r\n\r\n'.encode('latin-1'))
+    assert transport.written.startswith(b'HTTP/1.1 400')
+    assert transport.closed
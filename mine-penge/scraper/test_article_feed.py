@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+from article_feed import ArticleFeed, sse_event, update_event, FEED_HISTORY, HEARTBEAT, MAX_BUFFERED_BYTES, MAX_EVENT_BYTES
+
+
+class _Store:
+    def __init__(self, version, articles):
+        self.version = version
+        self.articles = articles
+        self.metadata = {'version': version}
+
+
+class _Transport:
+    def __init__(self, buffered=0):
+        self.written = b''
+        self.buffered = buffered
+        self.closed = False
+
+    def write(self, data):
+        self.written += data
+
+    def is_closing(self):
+        return self.closed
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+    def close(self):
+        self.closed = True
+
+
+def _events(data):
+    """(event, id, data) for hver hændelse i en SSE-strøm"""
+    events = []
+    for block in data.decode('utf-8').split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], fields.get('id'), json.loads(fields['data'])))
+    return events
+
+
+def _articles(*ids):
+    return [{'article_id': article_id, 'title': f'Titel {article_id}'} for article_id in ids]
+
+
+def _publish_chain(feed, versions):
+    stores = [_Store(version, _articles(*[f'a{n}' for n in range(version)])) for version in versions]
+    for old, new in zip(stores, stores[1:]):
+        asyncio.run(feed.publish(new.version, update_event(old, new)))
+    return stores
+
+
+def test_backlog_chains_the_deltas_since_the_clients_version():
+    feed = ArticleFeed(1)
+    _publish_chain(feed, [1, 2, 3, 4])
+    events = _events(feed.backlog(2))
+    assert [(event, event_id, data['from'], data['to']) for event, event_id, data in events] == \
+        [('update', '3', 2, 3), ('update', '4', 3, 4)]
+    assert [added['article']['article_id'] for added in events[-1][2]['added']] == ['a3']
+    assert _events(feed.backlog(4)) == [('ready', '4', {'version': 4})]
+    assert _events(feed.backlog(None)) == [('ready', '4', {'version': 4})]
+
+
+def test_unknown_or_expired_versions_get_a_reset():
+    feed = ArticleFeed(1)
+    _publish_chain(feed, list(range(1, FEED_HISTORY + 3)))
+    newest = FEED_HISTORY + 2
+    assert _events(feed.backlog(99)) == [('reset', str(newest), {'version': newest})]
+    # Den ældste delta er skubbet ud af historikken, så version 1 kan ikke indhentes
+    assert _events(feed.backlog(1)) == [('reset', str(newest), {'version': newest})]
+    assert len(_events(feed.backlog(2))) == FEED_HISTORY
+
+
+def test_unchanged_version_publishes_nothing_and_large_deltas_become_a_reset():
+    assert update_event(_Store(2, _articles('a')), _Store(2, _articles('a'))) is None
+    big = _Store(3, [{'article_id': f'a{n}', 'title': 'x' * 1000} for n in range(MAX_EVENT_BYTES // 1000 + 1)])
+    assert _events(update_event(_Store(2, []), big)) == [('reset', '3', {'version': 3})]
+
+
+def test_broadcast_drops_a_slow_subscriber():
+    feed = ArticleFeed(1)
+    fast, slow, closing = _Transport(), _Transport(MAX_BUFFERED_BYTES + 1), _Transport()
+    for transport in (fast, slow, closing):
+        feed.subscribe(transport, 1)
+    closing.closed = True
+    _publish_chain(feed, [1, 2])
+
+    assert feed.subscribers == {fast} and feed.dropped == 1 and feed.sent == 1
+    assert slow.closed and [event for event, _, _ in _events(fast.written)] == ['ready', 'update']
+    assert [event for event, _, _ in _events(slow.written)] == ['ready']
+    # En klient præcis på grænsen beholdes
+    edge = _Transport(MAX_BUFFERED_BYTES)
+    feed.subscribe(edge, 2)
+    asyncio.run(feed.heartbeat())
+    assert edge in feed.subscribers and edge.written.endswith(HEARTBEAT)
+
+
+def test_sse_event_is_one_data_line():
+    event = sse_event('update', {'tekst': 'to\nlinjer'}, 7)
+    assert event == b'id: 7\nevent: update\ndata: {"tekst":"to\\nlinjer"}\n\n'
@@ -0,0 +1,263 @@
+import gzip
+import hashlib
+import json
+import multiprocessing
+import random
+import shutil
+import sys
+
+import pytest
+
+import build_articles
+
+# Build-artefakternes placering relativt til testens tmp-mappe
+BUILD_PATHS = {
+    'TAGGED_DIR': 'tagged',
+    'PUBLIC_DATA_DIR': 'public',
+    'INDEX_PATH': 'public/articles-index.json',
+    'PAGES_DIR': 'public/pages',
+    'DETAILS_DIR': 'public/articles',
+    'WIDGETS_DIR': 'public/widgets',
+    'SEARCH_INDEX_PATH': 'public/search-index.json',
+    'FACETS_PATH': 'public/facets.json',
+    'SORT_ORDERS_PATH': 'public/sort-orders.json',
+    'RELEVANCE_PATH': 'public/relevance.json',
+    'RELEASE_MANIFEST_PATH': 'public/manifest.json',
+    'DELTAS_DIR': 'public/deltas',
+    'DELTAS_INDEX_PATH': 'public/deltas/index.json',
+    'BUILD_CACHE_DIR': 'index/build',
+    'MANIFEST_PATH': 'index/build/manifest.json',
+    'STREAM_SIGNATURES_PATH': 'index/build/signatures.sqlite',
+    'NEAR_DUPLICATES_PATH': 'index/near_duplicates.json',
+    'FULLTEXT_DIR': 'index',
+}
+
+WORDS = ('opsparing budget aktier pension gæld rente bolig skat fradrag indeksfond obligationer '
+         'studerende børnefamilie madbudget forsikring kreditkort lån løn ferie bil').split()
+
+
+def _slim(index, **fields):
+    return dict({'article_id': f'a{index}', 'title': f'Titel {index}', 'source': f'Kilde {index % 3}',
+                 'minepenge_tags': [f'tag{index % 5}'], 'target_audiences': ['begynder'],
+                 'complexity_level': 'let' if index % 2 else 'middel'}, **fields)
+
+
+def _article(source, index, rng, **fields):
+    slug = f'{source.lower()}-{index}'
+    return dict({
+        'article_id': slug,
+        'title': f'{source} artikel {index}',
+        'source': f'{source} Blog',
+        'url': f'https://{source.lower()}.dk/blog/{slug}/',
+        'summary': f'Resumé af artikel {index} fra {source}',
+        'minepenge_tags': rng.sample(WORDS[:8], 2),
+        'tag_categories': ['Opsparing & Budget'],
+        'target_audiences': ['studerende'] if index % 2 else ['børnefamilier'],
+        'complexity_level': 'begynder' if index % 3 else 'øvet',
+        'original_data': {
+            'content': ' '.join(rng.choice(WORDS) for _ in range(120)),
+            'published_ts': 1_700_000_000 + rng.randrange(10_000_000),
+        },
+    }, **fields)
+
+
+def _write_source(tmp_path, source, articles):
+    path = tmp_path / 'tagged' / f'tagged_{source.lower()}_blog_posts.json'
+    path.write_text(json.dumps({'articles': articles}, ensure_ascii=False), encoding='utf-8')
+
+
+def _write_sources(tmp_path, seed=1, counts=None):
+    rng = random.Random(seed)
+    counts = counts or {'Nordnet': 30, 'Mitteldorf': 25, 'Moneypenny': 12}
+    sources = {source: [_article(source, index, rng) for index in range(count)] for source, count in counts.items()}
+    for source, articles in sources.items():
+        _write_source(tmp_path, source, articles)
+    return sources
+
+
+@pytest.fixture
+def build(tmp_path, monkeypatch):
+    """Kører build_articles.main() med de givne argumenter mod en tmp-mappe"""
+    for name, relative in BUILD_PATHS.items():
+        monkeypatch.setattr(build_articles, name, str(tmp_path / relative))
+    (tmp_path / 'tagged').mkdir()
+
+    def run(*args):
+        monkeypatch.setattr(sys, 'argv', ['build_articles.py', *args])
+        build_articles.main()
+        return _read(tmp_path / 'public' / 'articles-index.json')
+    return run
+
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_first_page_summarizes_filter_values_of_every_page(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_articles, 'PAGES_DIR', str(tmp_path))
+    articles = [_slim(index) for index in range(45)]
+    articles[44]['minepenge_tags'] = ['kun-sidst']
+    articles[44]['target_audiences'] = None
+    build_articles.write_pages(articles)
+
+    first = _read(tmp_path / 'page-1.json')
+    assert [article['article_id'] for article in first['articles']] == [f'a{index}' for index in range(20)]
+    assert first['pagination']['totalPages'] == 3 and first['pagination']['totalArticles'] == 45
+    assert first['summary'] == {
+        'tags': ['kun-sidst', 'tag0', 'tag1', 'tag2', 'tag3', 'tag4'],
+        'audiences': ['begynder'],
+        'complexities': ['let', 'middel'],
+        'sources': ['Kilde 0', 'Kilde 1', 'Kilde 2'],
+    }
+    assert 'summary' not in _read(tmp_path / 'page-2.json')
+    assert [article['article_id'] for article in _read(tmp_path / 'page-3.json')['articles']] == \
+        [f'a{index}' for index in range(40, 45)]
+
+
+def test_streamed_pages_match_in_memory_pages(tmp_path, monkeypatch):
+    articles = [_slim(index) for index in range(25)]
+    monkeypatch.setattr(build_articles, 'PAGES_DIR', str(tmp_path / 'memory'))
+    build_articles.write_pages(articles)
+    monkeypatch.setattr(build_articles, 'PAGES_DIR', str(tmp_path / 'stream'))
+    build_articles.write_pages(iter(articles), total=len(articles))
+    for name in ('page-1.json', 'page-2.json'):
+        assert (tmp_path / 'memory' / name).read_bytes() == (tmp_path / 'stream' / name).read_bytes()
+
+
+def test_incremental_rebuild_only_touches_the_changed_source(tmp_path, monkeypatch, build):
+    sources = _write_sources(tmp_path)
+    build('--jobs=1')
+    cache = tmp_path / 'index' / 'build'
+    runs = {path.name: path.stat().st_mtime_ns for path in cache.glob('*.run.json')}
+    assert sorted(runs) == ['mitteldorf.run.json', 'moneypenny.run.json', 'nordnet.run.json']
+
+    rebuilt = []
+    build_source_run = build_articles.build_source_run
+    monkeypatch.setattr(build_articles, 'build_source_run',
+                        lambda path, name, *args: rebuilt.append(name) or build_source_run(path, name, *args))
+    analyzed = []
+    analyze = build_articles.analyze
+    monkeypatch.setattr(build_articles, 'analyze', lambda fields: analyzed.append(fields[0]) or analyze(fields))
+    sources['Moneypenny'].append(_article('Moneypenny', 99, random.Random(9)))
+    _write_source(tmp_path, 'Moneypenny', sources['Moneypenny'])
+    incremental = build('--jobs=1')
+
+    assert rebuilt == ['moneypenny']
+    # Fuldtekstindekset flettes af kørslerne; kun den ændrede kildes artikler tokeniseres igen
+    assert sorted(analyzed) == sorted(f'Moneypenny artikel {index}' for index in list(range(12)) + [99])
+    assert {path.name: path.stat().st_mtime_ns for path in cache.glob('*.run.json')
+            if path.name != 'moneypenny.run.json'} == {name: mtime for name, mtime in runs.items()
+                                                       if name != 'moneypenny.run.json'}
+    assert 'moneypenny-99' in [article['article_id'] for article in incremental['articles']]
+
+    # Uændrede input springer buildet over; --full giver samme liste som den inkrementelle
+    rebuilt.clear()
+    assert build('--jobs=1')['metadata']['version'] == incremental['metadata']['version']
+    assert rebuilt == []
+    fulltext = {path.name: path.read_bytes() for path in (tmp_path / 'index').glob('fulltext.*')}
+    assert build('--jobs=1', '--full')['articles'] == incremental['articles']
+    assert {path.name: path.read_bytes() for path in (tmp_path / 'index').glob('fulltext.*')} == fulltext
+    assert sorted(rebuilt) == ['mitteldorf', 'moneypenny', 'nordnet']
+
+
+@pytest.mark.parametrize('mode', [[], ['--stream']])
+def test_articles_without_published_ts_are_undated_and_not_parsed(tmp_path, build, capsys, mode):
+    rng = random.Random(4)
+    articles = [_article('Nordnet', index, rng) for index in range(3)]
+    # Fra før published_ts fandtes: datoen må ikke parses i buildet
+    del articles[1]['original_data']['published_ts']
+    articles[1]['original_data']['date_published'] = '5. juli 2025'
+    _write_source(tmp_path, 'Nordnet', articles)
+
+    listed = build('--jobs=1', *mode)['articles']
+    assert listed[-1]['article_id'] == 'nordnet-1'
+    assert listed[-1]['published_ts'] is None and listed[-1]['date_published'] == '5. juli 2025'
+    assert '1 articles in nordnet have no published_ts' in capsys.readouterr().out
+
+
+def test_release_filenames_match_their_content_hashes(tmp_path, build):
+    sources = _write_sources(tmp_path)
+    build('--jobs=1', '--release')
+    public = tmp_path / 'public'
+    first = _read(public / 'manifest.json')['artifacts']
+    assert sorted(first) == ['articles-index.json', 'facets.json', 'relevance.json',
+                             'search-index.json', 'sort-orders.json']
+    for name, info in first.items():
+        payload = (public / info['file']).read_bytes()
+        stem, ext = name.rsplit('.', 1)
+        assert info['file'] == f'{stem}.{hashlib.sha256(payload).hexdigest()[:10]}.{ext}'
+        assert payload == (public / name).read_bytes() and info['bytes'] == len(payload)
+        assert gzip.decompress((public / (info['file'] + '.gz')).read_bytes()) == payload
+
+    # En ny release beholder den forrige udgaves hashede filer til klienter med det gamle manifest
+    sources['Nordnet'][0]['title'] = 'Ny titel'
+    _write_source(tmp_path, 'Nordnet', sources['Nordnet'])
+    build('--jobs=1', '--release')
+    second = _read(public / 'manifest.json')['artifacts']
+    assert second['articles-index.json']['file'] != first['articles-index.json']['file']
+    for info in list(first.values()) + list(second.values()):
+        assert (public / info['file']).exists()
+
+
+def _artifacts(public):
+    return {str(path.relative_to(public)): path.read_bytes() for path in sorted(public.rglob('*.json'))
+            if path.name not in ('articles-index.json', 'manifest.json')}
+
+
+def test_streamed_build_matches_the_in_memory_build(tmp_path, build):
+    sources = _write_sources(tmp_path)
+    # Tværgående og næsten-dubletter skal fjernes ens i begge buildtyper
+    sources['Mitteldorf'].append(dict(sources['Nordnet'][3], source='Mitteldorf Blog'))
+    near = dict(sources['Nordnet'][5], article_id='mitteldorf-near', url='https://mitteldorf.dk/blog/kopi/')
+    near['original_data'] = dict(near['original_data'], content=near['original_data']['content'] + ' ekstra')
+    sources['Mitteldorf'].append(near)
+    _write_source(tmp_path, 'Mitteldorf', sources['Mitteldorf'])
+
+    in_memory = build('--jobs=1')
+    public = tmp_path / 'public'
+    memory_artifacts = _artifacts(public)
+    shutil.rmtree(public)
+    shutil.rmtree(tmp_path / 'index')
+    streamed = build('--stream', '--memory-mb=1')
+
+    ids = [article['article_id'] for article in streamed['articles']]
+    assert ('mitteldorf-near' in ids) != ('nordnet-5' in ids) and len(ids) == len(set(ids)) == 67
+    assert streamed['articles'] == in_memory['articles']
+    for key in ('version', 'listHash', 'totalArticles', 'dateRange', 'articlesPerSource'):
+        assert streamed['metadata'][key] == in_memory['metadata'][key]
+    assert _artifacts(public) == memory_artifacts
+
+
+# Arbejderprocesserne skal arve de omdirigerede stier
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='kræver fork')
+def test_parallel_build_matches_the_serial_build(tmp_path, build):
+    _write_sources(tmp_path)
+    serial = build('--jobs=1')
+    public, cache = tmp_path / 'public', tmp_path / 'index'
+    serial_artifacts = _artifacts(public)
+    serial_cache = {path.name: path.read_bytes() for path in sorted(cache.rglob('*.run.json'))}
+    serial_signatures = _read(cache / 'near_duplicates.json')
+    shutil.rmtree(public)
+    shutil.rmtree(cache)
+
+    parallel = build('--jobs=3')
+    assert parallel['articles'] == serial['articles']
+    assert _artifacts(public) == serial_artifacts
+    assert {path.name: path.read_bytes() for path in sorted(cache.rglob('*.run.json'))} == serial_cache
+    assert _read(cache / 'near_duplicates.json') == serial_signatures
+
+
+def test_widget_files_are_written_per_slug_and_stale_ones_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_articles, 'WIDGETS_DIR', str(tmp_path))
+    (tmp_path / 'gammelt-tema-3.json').write_text('{}', encoding='utf-8')
+    articles = [_slim(index, minepenge_tags=['pension'] if index % 2 else ['opsparing']) for index in range(30)]
+    info = build_articles.write_widgets(articles, [40 + index for index in range(30)])
+
+    names = sorted(path.name for path in tmp_path.glob('*.json'))
+    assert info['count'] == len(names) == 80 and 'gammelt-tema-3.json' not in names
+    pension = _read(tmp_path / 'pension-4.json')
+    assert [article['article_id'] for article in pension['articles']] == ['a29', 'a27', 'a25', 'a23']
+    assert pension['articles'][0] == {'article_id': 'a29', 'title': 'Titel 29', 'summary': None,
+                                      'source': 'Kilde 2', 'url': None, 'date_published': None,
+                                      'relevance_score': 6.9}
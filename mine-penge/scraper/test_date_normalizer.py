@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+
+from date_normalizer import normalize_date, article_timestamp, LOCAL_TZ
+
+
+def _local(year, month, day):
+    return int(datetime(year, month, day, tzinfo=LOCAL_TZ).timestamp())
+
+
+def test_iso_timestamp_with_offset():
+    expected = int(datetime(2025, 5, 16, 12, 29, 8, tzinfo=timezone.utc).timestamp())
+    assert normalize_date('2025-05-16T14:29:08+02:00') == expected
+    assert normalize_date('2025-05-16T12:29:08Z') == expected
+
+
+def test_naive_dates_are_danish_local_time():
+    assert normalize_date('2025-05-16') == _local(2025, 5, 16)
+
+
+def test_rfc_2822_from_feeds():
+    assert normalize_date('Mon, 16 Jun 2025 08:00:00 +0200') == \
+        int(datetime(2025, 6, 16, 6, 0, tzinfo=timezone.utc).timestamp())
+
+
+def test_numeric_danish_dates():
+    assert normalize_date('05.07.2025') == _local(2025, 7, 5)
+    assert normalize_date('5/7-2025') == _local(2025, 7, 5)
+
+
+def test_danish_month_names():
+    assert normalize_date('5. juli 2025') == _local(2025, 7, 5)
+    assert normalize_date('31. August 2024') == _local(2024, 8, 31)
+    assert normalize_date('Udgivet 2. sept. 2023 af redaktionen') == _local(2023, 9, 2)
+
+
+def test_yearless_dates_take_the_latest_year_on_or_before_the_reference():
+    assert normalize_date('13. jan.', datetime(2025, 3, 1)) == _local(2025, 1, 13)
+    assert normalize_date('9. maj', datetime(2025, 3, 1)) == _local(2024, 5, 9)
+    assert normalize_date('1. marts', '2025-03-01T10:00:00') == _local(2025, 3, 1)
+
+
+def test_yearless_dates_without_reference_are_rejected():
+    assert normalize_date('9. maj') is None
+    assert normalize_date('9. maj', 'ikke en dato') is None
+
+
+def test_unreadable_dates():
+    for value in (None, '', '   ', 'i går', '31. februar 2025', '32.13.2025'):
+        assert normalize_date(value) is None
+
+
+def test_article_timestamp_prefers_the_stored_value():
+    article = {'original_data': {'published_ts': None, 'date_published': '2025-05-16'}}
+    assert article_timestamp(article) is None
+
+
+def test_article_timestamp_normalizes_older_files_with_tagged_at():
+    article = {'tagged_at': '2025-03-01T09:00:00', 'original_data': {'date_published': '9. maj'}}
+    assert article_timestamp(article) == _local(2024, 5, 9)
@@ -0,0 +1,62 @@
+import random
+
+from deltas import compute_delta, apply_delta
+
+
+def _articles(*ids, **overrides):
+    return [dict({'article_id': article_id, 'title': f'Titel {article_id}'}, **overrides.get(article_id, {}))
+            for article_id in ids]
+
+
+def test_unchanged_list_gives_an_empty_delta():
+    articles = _articles('a', 'b', 'c')
+    assert compute_delta(articles, articles) == {'removed': [], 'changed': [], 'added': []}
+
+
+def test_new_articles_are_added_at_their_position():
+    old = _articles('b', 'c')
+    new = _articles('a', 'b', 'x', 'c')
+    delta = compute_delta(old, new)
+    assert delta['removed'] == [] and delta['changed'] == []
+    assert [(entry['position'], entry['article']['article_id']) for entry in delta['added']] == [(0, 'a'), (2, 'x')]
+    assert apply_delta(old, delta) == new
+
+
+def test_removed_and_changed_articles():
+    old = _articles('a', 'b', 'c')
+    new = _articles('a', 'c', c={'title': 'Rettet titel'})
+    delta = compute_delta(old, new)
+    assert delta['removed'] == ['b']
+    assert delta['changed'] == [new[1]]
+    assert apply_delta(old, delta) == new
+
+
+def test_moved_article_is_sent_as_removed_and_added():
+    old = _articles('a', 'b', 'c', 'd')
+    new = _articles('d', 'a', 'b', 'c')
+    delta = compute_delta(old, new)
+    assert delta['removed'] == ['d']
+    assert [entry['position'] for entry in delta['added']] == [0]
+    assert apply_delta(old, delta) == new
+
+
+def test_apply_does_not_modify_the_old_list():
+    old = _articles('a', 'b')
+    snapshot = [dict(article) for article in old]
+    apply_delta(old, compute_delta(old, _articles('b', 'c')))
+    assert old == snapshot
+
+
+def test_random_edits_round_trip():
+    rng = random.Random(7)
+    for _ in range(200):
+        old = _articles(*rng.sample(range(40), rng.randint(0, 25)))
+        kept = [dict(article) for article in old if rng.random() > 0.2]
+        for article in kept:
+            if rng.random() < 0.2:
+                article['title'] += ' (opdateret)'
+        if rng.random() < 0.3:
+            rng.shuffle(kept)
+        for new_id in rng.sample(range(40, 80), rng.randint(0, 5)):
+            kept.insert(rng.randint(0, len(kept)), {'article_id': new_id, 'title': 'Ny'})
+        assert apply_delta(old, compute_delta(old, kept)) == kept
@@ -0,0 +1,73 @@
+import json
+import random
+
+from facets import build_facets, FacetBuilder, FacetIndex, FACET_FIELDS
+
+SOURCES = ['Nordnet Blog', 'Mitteldorf Blog', 'Moneypenny Blog']
+CATEGORIES = ['investering', 'opsparing', 'gæld', 'pension', 'budget']
+AUDIENCES = ['begynder', 'studerende', 'børnefamilie', 'pensionist']
+COMPLEXITIES = ['let', 'middel', 'avanceret']
+
+
+def _random_articles(rng, count):
+    return [{
+        'source': rng.choice(SOURCES),
+        'tag_categories': rng.sample(CATEGORIES, rng.randint(0, 3)),
+        'target_audiences': rng.sample(AUDIENCES, rng.randint(0, 2)),
+        'complexity_level': rng.choice(COMPLEXITIES + [None]),
+    } for _ in range(count)]
+
+
+def _values(article, facet):
+    value = article.get(FACET_FIELDS[facet])
+    if not value:
+        return set()
+    return {value} if isinstance(value, str) else set(value)
+
+
+def _naive_filter(articles, filters, exclude=None):
+    return [position for position, article in enumerate(articles)
+            if all(facet == exclude or not selected or _values(article, facet) & set(selected)
+                   for facet, selected in filters.items())]
+
+
+def _random_filters(rng):
+    choices = {'source': SOURCES, 'category': CATEGORIES, 'audience': AUDIENCES, 'complexity': COMPLEXITIES}
+    return {facet: rng.sample(values, rng.randint(1, 2))
+            for facet, values in choices.items() if rng.random() < 0.5}
+
+
+def test_filter_and_counts_match_a_naive_filter():
+    rng = random.Random(3)
+    for count in (1, 7, 64, 300):
+        articles = _random_articles(rng, count)
+        # Gennem JSON, som frontend og API læser indekset
+        index = FacetIndex(json.loads(json.dumps(build_facets(articles))))
+        for _ in range(40):
+            filters = _random_filters(rng)
+            assert index.filter(filters) == _naive_filter(articles, filters)
+            for facet, counts in index.counts(filters).items():
+                matching = _naive_filter(articles, filters, exclude=facet)
+                for value, value_count in counts.items():
+                    assert value_count == sum(value in _values(articles[p], facet) for p in matching)
+
+
+def test_sparse_values_use_id_lists_and_dense_values_bitsets():
+    articles = [{'source': 'Stor kilde'} for _ in range(500)]
+    articles[250]['source'] = 'Lille kilde'
+    sources = build_facets(articles)['facets']['source']
+    assert list(sources) == ['Stor kilde', 'Lille kilde']
+    assert 'bits' in sources['Stor kilde'] and sources['Stor kilde']['count'] == 499
+    assert 'ids' in sources['Lille kilde'] and sources['Lille kilde']['count'] == 1
+    assert FacetIndex(build_facets(articles)).filter({'source': 'Lille kilde'}) == [250]
+
+
+def test_builder_matches_build_facets_and_limit_keeps_the_first_positions():
+    articles = _random_articles(random.Random(5), 120)
+    builder = FacetBuilder()
+    for position, article in enumerate(articles):
+        builder.add(position, article)
+    assert builder.build() == build_facets(articles)
+    index = FacetIndex(build_facets(articles))
+    assert index.filter({'source': 'Nordnet Blog'}, limit=5) == _naive_filter(articles, {'source': ['Nordnet Blog']})[:5]
+    assert index.filter({'source': 'Ukendt kilde'}) == []
@@ -0,0 +1,112 @@
+import math
+import random
+
+import pytest
+
+from fulltext_index import (FullTextBuilder, FullTextIndex, article_fields, parse_query, BM25_B, BM25_K1, FIELDS,
+                            IMPACT_SCALE)
+from search_index import tokenize
+
+DOCS = [
+    {'title': 'Pension for begyndere', 'summary': 'Kom godt i gang', 'body': 'Pension og opsparing hver måned.'},
+    {'title': 'Budget', 'summary': 'Få styr på budgettet', 'body': 'Et budget gør opsparing lettere. Pension nævnes.'},
+    {'title': 'Aktier og investering', 'summary': 'Investeringer for alle', 'body': 'Aktier giver afkast over tid.'},
+    {'title': 'Renter', 'summary': 'Når renten stiger', 'body': 'Pensionen og renten hænger sammen med opsparing.'},
+]
+
+
+def _index(docs=DOCS):
+    builder = FullTextBuilder()
+    for position, doc in enumerate(docs):
+        builder.add(position, article_fields(doc, doc['body']))
+    return builder.build()
+
+
+def _docs(result):
+    return [doc for doc, _ in result['hits']]
+
+
+def test_parse_query():
+    assert parse_query('pension "høj rente" invest*') == [
+        ('term', ['pension']), ('phrase', ['hoej', 'rent']), ('prefix', ['invest'])]
+
+
+def test_all_terms_must_match():
+    index = _index()
+    assert sorted(_docs(index.search('pension opsparing'))) == [0, 1, 3]
+    assert _docs(index.search('pension aktier')) == []
+    assert index.search('ukendtord')['total'] == 0
+
+
+def test_title_weight_ranks_title_matches_first():
+    result = _index().search('pension')
+    assert _docs(result)[0] == 0
+    assert result['total'] == 3 and result['exact']
+
+
+def test_phrase_needs_adjacent_words_in_one_field():
+    index = _index()
+    assert _docs(index.search('"pension og opsparing"')) == [0]
+    assert _docs(index.search('"begyndere kom"')) == []
+
+
+def test_prefix_matches_stems():
+    assert sorted(_docs(_index().search('invest*'))) == [2]
+
+
+def test_allowed_bitset_filters_hits_and_total():
+    result = _index().search('opsparing', allowed=0b1010)
+    assert sorted(_docs(result)) == [1, 3]
+    assert result['total'] == 2
+
+
+def _bm25(docs, query_terms):
+    """Reference-BM25F over felternes vægtede termfrekvenser, uden kvantisering"""
+    fields = [[tokenize(text) for text in article_fields(doc, doc['body'])] for doc in docs]
+    lengths = [sum(weight * len(tokens) for (_, weight), tokens in zip(FIELDS, doc)) for doc in fields]
+    average = sum(lengths) / len(lengths)
+    scores = {}
+    for position, doc in enumerate(fields):
+        tfs = [sum(weight * tokens.count(term) for (_, weight), tokens in zip(FIELDS, doc)) for term in query_terms]
+        if not all(tfs):
+            continue
+        score = 0.0
+        for term, tf in zip(query_terms, tfs):
+            df = sum(1 for other in fields if any(term in tokens for tokens in other))
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[position] / average)
+            score += idf * (BM25_K1 + 1) * tf / (tf + norm)
+        scores[position] = score
+    return scores
+
+
+def test_scores_match_reference_bm25():
+    expected = _bm25(DOCS, ['pension', 'opsparing'])
+    hits = _index().search('pension opsparing')['hits']
+    assert sorted(doc for doc, _ in hits) == sorted(expected)
+    for doc, score in hits:
+        # Hver terms impact er afrundet til 1/IMPACT_SCALE
+        assert score == pytest.approx(expected[doc], abs=2 * 0.5 / IMPACT_SCALE)
+
+
+def test_early_termination_returns_the_same_top_k_as_a_full_ranking():
+    rng = random.Random(3)
+    words = 'pension opsparing aktie rente budget gæld skat bolig fond afkast'.split()
+    docs = [{'title': rng.choice(words), 'summary': '',
+             'body': ' '.join(rng.choice(words) for _ in range(rng.randint(5, 60)))} for _ in range(300)]
+    index = _index(docs)
+    for query in ('pension', 'pension rente', 'gæld afkast budget'):
+        full = index.search(query, limit=1000)['hits']
+        assert index.search(query, limit=10)['hits'] == full[:10]
+        assert index.search(query, limit=10, offset=10)['hits'] == full[10:20]
+
+
+def test_written_index_loads_with_the_same_results(tmp_path):
+    builder = FullTextBuilder()
+    for position, doc in enumerate(DOCS):
+        builder.add(position, article_fields(doc, doc['body']))
+    builder.write(str(tmp_path), list_version=7, list_hash='abc')
+    loaded = FullTextIndex.load(str(tmp_path))
+    assert (loaded.list_version, loaded.list_hash, loaded.doc_count) == (7, 'abc', len(DOCS))
+    assert loaded.search('pension opsparing') == _index().search('pension opsparing')
+    assert FullTextIndex.load(str(tmp_path / 'mangler')) is None
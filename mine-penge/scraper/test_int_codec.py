@@ -0,0 +1,44 @@
+import base64
+
+from int_codec import encode_varints, decode_varints, encode_sorted, decode_sorted, encode_deltas, decode_deltas
+
+
+def test_varints_round_trip_across_byte_boundaries():
+    values = [0, 1, 127, 128, 255, 300, 16383, 16384, 2 ** 32 - 1, 2 ** 40]
+    assert decode_varints(encode_varints(values)) == values
+
+
+def test_varints_use_seven_bits_per_byte():
+    assert base64.b64decode(encode_varints([127])) == b'\x7f'
+    assert base64.b64decode(encode_varints([128])) == b'\x80\x01'
+    assert base64.b64decode(encode_varints([300])) == b'\xac\x02'
+
+
+def test_empty_lists():
+    assert encode_varints([]) == ''
+    assert decode_varints('') == []
+    assert decode_sorted(encode_sorted([])) == []
+    assert decode_deltas(encode_deltas([])) == []
+
+
+def test_sorted_round_trip_with_gaps_and_repeats():
+    values = [0, 0, 3, 4, 1000, 1001, 70000]
+    assert decode_sorted(encode_sorted(values)) == values
+
+
+def test_sorted_small_gaps_cost_one_byte_each():
+    assert len(base64.b64decode(encode_sorted(range(100, 200)))) == 1 + 99
+
+
+def test_deltas_round_trip_for_a_permutation():
+    values = [5, 4, 3, 9, 0, 1, 2, 100000, 7, 6]
+    assert decode_deltas(encode_deltas(values)) == values
+
+
+def test_deltas_descending_runs_cost_one_byte_each():
+    assert len(base64.b64decode(encode_deltas([50] + list(range(49, -1, -1))))) == 51
+
+
+def test_encoders_accept_generators():
+    assert decode_sorted(encode_sorted(n * 3 for n in range(10))) == [n * 3 for n in range(10)]
+    assert decode_deltas(encode_deltas(reversed(range(10)))) == list(reversed(range(10)))
@@ -0,0 +1,85 @@
+import json
+
+from metrics import (MetricsText, PipelineRun, RequestMetrics, add_pipeline_metrics, count_errors,
+                     load_pipeline_run, source_name, LATENCY_BUCKETS)
+
+
+def test_counters_and_escaped_labels():
+    text = MetricsText()
+    text.add('minepenge_test_total', 'counter', 'Tæller', [({'endpoint': 'search', 'q': 'a"b\\c\nd'}, 3)])
+    text.value('minepenge_test_ratio', 'gauge', 'Andel', 0.25)
+    text.value('minepenge_test_missing', 'gauge', 'Udelades uden værdi', None)
+    text.add('minepenge_test_empty', 'gauge', 'Udelades uden samples', [])
+    assert text.render().decode('utf-8') == (
+        '# HELP minepenge_test_total Tæller\n'
+        '# TYPE minepenge_test_total counter\n'
+        'minepenge_test_total{endpoint="search",q="a\\"b\\\\c\\nd"} 3.0\n'
+        '# HELP minepenge_test_ratio Andel\n'
+        '# TYPE minepenge_test_ratio gauge\n'
+        'minepenge_test_ratio 0.25\n'
+    )
+    assert MetricsText.CONTENT_TYPE.startswith('text/plain; version=0.0.4')
+
+
+def test_histogram_buckets_are_cumulative():
+    requests = RequestMetrics()
+    for seconds in (0.0001, 0.0005, 0.003, 10.0):
+        requests.observe('articles', 200, seconds)
+    requests.observe('articles', 304, 0.0002)
+    text = MetricsText()
+    text.histograms('minepenge_test_seconds', 'Latens', requests.latency, 'endpoint')
+    lines = text.render().decode('utf-8').splitlines()
+    buckets = [line for line in lines if line.startswith('minepenge_test_seconds_bucket')]
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    assert buckets[0] == 'minepenge_test_seconds_bucket{endpoint="articles",le="0.0005"} 3'
+    assert buckets[3] == 'minepenge_test_seconds_bucket{endpoint="articles",le="0.005"} 4'
+    assert buckets[-1] == 'minepenge_test_seconds_bucket{endpoint="articles",le="+Inf"} 5'
+    assert lines[-1] == 'minepenge_test_seconds_count{endpoint="articles"} 5'
+    assert requests.responses == {('articles', 200): 4, ('articles', 304): 1}
+
+
+def test_pipeline_run_carries_the_last_success_over_a_failed_run(tmp_path):
+    path = str(tmp_path / 'tagged' / 'pipeline_run.json')
+    assert load_pipeline_run(path) is None
+
+    first = PipelineRun()
+    with first.stage('scraping'):
+        pass
+    first.record_source('scraperMoneypenny.py', 1.23456, True, 0)
+    first.save(True, path)
+    saved = load_pipeline_run(path)
+    assert saved['success'] and saved['lastSuccess'] == saved['finished']
+    assert saved['sources'] == {'moneypenny': {'script': 'scraperMoneypenny.py', 'seconds': 1.235,
+                                               'success': True, 'errors': 0}}
+    assert set(saved['stages']) == {'scraping'}
+
+    failed = PipelineRun()
+    failed.record_source('scraperNordNet.py', 2.0, False, 3)
+    failed.save(False, path)
+    run = load_pipeline_run(path)
+    assert not run['success'] and run['lastSuccess'] == saved['finished']
+    assert run['finished'] >= saved['finished'] and list(run['sources']) == ['nordnet']
+
+    text = MetricsText()
+    add_pipeline_metrics(text, run)
+    rendered = text.render().decode('utf-8')
+    assert f"minepenge_pipeline_last_success_timestamp_seconds {float(saved['finished'])!r}" in rendered
+    assert 'minepenge_pipeline_last_run_success 0.0' in rendered
+    assert 'minepenge_pipeline_source_errors{source="nordnet"} 3.0' in rendered
+
+
+def test_unreadable_run_file_counts_as_no_run(tmp_path):
+    path = tmp_path / 'pipeline_run.json'
+    path.write_text('{ikke json', encoding='utf-8')
+    assert load_pipeline_run(str(path)) is None
+    PipelineRun().save(True, str(path))
+    assert json.loads(path.read_text(encoding='utf-8'))['success']
+    text = MetricsText()
+    add_pipeline_metrics(text, None)
+    assert text.lines == []
+
+
+def test_source_names_and_error_lines():
+    assert source_name('scrapers/scraperMoneypenny.py') == 'moneypenny'
+    assert source_name('update_all_data.py') == 'update_all_data'
+    assert count_errors(['2025-01-01 - ERROR - timeout', '❌ Fejl', 'ok', '2025 - INFO - fint']) == 2
@@ -0,0 +1,111 @@
+import random
+
+from near_duplicates import (DiskSignatureCache, NearDuplicateIndex, article_digest, compute_signature,
+                             estimate_similarity, remove_near_duplicates, NUM_PERM)
+from content_store import ContentStore
+
+WORDS = ('pension opsparing aktie fond rente budget gæld skat bolig lån indkomst udbytte afkast risiko '
+         'portefølje investering frihed forbrug kredit konto').split()
+
+
+def _text(seed, length=300):
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+
+def _edited(text, changes):
+    words = text.split()
+    for i in range(changes):
+        words[i * 37 % len(words)] = 'ændret'
+    return ' '.join(words)
+
+
+def test_signature_is_deterministic_and_full_width():
+    signature = compute_signature(_text(1))
+    assert len(signature) == NUM_PERM
+    assert signature == compute_signature(_text(1))
+
+
+def test_similarity_separates_near_duplicates_from_different_texts():
+    text = _text(1)
+    assert estimate_similarity(compute_signature(text), compute_signature(text.upper())) == 1.0
+    assert estimate_similarity(compute_signature(text), compute_signature(_edited(text, 3))) >= 0.8
+    assert estimate_similarity(compute_signature(text), compute_signature(_text(2))) < 0.3
+
+
+def test_short_and_empty_texts():
+    assert estimate_similarity(compute_signature('spar op'), compute_signature('Spar op!')) == 1.0
+    assert len(compute_signature('')) == NUM_PERM
+
+
+def _article(url, text, title='Titel'):
+    return {'url': url, 'title': title, 'original_data': {'content': text}}
+
+
+def test_remove_near_duplicates_keeps_the_first(tmp_path):
+    text = _text(3)
+    articles = [_article('https://a.dk/1', text), _article('https://b.dk/kopi', _edited(text, 2)),
+                _article('https://c.dk/anden', _text(4))]
+    index = NearDuplicateIndex(str(tmp_path / 'near.json'))
+    assert [article['url'] for article in remove_near_duplicates(articles, index)] == \
+        ['https://a.dk/1', 'https://c.dk/anden']
+
+
+def test_digest_follows_title_and_body_but_not_storage():
+    article = _article('https://a.dk/1', 'brødtekst')
+    stored = {'title': 'Titel', 'original_data': {'content_ref': ContentStore.content_hash('brødtekst')}}
+    assert article_digest(article) == article_digest(stored)
+    assert article_digest(article) != article_digest(_article('https://a.dk/1', 'rettet brødtekst'))
+    assert article_digest(article) != article_digest(_article('https://a.dk/1', 'brødtekst', 'Ny titel'))
+
+
+def test_index_reuses_current_signatures_and_rehashes_edited_text(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / 'near.json'))
+    calls = []
+
+    def text_fn(text):
+        def fetch():
+            calls.append(text)
+            return text
+        return fetch
+
+    first = index.add('https://a.dk/1', text_fn(_text(5)), 'v1')
+    index.add('https://a.dk/1', text_fn('ikke brugt'), 'v1')
+    assert calls == [_text(5)]
+
+    index.add('https://b.dk/1', text_fn(_text(5)), 'v1')
+    assert index.find_similar('https://b.dk/1') == ['https://a.dk/1']
+    edited = index.add('https://a.dk/1', text_fn(_text(6)), 'v2')
+    assert edited != first
+    assert index.find_similar('https://b.dk/1') == []
+
+
+def test_index_saves_digests_and_prunes_removed_urls(tmp_path):
+    path = str(tmp_path / 'near.json')
+    index = NearDuplicateIndex(path)
+    index.add('https://a.dk/1', lambda: _text(7), 'v1')
+    index.add('https://a.dk/2', lambda: _text(7), 'v1')
+    assert index.prune({'https://a.dk/1'}) == 1
+    index.save()
+
+    reloaded = NearDuplicateIndex(path)
+    assert list(reloaded.signatures) == ['https://a.dk/1']
+    assert reloaded.is_current('https://a.dk/1', 'v1')
+    assert not reloaded.is_current('https://a.dk/1', 'v2')
+    assert reloaded.find_similar('https://a.dk/1') == []
+
+
+def test_disk_cache_rehashes_on_new_digest_and_prunes_unseen_keys(tmp_path):
+    path = str(tmp_path / 'signatures.sqlite')
+    cache = DiskSignatureCache(path)
+    cache.get('https://a.dk/1', lambda: _text(8), 'v1')
+    cache.get('https://a.dk/2', lambda: _text(9), 'v1')
+    cache.close()
+
+    cache = DiskSignatureCache(path)
+    assert cache.get('https://a.dk/1', lambda: 'ikke brugt', 'v1') == compute_signature(_text(8))
+    assert cache.get('https://a.dk/3', lambda: _text(10), 'v1') == compute_signature(_text(10))
+    assert cache.computed == 1
+    assert cache.get('https://a.dk/1', lambda: _text(11), 'v2') == compute_signature(_text(11))
+    assert cache.prune() == 1
+    cache.close()
@@ -0,0 +1,55 @@
+import json
+import math
+
+import pytest
+
+from relevance import article_quality, build_relevance, recency, RelevanceIndex, SCALE, RECENCY_HALF_LIFE_DAYS
+
+DAY = 86400
+NEWEST = 1_750_000_000
+
+
+def _index(qualities, timestamps):
+    # Gennem JSON, som API'et læser relevance.json
+    return RelevanceIndex(json.loads(json.dumps(build_relevance(qualities, timestamps))))
+
+
+def test_order_is_by_score_with_ties_in_list_order():
+    qualities = [2.0, 5.0, 2.0, 5.0, 0.5]
+    timestamps = [NEWEST, NEWEST - 400 * DAY, NEWEST, NEWEST - 400 * DAY, None]
+    index = _index(qualities, timestamps)
+    assert [index.score(position) for position in range(5)] == [5.0, 5.6, 5.0, 5.6, 0.5]
+    assert index.top(10) == [1, 3, 0, 2, 4]
+    assert index.top(3) == [1, 3, 0]
+
+
+def test_recency_halves_per_half_life_and_undated_articles_get_none():
+    assert recency(NEWEST, NEWEST) == 3.0
+    assert recency(NEWEST - RECENCY_HALF_LIFE_DAYS * DAY, NEWEST) == pytest.approx(1.5)
+    assert recency(None, NEWEST) == 0.0 and recency(NEWEST, 0) == 0.0
+    # Et arkiv helt uden datoer scores kun på kvalitet
+    index = _index([1.0, 2.0], [None, None])
+    assert index.scores == [SCALE, 2 * SCALE]
+
+
+def test_min_score_is_inclusive_and_respects_the_mask():
+    index = _index([1.0, 4.0, 2.5, 3.0], [None] * 4)
+    assert index.top(10, min_score=2.5) == [1, 3, 2]
+    assert index.top(10, min_score=4.01) == []
+    assert index.top(10, min_score=-1) == [1, 3, 2, 0]
+    assert index.top(10, min_score=1.0, mask=0b1001) == [3, 0]
+
+
+@pytest.mark.parametrize('min_score', [math.nan, math.inf, -math.inf])
+def test_non_finite_min_score_is_rejected(min_score):
+    with pytest.raises(ValueError):
+        _index([1.0], [NEWEST]).top(10, min_score=min_score)
+
+
+def test_nan_confidence_is_ignored():
+    article = {'confidence_scores': {'studerende': math.nan, 'pensionister': 0.5},
+               'minepenge_tags': ['opsparing'], 'source': 'Nordnet Blog'}
+    quality = article_quality(article)
+    assert quality == pytest.approx(3.0 * 0.5 + 1.5 / 5 + 1.5 * 0.9)
+    assert article_quality({'confidence_scores': {'studerende': math.nan}}) == pytest.approx(1.5 * 0.5)
+    assert _index([quality], [NEWEST]).scores == [round((quality + 3.0) * SCALE)]
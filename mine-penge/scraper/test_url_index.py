@@ -0,0 +1,69 @@
+import json
+
+from url_index import SeenUrlIndex, article_id_for_url, canonicalize_url, merge_with_existing
+
+
+def test_canonical_form():
+    assert canonicalize_url('http://WWW.Nordnet.dk/blog/pension/') == 'https://nordnet.dk/blog/pension'
+    assert canonicalize_url('https://nordnet.dk:443/blog//pension#kommentarer') == 'https://nordnet.dk/blog/pension'
+    assert canonicalize_url('https://example.dk:8080/') == 'https://example.dk:8080/'
+
+
+def test_tracking_parameters_are_dropped_and_the_rest_sorted():
+    url = 'https://example.dk/a?utm_source=nyhedsbrev&b=2&fbclid=x&a=1&pk_campaign=y&ref=z'
+    assert canonicalize_url(url) == 'https://example.dk/a?a=1&b=2'
+
+
+def test_empty_url():
+    assert canonicalize_url('') == ''
+    assert canonicalize_url(None) == ''
+
+
+def test_variants_share_one_article_id():
+    variants = ['https://www.nordnet.dk/blog/x/', 'http://nordnet.dk/blog/x?utm_medium=email', 'https://nordnet.dk/blog/x']
+    assert len({article_id_for_url(canonicalize_url(url)) for url in variants}) == 1
+
+
+def _index(tmp_path):
+    path = tmp_path / 'seen_urls.json'
+    path.write_text(json.dumps({'urls': {}}), encoding='utf-8')
+    return SeenUrlIndex(str(path))
+
+
+def test_filter_unseen_keeps_one_url_per_canonical_form(tmp_path):
+    index = _index(tmp_path)
+    index.register('https://nordnet.dk/blog/gammel', 'Nordnet Blog')
+    unseen = index.filter_unseen(['https://www.nordnet.dk/blog/ny/', 'https://nordnet.dk/blog/ny',
+                                  'https://www.nordnet.dk/blog/gammel'])
+    assert [canonicalize_url(url) for url in unseen] == ['https://nordnet.dk/blog/ny']
+
+
+def test_register_is_stable_and_survives_save(tmp_path):
+    index = _index(tmp_path)
+    article_id = index.register('https://www.nordnet.dk/blog/x/', 'Nordnet Blog')
+    assert index.register('https://nordnet.dk/blog/x', 'Andet') == article_id
+    index.save()
+    reloaded = SeenUrlIndex(index.index_path)
+    assert 'http://nordnet.dk/blog/x#top' in reloaded
+    assert reloaded.article_id('https://nordnet.dk/blog/x') == article_id
+    assert reloaded.entries['https://nordnet.dk/blog/x']['source'] == 'Nordnet Blog'
+
+
+def test_seeding_keeps_ids_from_tagged_files(tmp_path):
+    tagged = tmp_path / 'tagged'
+    tagged.mkdir()
+    (tagged / 'tagged_nordnet_blog_posts.json').write_text(json.dumps({'articles': [
+        {'url': 'https://www.nordnet.dk/blog/x/', 'article_id': 'gammelt-id', 'source': 'Nordnet Blog'}]}))
+    index = _index(tmp_path)
+    index.seed_from_tagged(str(tagged))
+    assert index.article_id('https://nordnet.dk/blog/x') == 'gammelt-id'
+
+
+def test_merge_with_existing_lets_new_posts_win(tmp_path):
+    path = tmp_path / 'posts.json'
+    path.write_text(json.dumps({'blog_posts': [{'url': 'https://www.a.dk/1/', 'title': 'Gammel'},
+                                               {'url': 'https://a.dk/2', 'title': 'Uændret'}]}))
+    merged = merge_with_existing(str(path), [{'url': 'https://a.dk/1', 'title': 'Ny'}])
+    assert sorted(post['title'] for post in merged) == ['Ny', 'Uændret']
+    assert merge_with_existing(str(tmp_path / 'mangler.json'), [{'url': 'https://a.dk/1'}]) == \
+        [{'url': 'https://a.dk/1'}]
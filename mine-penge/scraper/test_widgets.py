@@ -0,0 +1,53 @@
+import random
+
+from widgets import build_widgets, theme_slug, widget_file, ALL_THEMES, MAX_LIMIT, MIN_SCORE, THEMES, WIDGET_FIELDS
+
+SCALE = 10
+TAGS = ['su', 'opsparing', 'boligkøb', 'investering', 'gæld', 'pension', 'budget', 'aktier']
+
+
+def _articles(rng, count):
+    return [{'article_id': f'a{position}', 'title': f'Titel {position}', 'summary': 'Resumé', 'source': 'Nordnet Blog',
+             'url': f'https://nordnet.dk/blog/a{position}/', 'date_published': '2025-06-01',
+             'minepenge_tags': rng.sample(TAGS, rng.randint(0, 3)), 'tag_categories': ['Ikke med i widget']}
+            for position in range(count)]
+
+
+def _naive(articles, scores, theme):
+    """Alle artikler over grænsen der matcher temaet, højeste score først og lige scorer i listerækkefølge"""
+    matching = [position for position, article in enumerate(articles)
+                if scores[position] >= MIN_SCORE * SCALE
+                and (theme == ALL_THEMES or any(theme in tag for tag in article['minepenge_tags']))]
+    return [articles[position]['article_id'] for position in sorted(matching, key=lambda p: -scores[p])]
+
+
+def test_every_theme_and_limit_has_a_file():
+    payloads = build_widgets([], [], SCALE)
+    assert sorted(payloads) == sorted(widget_file(theme, limit) for theme in THEMES for limit in range(1, MAX_LIMIT + 1))
+    assert theme_slug('gæld') == 'gaeld' and 'gaeld-3.json' in payloads
+    assert payloads['gaeld-3.json'] == {'version': 1, 'theme': 'gæld', 'title': 'Gæld og Lån', 'articles': []}
+
+
+def test_payload_shape_and_limit_per_slug_match_a_naive_ranking():
+    rng = random.Random(11)
+    articles = _articles(rng, 200)
+    scores = [rng.randint(0, 100) for _ in articles]
+    payloads = build_widgets(articles, scores, SCALE)
+    for theme in THEMES:
+        expected = _naive(articles, scores, theme)
+        for limit in range(1, MAX_LIMIT + 1):
+            payload = payloads[widget_file(theme, limit)]
+            assert set(payload) == {'version', 'theme', 'title', 'articles'}
+            assert payload['theme'] == theme and payload['title'] == THEMES[theme]
+            assert [article['article_id'] for article in payload['articles']] == expected[:limit]
+            for article in payload['articles']:
+                assert list(article) == WIDGET_FIELDS + ['relevance_score']
+                assert article['relevance_score'] >= MIN_SCORE
+
+
+def test_ties_keep_list_order_and_scores_are_unscaled():
+    articles = _articles(random.Random(2), 12)
+    payloads = build_widgets(articles, [50] * 12, SCALE)
+    ranked = payloads[widget_file(ALL_THEMES, MAX_LIMIT)]['articles']
+    assert [article['article_id'] for article in ranked] == [f'a{position}' for position in range(MAX_LIMIT)]
+    assert {article['relevance_score'] for article in ranked} == {5.0}
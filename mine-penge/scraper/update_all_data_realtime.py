@@ -9,10 +9,14 @@ import os
 import sys
 import subprocess
 import json
+import time
 import logging
 from datetime import datetime
 from pathlib import Path
 
+from near_duplicates import find_near_duplicate_pairs
+from metrics import PipelineRun, count_errors
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -38,6 +42,9 @@ class DataUpdater:
         # Opret nødvendige mapper
         os.makedirs(self.data_dir, exist_ok=True)
         os.makedirs(self.tagged_dir, exist_ok=True)
+
+        # Tider og fejl pr. kilde og trin; gemmes til data/tagged/pipeline_run.json (se metrics.py)
+        self.run = PipelineRun()
     
     def run_scraper_realtime(self, script_name):
         """Kører en enkelt scraper script med real-time output"""
@@ -45,10 +52,13 @@ class DataUpdater:
         
         if not os.path.exists(script_path):
             logger.error(f"Scraper script ikke fundet: {script_path}")
+            self.run.record_source(script_name, 0.0, False, 1)
             return False
         
         print(f"\n🔄 Kører {script_name}...")
         print("=" * 50)
+        started = time.perf_counter()
+        errors = 0
         
         try:
             # Kør script med real-time output
@@ -69,9 +79,11 @@ class DataUpdater:
                     break
                 if output:
                     print(output.strip())
+                    errors += count_errors([output])
             
             # Vent på at processen er færdig
             return_code = process.poll()
+            self.run.record_source(script_name, time.perf_counter() - started, return_code == 0, errors)
             
             if return_code == 0:
                 print(f"✅ {script_name} kørt succesfuldt")
@@ -82,6 +94,7 @@ class DataUpdater:
                 
         except Exception as e:
             print(f"❌ Fejl ved kørsel af {script_name}: {e}")
+            self.run.record_source(script_name, time.perf_counter() - started, False, errors + 1)
             return False
     
     def run_all_scrapers(self):
@@ -156,6 +169,7 @@ class DataUpdater:
         print("\n🔍 Tjekker for dubletter...")
         
         duplicate_found = False
+        all_posts = []
         
         for filename in os.listdir(self.data_dir):
             if filename.endswith('.json') and not filename.startswith('tagged_'):
@@ -166,6 +180,7 @@ class DataUpdater:
                         data = json.load(f)
                     
                     if 'blog_posts' in data:
+                        all_posts.extend(data['blog_posts'])
                         urls = [post.get('url', '') for post in data['blog_posts']]
                         unique_urls = set(urls)
                         
@@ -179,6 +194,13 @@ class DataUpdater:
                 except Exception as e:
                     print(f"❌ Fejl ved tjek af {filename}: {e}")
         
+        # Tjek for næsten identiske artikler på tværs af kilder (krydspostede/syndikerede)
+        pairs = find_near_duplicate_pairs(all_posts)
+        for url, other_url in pairs:
+            print(f"⚠️ Næsten identiske artikler: {url} ~ {other_url}")
+        if pairs:
+            duplicate_found = True
+        
         return not duplicate_found
     
     def generate_summary_report(self):
@@ -238,16 +260,22 @@ class DataUpdater:
         print("=" * 60)
         
         # Trin 1: Kør alle scrapers
-        if not self.run_all_scrapers():
+        with self.run.stage('scrape'):
+            scraped = self.run_all_scrapers()
+        if not scraped:
             print("❌ Nogle scrapers fejlede - stopper opdatering")
             return False
         
         # Trin 2: Tjek for dubletter
-        if not self.check_for_duplicates():
+        with self.run.stage('duplicates'):
+            unique = self.check_for_duplicates()
+        if not unique:
             print("⚠️ Dubletter fundet - fortsætter alligevel")
         
         # Trin 3: Kør tagging
-        if not self.run_tagging_realtime():
+        with self.run.stage('tagging'):
+            tagged = self.run_tagging_realtime()
+        if not tagged:
             print("❌ Tagging fejlede")
             return False
         
@@ -280,13 +308,18 @@ def main():
         print("\n🔨 Kører build_articles.py for at samle alle artikler...")
         try:
             build_script = os.path.join(os.path.dirname(__file__), "build_articles.py")
-            result = subprocess.run([sys.executable, build_script], check=True)
-            print("✅ Samlet articles.json er nu opdateret!")
+            with updater.run.stage('build'):
+                result = subprocess.run([sys.executable, build_script], check=True)
+            print("✅ Samlet artikelindeks (public/data/articles-index.json) er nu opdateret!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Fejl ved kørsel af build_articles.py: {e}")
+            success = False
         except Exception as e:
             print(f"❌ Uventet fejl ved build: {e}")
+            success = False
+        updater.run.save(success)
     else:
+        updater.run.save(False)
         print("\n❌ Opdatering fejlede - tjek loggene ovenfor")
         sys.exit(1)
 
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge URL Index
+Fælles URL-kanonisering og et persistent indeks fra kanonisk URL til stabilt artikel-ID.
+
+Alle scrapers slår URLs op i indekset før de hentes, så samme artikel ikke hentes
+flere gange på tværs af opdagelsesmetoder (sitemap, RSS, listing sider) og kørsler.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from glob import glob
+from typing import Dict, List, Any, Iterable, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+INDEX_PATH = os.path.join(DATA_DIR, 'index', 'seen_urls.json')
+TAGGED_DIR = os.path.join(DATA_DIR, 'tagged')
+
+# Query parametre der kun bruges til tracking og aldrig ændrer indholdet
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid',
+    '_ga', '_gl', 'ref', 'ref_src', 'share', 'amp'
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_')
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normaliserer en URL: https, små bogstaver i host, uden 'www.', standardport,
+    fragment, tracking parametre og afsluttende skråstreg. Øvrige parametre sorteres.
+    """
+    if not url:
+        return ''
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    while '//' in path:
+        path = path.replace('//', '/')
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    return urlunsplit(('https', host, path, urlencode(sorted(query)), ''))
+
+
+def article_id_for_url(canonical_url: str) -> str:
+    """Genererer artikel-ID ud fra kanonisk URL (uafhængigt af titel)"""
+    return hashlib.md5(canonical_url.encode()).hexdigest()[:12]
+
+
+class SeenUrlIndex:
+    """Persistent indeks: kanonisk URL -> artikel-ID, kilde og første fund"""
+
+    def __init__(self, index_path: str = INDEX_PATH):
+        self.index_path = index_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """Indlæser indekset; første gang seedes det fra eksisterende taggede filer"""
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('urls', {})
+        else:
+            self.seed_from_tagged()
+
+    def seed_from_tagged(self, tagged_dir: str = TAGGED_DIR):
+        """Bevarer eksisterende artikel-ID'er ved at registrere allerede taggede artikler"""
+        for filepath in sorted(glob(os.path.join(tagged_dir, 'tagged_*_blog_posts.json'))):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for article in data.get('articles', []):
+                canonical = canonicalize_url(article.get('url', ''))
+                if canonical and canonical not in self.entries:
+                    self.entries[canonical] = {
+                        'article_id': article.get('article_id') or article_id_for_url(canonical),
+                        'source': article.get('source', ''),
+                        'first_seen': article.get('tagged_at', '')
+                    }
+                    self.dirty = True
+        if self.entries:
+            logger.info(f"URL-indeks seedet med {len(self.entries)} eksisterende artikler")
+
+    def save(self):
+        """Gemmer indekset hvis det er ændret"""
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'urls': self.entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+        self.dirty = False
+
+    def __contains__(self, url: str) -> bool:
+        return canonicalize_url(url) in self.entries
+
+    def filter_unseen(self, urls: Iterable[str]) -> List[str]:
+        """Returnerer én URL pr. kanonisk URL der endnu ikke er hentet"""
+        unseen = {}
+        for url in sorted(urls):
+            canonical = canonicalize_url(url)
+            if canonical not in self.entries and canonical not in unseen:
+                unseen[canonical] = url
+        return list(unseen.values())
+
+    def register(self, url: str, source: str = '') -> str:
+        """Registrerer en hentet URL og returnerer dens stabile artikel-ID"""
+        canonical = canonicalize_url(url)
+        entry = self.entries.get(canonical)
+        if entry is None:
+            entry = {
+                'article_id': article_id_for_url(canonical),
+                'source': source,
+                'first_seen': datetime.now().isoformat()
+            }
+            self.entries[canonical] = entry
+            self.dirty = True
+        return entry['article_id']
+
+    def article_id(self, url: str) -> Optional[str]:
+        entry = self.entries.get(canonicalize_url(url))
+        return entry['article_id'] if entry else None
+
+
+def merge_with_existing(filename: str, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fletter nye indlæg med dem der allerede ligger i filen (nye vinder ved samme kanoniske URL)"""
+    merged = {}
+    if os.path.exists(filename):
+        with open(filename, 'r', encoding='utf-8') as f:
+            for post in json.load(f).get('blog_posts', []):
+                merged[canonicalize_url(post.get('url', ''))] = post
+    for post in posts:
+        merged[canonicalize_url(post.get('url', ''))] = post
+    return list(merged.values())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mine Penge Widgets
+Færdige svar til widget'en på eksterne sites (public/widget.js og EmbeddableWidget.jsx):
+én lille fil pr. tema og antal, widgets/<tema>-<antal>.json, som buildet skriver ved siden af
+de øvrige artefakter. En visning er dermed én statisk, cachebar forespørgsel uden serverarbejde.
+
+Udvalget er det samme som widget'en før lavede selv: de højest scorede artikler (relevance.py)
+med mindst MIN_SCORE, hvor et af Mine Penge tags indeholder temaet, højst MAX_LIMIT stk.
+"""
+
+import heapq
+from typing import Dict, List, Any, Iterable, Tuple
+
+from search_index import normalize_prefix
+
+WIDGETS_VERSION = 1
+MIN_SCORE = 3.0
+MAX_LIMIT = 10  # samme grænse som embed-generatoren
+ALL_THEMES = 'all'
+
+# Tema -> overskrift; skal matche temaerne i EmbedScriptGenerator.jsx
+THEMES = {
+    'su': 'SU og Studerende',
+    'opsparing': 'Opsparing',
+    'bolig': 'Bolig og Huskøb',
+    'investering': 'Investering',
+    'gæld': 'Gæld og Lån',
+    'pension': 'Pension',
+    'budget': 'Budget',
+    ALL_THEMES: 'Personlig Økonomi'
+}
+
+# Kun de felter widget'en viser
+WIDGET_FIELDS = ['article_id', 'title', 'summary', 'source', 'url', 'date_published']
+
+
+def theme_slug(theme: str) -> str:
+    """Filnavnet for et tema: æ/ø/å foldet som i søgeindekset ("gæld" -> "gaeld")"""
+    return normalize_prefix(theme)
+
+
+def widget_file(theme: str, limit: int) -> str:
+    return f'{theme_slug(theme)}-{limit}.json'
+
+
+def matches_theme(article: Dict[str, Any], theme: str) -> bool:
+    if theme == ALL_THEMES:
+        return True
+    return any(theme in tag.lower() for tag in article.get('minepenge_tags') or [])
+
+
+def build_widgets(articles: Iterable[Dict[str, Any]], scores: Iterable[int], scale: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Filnavn -> payload for alle temaer og antal 1..MAX_LIMIT. `articles` og `scores` følger
+    listeindekset (scorerne i 1/scale), så begge builds kan give dem som strømme.
+    """
+    threshold = round(MIN_SCORE * scale)
+    best: Dict[str, List[Tuple[int, int, Dict[str, Any]]]] = {theme: [] for theme in THEMES}
+    for position, (article, score) in enumerate(zip(articles, scores)):
+        if score < threshold:
+            continue
+        # Lige scorer i listerækkefølge, som i relevansindekset; positionen er unik, så artiklen sammenlignes aldrig
+        entry = (score, -position, article)
+        for theme, heap in best.items():
+            if not matches_theme(article, theme):
+                continue
+            if len(heap) < MAX_LIMIT:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    payloads = {}
+    for theme, heap in best.items():
+        ranked = [{**{field: article.get(field) for field in WIDGET_FIELDS}, 'relevance_score': score / scale}
+                  for score, _, article in sorted(heap, reverse=True)]
+        for limit in range(1, MAX_LIMIT + 1):
+            payloads[widget_file(theme, limit)] = {
+                'version': WIDGETS_VERSION,
+                'theme': theme,
+                'title': THEMES[theme],
+                'articles': ranked[:limit]
+            }
+    return payloads
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { BrowserRouter as Router, Routes, Route } from 'react-router-dom';
 import Navigation from './components/Navigation';
 import Sidebar from './components/Sidebar';
@@ -10,7 +10,7 @@ import LandingPageGenerator from './pages/LandingPageGenerator';
 import QAFeedGenerator from './pages/QAFeedGenerator';
 import InternalLinkStructure from './pages/InternalLinkStructure';
 import EmbedWidget from './pages/EmbedWidget';
-import { fetchArticles, searchArticles, getArticlesByFilter, getStatistics, getAvailableFilters } from './services/articleService';
+import { fetchArticles, loadArticleIndex, searchArticles, getArticlesByFilter, getStatistics, getAvailableFilters, subscribeToUpdates } from './services/articleService';
 import ScrollToTopButton from './components/ScrollToTopButton';
 import './index.css';
 
@@ -31,60 +31,29 @@ function App() {
   const [statistics, setStatistics] = useState({});
   const [availableTags, setAvailableTags] = useState([]);
 
+  const currentPage = useRef(1);
+  currentPage.current = pagination.currentPage;
+
   useEffect(() => {
     loadArticles();
   }, []);
 
-  // Show articles when articles state changes
-  useEffect(() => {
-    if (articles.length > 0 && selectedTopics.includes('Alle tags')) {
-      showCurrentPageArticles();
-    }
-  }, [articles]);
-
-  // Simple function to show articles for current page
-  const showCurrentPageArticles = () => {
-    // Sort articles by date (newest first) and then by source for variety
-    const sortedArticles = [...articles].sort((a, b) => {
-      // First sort by date (newest first)
-      const dateA = new Date(a.published_date || a.scraped_date || 0);
-      const dateB = new Date(b.published_date || b.scraped_date || 0);
-      
-      if (dateA > dateB) return -1;
-      if (dateA < dateB) return 1;
-      
-      // If same date, sort by source for variety
-      const sourceA = a.source || '';
-      const sourceB = b.source || '';
-      return sourceA.localeCompare(sourceB);
-    });
-    
-    const startIndex = (pagination.currentPage - 1) * pagination.pageSize;
-    const endIndex = startIndex + pagination.pageSize;
-    const currentPageArticles = sortedArticles.slice(startIndex, endIndex);
-    setFilteredArticles(currentPageArticles);
-    
-    // Update pagination info
-    setPagination(prev => ({
-      ...prev,
-      totalArticles: articles.length,
-      totalPages: Math.ceil(articles.length / prev.pageSize),
-      hasNextPage: endIndex < articles.length,
-      hasPrevPage: pagination.currentPage > 1
-    }));
-  };
+  // The read API pushes new builds; articleService applies the delta, so reloading is a local re-render
+  useEffect(() => subscribeToUpdates(() => loadArticles(currentPage.current)), []);
 
   // Handle search
-  const handleSearch = (searchQuery) => {
+  const handleSearch = async (searchQuery) => {
     console.log('handleSearch called with:', searchQuery);
     
     if (!searchQuery.trim()) {
-      console.log('Empty search, showing current page articles');
-      showCurrentPageArticles();
+      console.log('Empty search, showing the first page');
+      loadArticles(1);
       return;
     }
     
     console.log('Searching for:', searchQuery);
+    // Search needs the full list index; the unfiltered list only loads page files
+    await loadArticleIndex();
     const searchData = searchArticles(searchQuery, pagination.currentPage, pagination.pageSize);
     console.log('Search results:', searchData);
     setFilteredArticles(searchData.articles || []);
@@ -92,13 +61,15 @@ function App() {
   };
 
   // Handle topic change
-  const handleTopicChange = (topic) => {
+  const handleTopicChange = async (topic) => {
     setSelectedTopics([topic]);
     setPagination(prev => ({ ...prev, currentPage: 1 }));
     
     if (topic === 'Alle tags') {
-      showCurrentPageArticles();
+      loadArticles(1);
     } else {
+      // Filters need the full list index; the unfiltered list only loads page files
+      await loadArticleIndex();
       const filterData = getArticlesByFilter({
         topic: topic.toLowerCase()
       }, 1, pagination.pageSize);
@@ -112,6 +83,7 @@ function App() {
       setLoading(true);
       const data = await fetchArticles(page, pagination.pageSize);
       setArticles(data.articles || []);
+      setFilteredArticles(data.articles || []);
       setPagination(data.pagination || {});
       setStatistics(getStatistics());
       
@@ -140,9 +112,6 @@ function App() {
       ];
       
       setAvailableTags(tags);
-      
-      // Show initial articles after state is updated
-      setTimeout(() => showCurrentPageArticles(), 0);
     } catch (error) {
       console.error('Error loading articles:', error);
     } finally {
@@ -153,8 +122,7 @@ function App() {
   const handlePageChange = (newPage) => {
     // Update articles for new page
     if (selectedTopics.includes('Alle tags')) {
-      setPagination(prev => ({ ...prev, currentPage: newPage }));
-      setTimeout(() => showCurrentPageArticles(), 0);
+      loadArticles(newPage);
     } else {
       const selectedTag = selectedTopics[0];
       const filterData = getArticlesByFilter({
@@ -1,6 +1,7 @@
-import React from 'react';
-import { Heart, ExternalLink, Clock, User } from 'lucide-react';
+import React, { useState } from 'react';
+import { Heart, ExternalLink, Clock, User, ChevronDown, ChevronUp } from 'lucide-react';
 import UserFeedback from './UserFeedback';
+import { getArticleDetail } from '../services/articleService';
 
 function ArticleCard({ article, isFavorite = false, onToggleFavorite }) {
   const { 
@@ -16,6 +17,23 @@ function ArticleCard({ article, isFavorite = false, onToggleFavorite }) {
     url
   } = article || {};
 
+  // The list only holds slim records; the body comes from the article's detail shard on demand
+  const [expanded, setExpanded] = useState(false);
+  const [detail, setDetail] = useState(null);
+  const [detailError, setDetailError] = useState(false);
+
+  const toggleDetail = async () => {
+    setExpanded(!expanded);
+    if (expanded || detail || !article_id) return;
+    try {
+      setDetail(await getArticleDetail(article_id));
+      setDetailError(false);
+    } catch (error) {
+      console.error('Error loading article detail:', error);
+      setDetailError(true);
+    }
+  };
+
   const getDifficultyColor = (difficulty) => {
     switch (difficulty) {
       case 'begynder': return 'bg-success-100 text-success-800';
@@ -114,6 +132,15 @@ function ArticleCard({ article, isFavorite = false, onToggleFavorite }) {
         {summary || 'AI-resumé: Planlægning og madplaner kan spare dig for tusindvis af kroner årligt. Her er de bedste tips til at reducere dit madbudget uden at gå på kompromis med kvaliteten.'}
       </p>
 
+      {/* Full text from the detail shard */}
+      {expanded && (
+        <div className="text-nordic-700 mb-4 leading-relaxed whitespace-pre-line">
+          {detail
+            ? detail.original_data?.content || 'Artiklen har ingen brødtekst.'
+            : detailError ? 'Kunne ikke hente artiklen.' : 'Henter artikel...'}
+        </div>
+      )}
+
       {/* Tags */}
       <div className="flex flex-wrap gap-2 mb-4">
         {(minepenge_tags || ['opsparing', 'børnefamilie', 'begynder']).slice(0, 3).map((tag, index) => (
@@ -140,6 +167,15 @@ function ArticleCard({ article, isFavorite = false, onToggleFavorite }) {
         <span className="text-sm text-nordic-500">
           Kilde: {source || 'DR.dk'}
         </span>
+        {article_id && (
+          <button
+            onClick={toggleDetail}
+            className="inline-flex items-center text-primary-600 hover:text-primary-700 font-medium text-sm transition-colors"
+          >
+            {expanded ? 'Skjul artikel' : 'Vis hele artiklen'}
+            {expanded ? <ChevronUp className="h-4 w-4 ml-1" /> : <ChevronDown className="h-4 w-4 ml-1" />}
+          </button>
+        )}
         <a 
           href={url || "#"}
           target="_blank" 
@@ -8,19 +8,15 @@ function EmbeddableWidget({ theme = 'su', limit = 3, showSource = true }) {
   useEffect(() => {
     const fetchArticles = async () => {
       try {
-        const response = await fetch(`http://localhost:8000/api/articles/relevant?min_score=3.0`);
-        const data = await response.json();
-        
-        // Filter by theme if specified
-        let filteredArticles = data.articles;
-        if (theme && theme !== 'all') {
-          filteredArticles = data.articles.filter(article => 
-            article.tags && article.tags.some(tag => tag.toLowerCase().includes(theme.toLowerCase()))
-          );
+        // Ready-made payload per theme and limit, written by the scraper build (scraper/widgets.py)
+        const slug = theme.toLowerCase().replace(/æ/g, 'ae').replace(/ø/g, 'oe').replace(/å/g, 'aa');
+        const size = Math.min(Math.max(parseInt(limit, 10) || 3, 1), 10);
+        const response = await fetch(`/data/widgets/${slug}-${size}.json`);
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
         }
-        
-        // Take only the specified limit
-        setArticles(filteredArticles.slice(0, limit));
+        const data = await response.json();
+        setArticles(data.articles);
         setLoading(false);
       } catch (err) {
         setError('Kunne ikke indlæse artikler');
@@ -86,7 +82,7 @@ function EmbeddableWidget({ theme = 'su', limit = 3, showSource = true }) {
         ) : (
           <div className="widget-articles">
             {articles.map((article, index) => (
-              <div key={article.id} className="widget-article">
+              <div key={article.article_id} className="widget-article">
                 <h4 className="article-title">
                   <a href={article.url} target="_blank" rel="noopener noreferrer">
                     {article.title}
@@ -95,7 +91,7 @@ function EmbeddableWidget({ theme = 'su', limit = 3, showSource = true }) {
                 <p className="article-summary">{article.summary}</p>
                 <div className="article-meta">
                   {showSource && <span className="article-source">{article.source}</span>}
-                  <span className="article-date">{article.publishedAt}</span>
+                  <span className="article-date">{article.date_published}</span>
                   {article.relevance_score && (
                     <span className="article-relevance">Relevans: {article.relevance_score}</span>
                   )}
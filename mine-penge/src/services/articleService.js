@@ -1,36 +1,51 @@
 // Article service for handling data from Python scraper scripts and APIs
-import articlesData from '../data/articles.json';
+// Build output (scraper/build_articles.py) is served statically from /data:
+//   articles-index.json   slim list index used for filters and search, loaded on first use
+//   pages/page-N.json     pre-paginated slim pages for the unfiltered list; page-1.json also
+//                         carries a summary (tags, audiences, complexities, sources) for the first screen
+//   articles/<id>.json    full article detail shards, fetched on demand
+//   search-index.json     inverted search index (positions in articles-index.json)
+//   facets.json           per-facet bitsets and counts (positions in articles-index.json)
+//   sort-orders.json      pre-sorted positions for each sort order (newest, oldest, source, relevance)
+//   manifest.json         release builds only: content-hashed file names for the above
+//   deltas/               patches between consecutive list index versions
+// When the read API is used, /api/articles/stream pushes the same patches after each build
+// (Server-Sent Events), so the loaded list is kept current without refetching it.
+import { SearchIndex } from './searchIndex';
+import { FacetIndex } from './facetIndex';
+import { SortOrders, DEFAULT_SORT } from './sortOrders';
+import { applyDelta, deltaChain } from './deltas';
+
+// PAGE_SIZE in scraper/build_articles.py
+const PAGE_FILE_SIZE = 20;
 
 class ArticleService {
   constructor() {
-    this.articles = articlesData.articles || [];
-    this.metadata = articlesData.metadata || {};
+    this.articles = [];
+    this.metadata = {};
+    this.firstPage = null;
     this.apiBaseUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+    this.dataBaseUrl = import.meta.env.VITE_DATA_URL || '/data';
+    this.searchIndex = null;
+    this.facetIndex = null;
+    this.sortOrders = null;
+    this.artifacts = {};
     this.cache = new Map();
     this.lastFetch = null;
     this.cacheTimeout = 5 * 60 * 1000; // 5 minutter
+    this.stream = null;
+    this.listeners = new Set();
   }
 
-  // Get all articles with pagination
-  getAllArticles(page = 1, pageSize = 20) {
-    // Sort articles by date (newest first) and then by source for variety
-    const sortedArticles = [...this.articles].sort((a, b) => {
-      // First sort by date (newest first)
-      const dateA = new Date(a.published_date || a.scraped_date || 0);
-      const dateB = new Date(b.published_date || b.scraped_date || 0);
-      
-      if (dateA > dateB) return -1;
-      if (dateA < dateB) return 1;
-      
-      // If same date, sort by source for variety
-      const sourceA = a.source || '';
-      const sourceB = b.source || '';
-      return sourceA.localeCompare(sourceB);
-    });
-    
+  // Get all articles with pagination; sort is newest, oldest, source or relevance
+  getAllArticles(page = 1, pageSize = 20, sort = DEFAULT_SORT) {
+    // Pages are slices of a pre-sorted permutation, sorted once at build (or load) time
+    if (!this.sortOrders) {
+      this.sortOrders = SortOrders.fromArticles(this.articles);
+    }
     const startIndex = (page - 1) * pageSize;
     const endIndex = startIndex + pageSize;
-    const paginatedArticles = sortedArticles.slice(startIndex, endIndex);
+    const paginatedArticles = this.sortOrders.page(sort, page, pageSize).map(position => this.articles[position]);
     
     return {
       articles: paginatedArticles,
@@ -49,33 +64,59 @@ class ArticleService {
   getArticlesByFilter(filters = {}, page = 1, pageSize = 20) {
     let filtered = this.articles;
 
-    // Filter by topic/tags
-    if (filters.topic) {
-      filtered = filtered.filter(article => 
-        article.minepenge_tags && article.minepenge_tags.some(tag => 
-          tag.toLowerCase().includes(filters.topic.toLowerCase())
-        )
-      );
-    }
+    // Facet filters via precomputed bitsets when available
+    const facetFilters = this.facetIndex ? this.toFacetFilters(filters) : null;
+    if (facetFilters) {
+      if (Object.keys(facetFilters).length > 0) {
+        filtered = this.facetIndex.filter(facetFilters).map(position => this.articles[position]);
+      }
+    } else if (this.facetIndex) {
+      filtered = [];
+    } else {
+      // Filter by tag category
+      if (filters.category) {
+        filtered = filtered.filter(article => 
+          article.tag_categories && article.tag_categories.includes(filters.category)
+        );
+      }
 
-    // Filter by audience
-    if (filters.audience) {
-      filtered = filtered.filter(article => 
-        article.target_audiences && article.target_audiences.includes(filters.audience)
-      );
+      // Filter by audience
+      if (filters.audience) {
+        filtered = filtered.filter(article => 
+          article.target_audiences && article.target_audiences.includes(filters.audience)
+        );
+      }
+
+      // Filter by difficulty/complexity
+      if (filters.difficulty) {
+        filtered = filtered.filter(article => 
+          article.complexity_level === filters.difficulty
+        );
+      }
+
+      // Filter by source
+      if (filters.source) {
+        filtered = filtered.filter(article => 
+          article.source && article.source.toLowerCase().includes(filters.source.toLowerCase())
+        );
+      }
     }
 
-    // Filter by difficulty/complexity
-    if (filters.difficulty) {
+    // Filter by publication date range (epoch seconds)
+    if (filters.dateFrom || filters.dateTo) {
+      const from = filters.dateFrom || 0;
+      const to = filters.dateTo || Infinity;
       filtered = filtered.filter(article => 
-        article.complexity_level === filters.difficulty
+        article.published_ts && article.published_ts >= from && article.published_ts <= to
       );
     }
 
-    // Filter by source
-    if (filters.source) {
+    // Filter by topic/tags
+    if (filters.topic) {
       filtered = filtered.filter(article => 
-        article.source && article.source.toLowerCase().includes(filters.source.toLowerCase())
+        article.minepenge_tags && article.minepenge_tags.some(tag => 
+          tag.toLowerCase().includes(filters.topic.toLowerCase())
+        )
       );
     }
 
@@ -109,11 +150,76 @@ class ArticleService {
     };
   }
 
-  // Get article by ID
+  // Map UI filters to facet selections; null when a filter can match nothing
+  toFacetFilters(filters) {
+    const facetFilters = {};
+    if (filters.audience) facetFilters.audience = [filters.audience];
+    if (filters.difficulty) facetFilters.complexity = [filters.difficulty];
+    if (filters.category) facetFilters.category = [filters.category];
+    if (filters.source) {
+      const sourceLower = filters.source.toLowerCase();
+      const sources = [...this.facetIndex.masks.source.keys()]
+        .filter(source => source.toLowerCase().includes(sourceLower));
+      if (sources.length === 0) return null;
+      facetFilters.source = sources;
+    }
+    return facetFilters;
+  }
+
+  // Counts per facet value for the current filters (other facets applied)
+  getFacetCounts(filters = {}) {
+    if (!this.facetIndex) return null;
+    const facetFilters = this.toFacetFilters(filters);
+    return facetFilters ? this.facetIndex.counts(facetFilters) : null;
+  }
+
+  // Get article by ID (slim record from the list index)
   getArticleById(id) {
     return this.articles.find(article => article.article_id === id);
   }
 
+  // Fetch the full article (including body) from its detail shard
+  async getArticleDetail(id) {
+    const cacheKey = `detail:${id}`;
+    if (this.cache.has(cacheKey)) {
+      return this.cache.get(cacheKey);
+    }
+
+    const response = await fetch(`${this.dataBaseUrl}/articles/${encodeURIComponent(id)}.json`);
+    if (!response.ok) {
+      throw new Error(`Article ${id} not found`);
+    }
+    const detail = await response.json();
+    this.cache.set(cacheKey, detail);
+    return detail;
+  }
+
+  // Fetch a single pre-built page without loading the full list index
+  async getArticlePage(page = 1) {
+    // Pages change with every build, so they expire like the list index
+    const cacheKey = `page:${page}`;
+    const cached = this.cache.get(cacheKey);
+    if (cached && (Date.now() - cached.fetchedAt) < this.cacheTimeout) {
+      return cached.pageData;
+    }
+
+    const response = await fetch(`${this.dataBaseUrl}/pages/page-${page}.json`);
+    if (!response.ok) {
+      throw new Error(`Page ${page} not found`);
+    }
+    const pageData = await response.json();
+    this.cache.set(cacheKey, { pageData, fetchedAt: Date.now() });
+    if (page === 1) {
+      this.firstPage = pageData;
+    }
+    return pageData;
+  }
+
+  // The list index is only downloaded once filters or search need it
+  hasListIndex() {
+    return this.articles.length > 0;
+  }
+
   // Get metadata
   getMetadata() {
     return this.metadata;
@@ -121,6 +227,12 @@ class ArticleService {
 
   // Get available filters
   getAvailableFilters() {
+    // Before the list index is loaded, page-1.json's summary lists the same values
+    if (!this.hasListIndex() && this.firstPage && this.firstPage.summary) {
+      const { tags = [], audiences = [], complexities = [], sources = [] } = this.firstPage.summary;
+      return { tags, audiences, complexities, sources };
+    }
+
     const allTags = new Set();
     const allAudiences = new Set();
     const allComplexities = new Set();
@@ -152,25 +264,33 @@ class ArticleService {
   // Get statistics
   getStatistics() {
     const filters = this.getAvailableFilters();
+    const totalArticles = this.hasListIndex() || !this.firstPage
+      ? this.articles.length
+      : this.firstPage.pagination.totalArticles;
     
     return {
-      totalArticles: this.articles.length,
+      totalArticles,
       lastUpdated: this.metadata.lastUpdated,
-      sources: this.metadata.sources || [],
+      sources: this.metadata.sources || filters.sources,
       articlesPerSource: this.metadata.articlesPerSource || {},
       availableTags: filters.tags.length,
       availableAudiences: filters.audiences.length,
       availableComplexities: filters.complexities.length,
       averageArticlesPerPage: 20,
-      totalPages: Math.ceil(this.articles.length / 20)
+      totalPages: Math.ceil(totalArticles / 20)
     };
   }
 
-  // Load fresh articles from articles.json
+  // Load fresh articles from the API or the static list index
   async loadFreshArticles() {
     try {
-      console.log('Loading fresh articles from articles.json...');
+      console.log('Loading fresh articles...');
       
+      // Pushed updates keep the list current while the stream is open
+      if (this.stream && this.articles.length > 0) {
+        return this.articles;
+      }
+
       // Check if cache is still valid
       if (this.lastFetch && (Date.now() - this.lastFetch) < this.cacheTimeout) {
         console.log('Using cached articles data');
@@ -187,7 +307,12 @@ class ArticleService {
           if (freshData.articles && Array.isArray(freshData.articles)) {
             this.articles = freshData.articles;
             this.metadata = freshData.metadata || {};
+            // Index positions only match the static list index
+            this.searchIndex = null;
+            this.facetIndex = null;
+            this.sortOrders = null;
             this.lastFetch = Date.now();
+            this.subscribe();
             console.log(`Loaded ${this.articles.length} fresh articles from API`);
             return this.articles;
           }
@@ -196,17 +321,27 @@ class ArticleService {
         console.log('API not available, using local file');
       }
 
-      // Fallback to local file
-      const freshData = await import('../data/articles.json');
+      // Patch an already loaded list index instead of downloading it again
+      if (this.metadata.version && await this.applyDeltas()) {
+        this.lastFetch = Date.now();
+        console.log(`Updated to list version ${this.metadata.version} from deltas`);
+        return this.articles;
+      }
+
+      // Fallback to the static list index
+      await this.loadArtifactManifest();
+      const response = await fetch(this.artifactUrl('articles-index.json'));
+      const freshData = response.ok ? await response.json() : {};
       
-      if (freshData.default.articles && Array.isArray(freshData.default.articles)) {
-        this.articles = freshData.default.articles;
-        this.metadata = freshData.default.metadata || {};
+      if (freshData.articles && Array.isArray(freshData.articles)) {
+        this.articles = freshData.articles;
+        this.metadata = freshData.metadata || {};
+        await Promise.all([this.loadSearchIndex(), this.loadFacetIndex(), this.loadSortOrders()]);
         this.lastFetch = Date.now();
-        console.log(`Loaded ${this.articles.length} fresh articles from local file`);
+        console.log(`Loaded ${this.articles.length} fresh articles from list index`);
         return this.articles;
       } else {
-        throw new Error('Invalid data format in articles.json');
+        throw new Error('Invalid data format in articles-index.json');
       }
     } catch (error) {
       console.error('Error loading fresh articles:', error);
@@ -214,6 +349,151 @@ class ArticleService {
     }
   }
 
+  // Apply the build's deltas from the loaded version; false means a full reload is needed
+  async applyDeltas() {
+    try {
+      const response = await fetch(`${this.dataBaseUrl}/deltas/index.json`, { cache: 'no-cache' });
+      if (!response.ok) return false;
+      const chain = deltaChain(await response.json(), this.metadata.version);
+      if (!chain) return false;
+      if (chain.length === 0) return true;
+
+      let articles = this.articles;
+      let metadata = this.metadata;
+      for (const entry of chain) {
+        const deltaResponse = await fetch(`${this.dataBaseUrl}/deltas/${entry.file}`);
+        if (!deltaResponse.ok) return false;
+        const delta = await deltaResponse.json();
+        articles = applyDelta(articles, delta);
+        metadata = delta.metadata;
+      }
+      this.articles = articles;
+      this.metadata = metadata;
+      // Index positions follow the list, so both indexes are reloaded for the new version
+      await this.loadArtifactManifest();
+      await Promise.all([this.loadSearchIndex(), this.loadFacetIndex(), this.loadSortOrders()]);
+      return true;
+    } catch (error) {
+      console.log('Deltas not available, reloading list index');
+      return false;
+    }
+  }
+
+  // Follow the API's update stream from the loaded version; EventSource reconnects with Last-Event-ID
+  subscribe() {
+    if (this.stream || typeof EventSource === 'undefined') return;
+    const stream = new EventSource(`${this.apiBaseUrl}/api/articles/stream?since=${this.metadata.version || ''}`);
+    stream.addEventListener('update', event => this.applyUpdate(JSON.parse(event.data)));
+    stream.addEventListener('reset', () => this.resync());
+    stream.onerror = () => {
+      // CLOSED means the server refused the stream; fall back to the cache timeout
+      if (stream.readyState === EventSource.CLOSED) {
+        this.stream = null;
+      }
+    };
+    this.stream = stream;
+  }
+
+  unsubscribe() {
+    if (this.stream) {
+      this.stream.close();
+      this.stream = null;
+    }
+  }
+
+  // Apply a pushed delta (same format as the deltas/ files) to the loaded list
+  applyUpdate(delta) {
+    if (delta.from !== this.metadata.version) {
+      this.resync();
+      return;
+    }
+    this.articles = applyDelta(this.articles, delta);
+    this.metadata = delta.metadata;
+    // Index positions only match the static list index
+    this.searchIndex = null;
+    this.facetIndex = null;
+    this.sortOrders = null;
+    this.lastFetch = Date.now();
+    console.log(`Updated to list version ${this.metadata.version} from the update stream`);
+    this.notify();
+  }
+
+  // The stream cannot patch the loaded version; reload the list once and follow from there
+  async resync() {
+    this.unsubscribe();
+    this.lastFetch = null;
+    await this.loadFreshArticles();
+    this.notify();
+  }
+
+  // Call `listener` after every pushed update; returns a function that removes it
+  onUpdate(listener) {
+    this.listeners.add(listener);
+    return () => this.listeners.delete(listener);
+  }
+
+  notify() {
+    this.listeners.forEach(listener => listener(this.metadata));
+  }
+
+  // Positional indexes are only valid for the exact list version they were built from
+  matchesList(data) {
+    return Boolean(data) && data.docCount === this.articles.length &&
+      (data.listVersion === undefined || data.listVersion === this.metadata.version);
+  }
+
+  // Release builds list content-hashed artifact names in manifest.json (always revalidated)
+  async loadArtifactManifest() {
+    try {
+      const response = await fetch(`${this.dataBaseUrl}/manifest.json`, { cache: 'no-cache' });
+      this.artifacts = response.ok ? (await response.json()).artifacts || {} : {};
+    } catch (error) {
+      this.artifacts = {};
+    }
+  }
+
+  // URL for a build artifact, preferring its hashed release file
+  artifactUrl(name) {
+    const entry = this.artifacts[name];
+    return `${this.dataBaseUrl}/${entry && entry.file ? entry.file : name}`;
+  }
+
+  // Load the prebuilt search index; search falls back to a linear scan without it
+  async loadSearchIndex() {
+    try {
+      const response = await fetch(this.artifactUrl('search-index.json'));
+      const data = response.ok ? await response.json() : null;
+      this.searchIndex = this.matchesList(data) ? new SearchIndex(data) : null;
+    } catch (error) {
+      console.log('Search index not available, using linear search');
+      this.searchIndex = null;
+    }
+  }
+
+  // Load the prebuilt facet bitsets; filters fall back to scanning without them
+  async loadFacetIndex() {
+    try {
+      const response = await fetch(this.artifactUrl('facets.json'));
+      const data = response.ok ? await response.json() : null;
+      this.facetIndex = this.matchesList(data) ? new FacetIndex(data) : null;
+    } catch (error) {
+      console.log('Facet index not available, filtering by scan');
+      this.facetIndex = null;
+    }
+  }
+
+  // Load the pre-sorted permutations; without them each order is sorted once on first use
+  async loadSortOrders() {
+    try {
+      const response = await fetch(this.artifactUrl('sort-orders.json'));
+      const data = response.ok ? await response.json() : null;
+      this.sortOrders = this.matchesList(data) ? new SortOrders(data) : null;
+    } catch (error) {
+      console.log('Sort orders not available, sorting on first use');
+      this.sortOrders = null;
+    }
+  }
+
   // Trigger Python scraper to run
   async triggerScraper() {
     try {
@@ -254,24 +534,10 @@ class ArticleService {
     const searchLower = query.toLowerCase().trim();
     console.log('Searching for:', searchLower);
     
-    // Simple and precise search
-    const filtered = this.articles.filter(article => {
-      const title = (article.title || '').toLowerCase();
-      const summary = (article.summary || '').toLowerCase();
-      const tags = (article.minepenge_tags || []).map(tag => tag.toLowerCase());
-      
-      // Check for exact matches in title, summary, or tags
-      const titleMatch = title.includes(searchLower);
-      const summaryMatch = summary.includes(searchLower);
-      const tagMatch = tags.some(tag => tag.includes(searchLower));
-      
-      if (titleMatch || summaryMatch || tagMatch) {
-        console.log('Found match in article:', article.title);
-        return true;
-      }
-      
-      return false;
-    });
+    // Indexed search: posting list lookups instead of scanning every article
+    const filtered = this.searchIndex
+      ? this.searchIndex.lookup(query).map(position => this.articles[position])
+      : this.linearSearch(searchLower);
 
     console.log('Found', filtered.length, 'articles for search:', searchLower);
 
@@ -293,6 +559,27 @@ class ArticleService {
     };
   }
 
+  // Substring search used when no search index is loaded
+  linearSearch(searchLower) {
+    return this.articles.filter(article => {
+      const title = (article.title || '').toLowerCase();
+      const summary = (article.summary || '').toLowerCase();
+      const tags = (article.minepenge_tags || []).map(tag => tag.toLowerCase());
+      
+      // Check for exact matches in title, summary, or tags
+      const titleMatch = title.includes(searchLower);
+      const summaryMatch = summary.includes(searchLower);
+      const tagMatch = tags.some(tag => tag.includes(searchLower));
+      
+      if (titleMatch || summaryMatch || tagMatch) {
+        console.log('Found match in article:', article.title);
+        return true;
+      }
+      
+      return false;
+    });
+  }
+
   // Get articles by tag with pagination
   getArticlesByTag(tag, page = 1, pageSize = 20) {
     const filtered = this.articles.filter(article => 
@@ -347,6 +634,7 @@ class ArticleService {
   clearCache() {
     this.cache.clear();
     this.lastFetch = null;
+    this.unsubscribe();
   }
 }
 
@@ -354,10 +642,18 @@ class ArticleService {
 const articleService = new ArticleService();
 
 // Export functions for backward compatibility
-export const fetchArticles = async (page = 1, pageSize = 20) => {
+// Unfiltered pages come from pages/page-N.json until filters or search have loaded the list index
+export const fetchArticles = async (page = 1, pageSize = 20, sort = DEFAULT_SORT) => {
   try {
+    if (!articleService.hasListIndex() && pageSize === PAGE_FILE_SIZE && sort === DEFAULT_SORT) {
+      try {
+        return await articleService.getArticlePage(page);
+      } catch (pageError) {
+        console.log('Page files not available, loading the list index');
+      }
+    }
     await articleService.loadFreshArticles();
-    return articleService.getAllArticles(page, pageSize);
+    return articleService.getAllArticles(page, pageSize, sort);
   } catch (error) {
     console.error('Error fetching articles:', error);
     throw error;
@@ -373,6 +669,11 @@ export const scrapeArticles = async () => {
   }
 };
 
+// Filters and search work on the full list index; await this before calling them
+export const loadArticleIndex = async () => {
+  await articleService.loadFreshArticles();
+};
+
 export const searchArticles = (query, page = 1, pageSize = 20) => {
   return articleService.searchArticles(query, page, pageSize);
 };
@@ -385,10 +686,26 @@ export const getArticlesByFilter = (filters, page = 1, pageSize = 20) => {
   return articleService.getArticlesByFilter(filters, page, pageSize);
 };
 
+export const getFacetCounts = (filters = {}) => {
+  return articleService.getFacetCounts(filters);
+};
+
 export const getAvailableFilters = () => {
   return articleService.getAvailableFilters();
 };
 
+export const getArticleDetail = (id) => {
+  return articleService.getArticleDetail(id);
+};
+
+export const getArticlePage = (page = 1) => {
+  return articleService.getArticlePage(page);
+};
+
+export const subscribeToUpdates = (listener) => {
+  return articleService.onUpdate(listener);
+};
+
 export const getStatistics = () => {
   return articleService.getStatistics();
 };
@@ -0,0 +1,27 @@
+// Applies the delta files written by scraper/deltas.py to a loaded list index.
+// Order matters: drop removed ids, swap in changed records, then insert added
+// articles in ascending position order so every position is final when used.
+export const applyDelta = (articles, delta) => {
+  const removed = new Set(delta.removed);
+  const changed = new Map(delta.changed.map(article => [article.article_id, article]));
+  const result = articles
+    .filter(article => !removed.has(article.article_id))
+    .map(article => changed.get(article.article_id) || article);
+  delta.added.forEach(({ position, article }) => {
+    result.splice(position, 0, article);
+  });
+  return result;
+};
+
+// Finds the chain of deltas leading from `fromVersion` to the latest version, or null
+export const deltaChain = (deltaIndex, fromVersion) => {
+  const chain = [];
+  let current = fromVersion;
+  while (current !== deltaIndex.version) {
+    const next = deltaIndex.deltas.find(delta => delta.from === current);
+    if (!next) return null;
+    chain.push(next);
+    current = next.to;
+  }
+  return chain;
+};
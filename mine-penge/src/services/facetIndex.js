@@ -0,0 +1,105 @@
+// Filtering and facet counts over the prebuilt facets.json written by scraper/facets.py.
+// Each facet value is a bitset over article positions in articles-index.json, so any
+// filter combination is a word-wise AND and counts are popcounts.
+import { base64ToBytes, decodeSorted } from './intCodec';
+
+const popcount32 = (word) => {
+  let v = word - ((word >>> 1) & 0x55555555);
+  v = (v & 0x33333333) + ((v >>> 2) & 0x33333333);
+  return (((v + (v >>> 4)) & 0x0f0f0f0f) * 0x01010101) >>> 24;
+};
+
+const popcount = (mask) => {
+  let total = 0;
+  for (let i = 0; i < mask.length; i++) total += popcount32(mask[i]);
+  return total;
+};
+
+export class FacetIndex {
+  constructor(data) {
+    this.docCount = data.docCount;
+    this.wordCount = Math.ceil(this.docCount / 32);
+    this.masks = {};
+    for (const [facet, values] of Object.entries(data.facets)) {
+      this.masks[facet] = new Map(
+        Object.entries(values).map(([value, entry]) => [value, this.decodeMask(entry)])
+      );
+    }
+  }
+
+  decodeMask(entry) {
+    const mask = new Uint32Array(this.wordCount);
+    if (entry.bits !== undefined) {
+      base64ToBytes(entry.bits).forEach((byte, i) => {
+        mask[i >> 2] |= byte << ((i & 3) * 8);
+      });
+    } else {
+      decodeSorted(entry.ids).forEach(position => {
+        mask[position >> 5] |= 1 << (position & 31);
+      });
+    }
+    return mask;
+  }
+
+  allMask() {
+    const mask = new Uint32Array(this.wordCount).fill(0xffffffff);
+    const rest = this.docCount & 31;
+    if (rest) mask[this.wordCount - 1] = (1 << rest) - 1;
+    return mask;
+  }
+
+  // AND across facets, OR between selected values of the same facet.
+  // `exclude` skips one facet (used for that facet's own counts).
+  filterMask(filters, exclude = null) {
+    const mask = this.allMask();
+    for (const [facet, selected] of Object.entries(filters)) {
+      const values = [].concat(selected || []);
+      if (facet === exclude || values.length === 0) continue;
+      const facetMask = new Uint32Array(this.wordCount);
+      for (const value of values) {
+        const valueMask = this.masks[facet] && this.masks[facet].get(value);
+        if (!valueMask) continue;
+        for (let i = 0; i < this.wordCount; i++) facetMask[i] |= valueMask[i];
+      }
+      for (let i = 0; i < this.wordCount; i++) mask[i] &= facetMask[i];
+    }
+    return mask;
+  }
+
+  // Number of articles per facet value given the other facets' filters
+  counts(filters = {}) {
+    const result = {};
+    for (const [facet, values] of Object.entries(this.masks)) {
+      const mask = this.filterMask(filters, facet);
+      result[facet] = {};
+      for (const [value, valueMask] of values) {
+        let count = 0;
+        for (let i = 0; i < this.wordCount; i++) count += popcount32(mask[i] & valueMask[i]);
+        result[facet][value] = count;
+      }
+    }
+    return result;
+  }
+
+  // Sorted article positions set in a mask
+  positions(mask) {
+    const result = [];
+    for (let i = 0; i < mask.length; i++) {
+      let word = mask[i];
+      while (word) {
+        const low = word & -word;
+        result.push(i * 32 + 31 - Math.clz32(low));
+        word ^= low;
+      }
+    }
+    return result;
+  }
+
+  filter(filters) {
+    return this.positions(this.filterMask(filters));
+  }
+
+  size(mask) {
+    return popcount(mask);
+  }
+}
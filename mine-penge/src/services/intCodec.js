@@ -0,0 +1,48 @@
+// Decoders for the compact integer lists written by scraper/int_codec.py
+// (base64 varints, optionally delta-encoded for sorted lists)
+
+export const base64ToBytes = (encoded) => {
+  const binary = atob(encoded);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes;
+};
+
+export const decodeVarints = (encoded) => {
+  const values = [];
+  let value = 0;
+  let shift = 0;
+  for (const byte of base64ToBytes(encoded)) {
+    value += (byte & 0x7f) * 2 ** shift;
+    if (byte & 0x80) {
+      shift += 7;
+    } else {
+      values.push(value);
+      value = 0;
+      shift = 0;
+    }
+  }
+  return values;
+};
+
+export const decodeSorted = (encoded) => {
+  const values = decodeVarints(encoded);
+  for (let i = 1; i < values.length; i++) {
+    values[i] += values[i - 1];
+  }
+  return values;
+};
+
+// Zigzag deltas for unsorted lists such as sort permutations
+export const decodeDeltas = (encoded) => {
+  const values = decodeVarints(encoded);
+  let total = 0;
+  for (let i = 0; i < values.length; i++) {
+    const zigzag = values[i];
+    total += zigzag % 2 === 0 ? zigzag / 2 : -(zigzag + 1) / 2;
+    values[i] = total;
+  }
+  return values;
+};
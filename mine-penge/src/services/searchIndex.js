@@ -0,0 +1,73 @@
+// Lookups in the prebuilt search index written by scraper/search_index.py.
+// normalizeToken must stay in sync with the Python normalization.
+import { decodeSorted } from './intCodec';
+
+const TOKEN_RE = /[\p{L}\p{N}_]+/gu;
+const FOLD = { 'æ': 'ae', 'ø': 'oe', 'å': 'aa', 'é': 'e', 'ü': 'u', 'ö': 'oe', 'ä': 'ae' };
+const SUFFIXES = ['ernes', 'erne', 'enes', 'ene', 'ers', 'ens', 'ets', 'er', 'en', 'et', 'e', 's'];
+const MIN_STEM = 3;
+const STOPWORDS = new Set([
+  'og', 'i', 'at', 'det', 'en', 'et', 'er', 'til', 'på', 'af', 'for', 'med', 'som', 'de',
+  'den', 'der', 'du', 'jeg', 'vi', 'har', 'kan', 'om', 'så', 'men', 'ikke', 'fra', 'eller',
+  'din', 'dine', 'dit', 'hvad', 'hvordan', 'man', 'sig', 'skal', 'vil', 'være', 'var', 'the'
+]);
+
+export const normalizeToken = (token) => {
+  let normalized = token.toLowerCase();
+  for (const suffix of SUFFIXES) {
+    if (normalized.endsWith(suffix) && normalized.length - suffix.length >= MIN_STEM) {
+      normalized = normalized.slice(0, -suffix.length);
+      break;
+    }
+  }
+  return normalized.replace(/[æøåéüöä]/g, (ch) => FOLD[ch]);
+};
+
+export const tokenize = (text) =>
+  (text.toLowerCase().match(TOKEN_RE) || [])
+    .filter(token => !STOPWORDS.has(token))
+    .map(normalizeToken);
+
+export class SearchIndex {
+  constructor(data) {
+    this.terms = data.terms;
+    this.postings = data.postings;
+    this.exact = new Map(this.terms.map((term, i) => [term, i]));
+  }
+
+  // Binary search for the first term >= prefix
+  lowerBound(prefix) {
+    let lo = 0;
+    let hi = this.terms.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >> 1;
+      if (this.terms[mid] < prefix) lo = mid + 1;
+      else hi = mid;
+    }
+    return lo;
+  }
+
+  positionsFor(term, prefix) {
+    if (!prefix) {
+      const i = this.exact.get(term);
+      return new Set(i === undefined ? [] : decodeSorted(this.postings[i]));
+    }
+    const result = new Set();
+    for (let i = this.lowerBound(term); i < this.terms.length && this.terms[i].startsWith(term); i++) {
+      decodeSorted(this.postings[i]).forEach(position => result.add(position));
+    }
+    return result;
+  }
+
+  // All terms must match; the last term is matched as a prefix (type-ahead)
+  lookup(query) {
+    const queryTerms = tokenize(query);
+    let result = null;
+    for (let i = 0; i < queryTerms.length; i++) {
+      const positions = this.positionsFor(queryTerms[i], i === queryTerms.length - 1);
+      result = result === null ? positions : new Set([...result].filter(p => positions.has(p)));
+      if (result.size === 0) return [];
+    }
+    return result ? [...result].sort((a, b) => a - b) : [];
+  }
+}
@@ -0,0 +1,61 @@
+// Pre-sorted article positions for every sort order, built by scraper/sort_orders.py.
+// A page is a slice of a permutation, so nothing is sorted per request.
+import { decodeDeltas } from './intCodec';
+
+export const DEFAULT_SORT = 'newest';
+
+const timestamp = article => article.published_ts || 0;
+const source = article => article.source || '';
+// Scores live in relevance.json; API lists from /api/articles/relevant carry them as relevance_score
+const relevance = article => article.relevance_score || 0;
+const byId = (a, b) => {
+  const idA = a.article_id || '';
+  const idB = b.article_id || '';
+  return idA < idB ? -1 : idA > idB ? 1 : 0;
+};
+
+const newest = (a, b) => timestamp(b) - timestamp(a) || source(a).localeCompare(source(b)) || byId(a, b);
+
+// Same keys as SORT_KEYS and relevance_key in sort_orders.py; ties are broken by article_id
+const COMPARATORS = {
+  newest,
+  // Undated articles go last in both directions
+  oldest: (a, b) => !timestamp(a) - !timestamp(b) || timestamp(a) - timestamp(b) ||
+    source(a).localeCompare(source(b)) || byId(a, b),
+  source: (a, b) => source(a).localeCompare(source(b)) || timestamp(b) - timestamp(a) || byId(a, b),
+  relevance: (a, b) => relevance(b) - relevance(a) || newest(a, b)
+};
+
+export class SortOrders {
+  constructor(data) {
+    this.docCount = data.docCount;
+    this.defaultSort = data.default || DEFAULT_SORT;
+    this.orders = {};
+    Object.entries(data.orders).forEach(([sort, encoded]) => {
+      this.orders[sort] = Uint32Array.from(decodeDeltas(encoded));
+    });
+  }
+
+  // Fallback for article lists without a build artifact (e.g. from the API): sorts once per order
+  static fromArticles(articles) {
+    const sortOrders = new SortOrders({ docCount: articles.length, orders: {} });
+    sortOrders.articles = articles;
+    return sortOrders;
+  }
+
+  order(sort) {
+    const name = this.orders[sort] || COMPARATORS[sort] ? sort : this.defaultSort;
+    if (!this.orders[name] && this.articles) {
+      const positions = Array.from(this.articles.keys());
+      positions.sort((a, b) => COMPARATORS[name](this.articles[a], this.articles[b]) || a - b);
+      this.orders[name] = Uint32Array.from(positions);
+    }
+    return this.orders[name] || this.orders[this.defaultSort];
+  }
+
+  // Positions for one page (1-based)
+  page(sort, page, pageSize) {
+    const start = (page - 1) * pageSize;
+    return Array.from(this.order(sort).subarray(start, start + pageSize));
+  }
+}